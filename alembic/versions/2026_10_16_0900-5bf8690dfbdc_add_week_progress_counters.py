@@ -0,0 +1,72 @@
+"""add week progress counters
+
+Revision ID: 5bf8690dfbdc
+Revises:
+Create Date: 2026-10-16 09:00:00.000000
+
+Databases created with init_db() before this revision have the baseline
+schema; databases created after it already have these columns and can
+simply be stamped with `alembic stamp head`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5bf8690dfbdc'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('weeks', sa.Column('completed_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('weeks', sa.Column('category_completed', sa.JSON(), server_default='{}', nullable=False))
+    op.add_column('weeks', sa.Column('person_completed', sa.JSON(), server_default='{}', nullable=False))
+
+    # Backfill counters from existing task instances
+    op.execute("""
+        UPDATE weeks SET completed_count = sub.n
+        FROM (
+            SELECT week_id, count(*) AS n
+            FROM task_instances
+            WHERE status = 'completed'
+            GROUP BY week_id
+        ) AS sub
+        WHERE weeks.id = sub.week_id
+    """)
+    op.execute("""
+        UPDATE weeks SET category_completed = sub.counts
+        FROM (
+            SELECT week_id, json_object_agg(category, n) AS counts
+            FROM (
+                SELECT ti.week_id, coalesce(tt.category, 'other') AS category, count(*) AS n
+                FROM task_instances ti
+                JOIN task_types tt ON tt.id = ti.task_type_id
+                WHERE ti.status = 'completed'
+                GROUP BY ti.week_id, coalesce(tt.category, 'other')
+            ) AS per_category
+            GROUP BY week_id
+        ) AS sub
+        WHERE weeks.id = sub.week_id
+    """)
+    op.execute("""
+        UPDATE weeks SET person_completed = sub.counts
+        FROM (
+            SELECT week_id, json_object_agg(completed_by::text, n) AS counts
+            FROM (
+                SELECT week_id, completed_by, count(*) AS n
+                FROM task_instances
+                WHERE status = 'completed' AND completed_by IS NOT NULL
+                GROUP BY week_id, completed_by
+            ) AS per_person
+            GROUP BY week_id
+        ) AS sub
+        WHERE weeks.id = sub.week_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('weeks', 'person_completed')
+    op.drop_column('weeks', 'category_completed')
+    op.drop_column('weeks', 'completed_count')
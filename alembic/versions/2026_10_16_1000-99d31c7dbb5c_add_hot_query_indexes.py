@@ -0,0 +1,35 @@
+"""add hot query indexes
+
+Revision ID: 99d31c7dbb5c
+Revises: 5bf8690dfbdc
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '99d31c7dbb5c'
+down_revision = '5bf8690dfbdc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_weeks_open_deadline', 'weeks', ['deadline'],
+        postgresql_where=sa.text('closed = false')
+    )
+    op.create_index('ix_task_instances_week_status', 'task_instances', ['week_id', 'status'])
+    op.create_index(op.f('ix_task_instances_completed_by'), 'task_instances', ['completed_by'])
+    op.create_index(op.f('ix_task_opt_outs_task_type_id'), 'task_opt_outs', ['task_type_id'])
+    op.create_index(op.f('ix_completion_log_task_instance_id'), 'completion_log', ['task_instance_id'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_completion_log_task_instance_id'), table_name='completion_log')
+    op.drop_index(op.f('ix_task_opt_outs_task_type_id'), table_name='task_opt_outs')
+    op.drop_index(op.f('ix_task_instances_completed_by'), table_name='task_instances')
+    op.drop_index('ix_task_instances_week_status', table_name='task_instances')
+    op.drop_index('ix_weeks_open_deadline', table_name='weeks')
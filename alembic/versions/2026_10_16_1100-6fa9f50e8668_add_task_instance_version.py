@@ -0,0 +1,24 @@
+"""add task instance version
+
+Revision ID: 6fa9f50e8668
+Revises: 99d31c7dbb5c
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6fa9f50e8668'
+down_revision = '99d31c7dbb5c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('task_instances', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('task_instances', 'version')
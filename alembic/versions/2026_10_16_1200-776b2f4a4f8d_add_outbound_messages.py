@@ -0,0 +1,38 @@
+"""add outbound messages
+
+Revision ID: 776b2f4a4f8d
+Revises: 6fa9f50e8668
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '776b2f4a4f8d'
+down_revision = '6fa9f50e8668'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbound_messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chat_id', sa.BIGINT(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('parse_mode', sa.String(length=20), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.CheckConstraint("status IN ('pending', 'failed')", name='check_outbound_status'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outbound_messages_status'), 'outbound_messages', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_outbound_messages_status'), table_name='outbound_messages')
+    op.drop_table('outbound_messages')
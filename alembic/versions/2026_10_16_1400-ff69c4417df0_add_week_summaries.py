@@ -0,0 +1,79 @@
+"""add week summaries
+
+Revision ID: ff69c4417df0
+Revises: eb4709d3cd22
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ff69c4417df0'
+down_revision = 'eb4709d3cd22'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'week_summaries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('week_id', sa.Integer(), nullable=False),
+        sa.Column('completed_count', sa.Integer(), nullable=False),
+        sa.Column('total_tasks', sa.Integer(), nullable=False),
+        sa.Column('total_minutes', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['week_id'], ['weeks.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('week_id')
+    )
+    op.create_table(
+        'week_person_summaries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('week_summary_id', sa.Integer(), nullable=False),
+        sa.Column('person_id', sa.Integer(), nullable=False),
+        sa.Column('completed_count', sa.Integer(), nullable=False),
+        sa.Column('minutes', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['person_id'], ['people.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['week_summary_id'], ['week_summaries.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('week_summary_id', 'person_id', name='uq_week_summary_person')
+    )
+    op.create_index(op.f('ix_week_person_summaries_person_id'), 'week_person_summaries', ['person_id'])
+
+    # Backfill closed weeks from their task instances. total_tasks is the sum
+    # of CATEGORY_AMOUNTS (14) at the time of writing. Who was active back
+    # then is unknown, so only contributors get per-person rows.
+    op.execute("""
+        INSERT INTO week_summaries (week_id, completed_count, total_tasks, total_minutes, created_at)
+        SELECT w.id,
+               count(tt.id),
+               14,
+               coalesce(sum(tt.estimated_duration_minutes), 0),
+               now()
+        FROM weeks w
+        LEFT JOIN task_instances ti ON ti.week_id = w.id
+        LEFT JOIN task_types tt ON tt.id = ti.task_type_id AND ti.status = 'completed'
+        WHERE w.closed
+        GROUP BY w.id
+    """)
+    op.execute("""
+        INSERT INTO week_person_summaries (week_summary_id, person_id, completed_count, minutes)
+        SELECT ws.id,
+               ti.completed_by,
+               count(*),
+               coalesce(sum(tt.estimated_duration_minutes), 0)
+        FROM week_summaries ws
+        JOIN task_instances ti ON ti.week_id = ws.week_id
+        JOIN task_types tt ON tt.id = ti.task_type_id
+        WHERE ti.status = 'completed' AND ti.completed_by IS NOT NULL
+        GROUP BY ws.id, ti.completed_by
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_week_person_summaries_person_id'), table_name='week_person_summaries')
+    op.drop_table('week_person_summaries')
+    op.drop_table('week_summaries')
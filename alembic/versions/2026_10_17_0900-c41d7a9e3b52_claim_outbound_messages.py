@@ -0,0 +1,33 @@
+"""claim outbound messages
+
+Revision ID: c41d7a9e3b52
+Revises: ff69c4417df0
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7a9e3b52'
+down_revision = 'ff69c4417df0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('outbound_messages', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+    op.drop_constraint('check_outbound_status', 'outbound_messages', type_='check')
+    op.create_check_constraint(
+        'check_outbound_status', 'outbound_messages', "status IN ('pending', 'sending', 'failed')"
+    )
+
+
+def downgrade() -> None:
+    op.execute("UPDATE outbound_messages SET status = 'pending' WHERE status = 'sending'")
+    op.drop_constraint('check_outbound_status', 'outbound_messages', type_='check')
+    op.create_check_constraint(
+        'check_outbound_status', 'outbound_messages', "status IN ('pending', 'failed')"
+    )
+    op.drop_column('outbound_messages', 'claimed_at')
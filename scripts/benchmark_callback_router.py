@@ -0,0 +1,116 @@
+"""Benchmark callback dispatch cost per update.
+
+Compares the compiled route trie with a linear if/elif-style scan (what
+the old handle_callback did) as more flows are registered, and reports the
+cost of decoding and verifying signed callback data. Handlers are no-ops,
+so only routing is measured; no database or Telegram access is needed.
+
+Usage: python scripts/benchmark_callback_router.py [updates]   (default 100000)
+"""
+
+import sys
+import asyncio
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.callback_codec import decode_callback, encode_callback
+from src.callback_router import CallbackRouter, router
+import src.handlers  # registers the callback routes
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPDATES = 100_000
+EXTRA_FLOWS = [0, 10, 100, 1000]
+
+# Callback data as produced by the real menus
+SAMPLE_DATA = [
+    "menu", "status", "help", "mystats",
+    "complete:categories", "complete:category:kitchen", "complete:task:1234",
+    "amend:categories", "amend:task:42", "ask:category:toilet", "ask:task:7",
+]
+
+
+async def noop(query, **kwargs):
+    pass
+
+
+def build_router(extra_flows: int) -> CallbackRouter:
+    """The real route table plus `extra_flows` synthetic flows (3 routes each)."""
+    table = CallbackRouter()
+    for pattern, route in router.routes.items():
+        table.add(pattern, noop, route.code, route.private, route.week_scoped)
+    for i in range(extra_flows):
+        code = 0x1000 + 3 * i
+        table.add(f"flow{i}:categories", noop, code)
+        table.add(f"flow{i}:category:{{category}}", noop, code + 1, week_scoped=True)
+        table.add(f"flow{i}:task:{{task_id:int}}", noop, code + 2, week_scoped=True)
+    return table
+
+
+def build_chain(table: CallbackRouter):
+    """Ordered (action, handler) pairs, checked one by one like an if/elif chain.
+
+    Synthetic flows come first, as new flows would be added ahead of the
+    real ones' `elif`s in the worst case.
+    """
+    actions = {}
+    for pattern in reversed(list(table.routes)):
+        actions.setdefault(pattern.split(":", 1)[0], noop)
+    return list(actions.items())
+
+
+async def time_trie(table: CallbackRouter, updates: int) -> float:
+    start = time.perf_counter()
+    for i in range(updates):
+        route, args = table.match(SAMPLE_DATA[i % len(SAMPLE_DATA)])
+        await table.dispatch(None, route, args, notify_group_func=None)
+    return (time.perf_counter() - start) / updates
+
+
+async def time_decode(table: CallbackRouter, updates: int) -> float:
+    payloads = [encode_callback(data, week_id=1234, routes=table) for data in SAMPLE_DATA]
+    start = time.perf_counter()
+    for i in range(updates):
+        press = decode_callback(payloads[i % len(payloads)], routes=table)
+        await table.dispatch(None, press.route, dict(press.args), notify_group_func=None)
+    return (time.perf_counter() - start) / updates
+
+
+async def time_chain(chain, updates: int) -> float:
+    start = time.perf_counter()
+    for i in range(updates):
+        parts = SAMPLE_DATA[i % len(SAMPLE_DATA)].split(":")
+        for action, handler in chain:
+            if parts[0] == action:
+                await handler(None, parts=parts)
+                break
+    return (time.perf_counter() - start) / updates
+
+
+async def run_benchmark(updates: int):
+    logger.info("=" * 60)
+    logger.info(f"Callback dispatch: {updates} updates per table")
+    logger.info("=" * 60)
+
+    for extra_flows in EXTRA_FLOWS:
+        table = build_router(extra_flows)
+        trie = await time_trie(table, updates)
+        decoded = await time_decode(table, updates)
+        chain = await time_chain(build_chain(table), updates)
+        logger.info(
+            f"{len(table.routes):>5} routes: trie {trie * 1e6:6.2f} µs/update | "
+            f"signed {decoded * 1e6:6.2f} µs/update | "
+            f"if/elif chain {chain * 1e6:7.2f} µs/update"
+        )
+
+    logger.info("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_UPDATES))
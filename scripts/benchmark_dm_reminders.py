@@ -0,0 +1,103 @@
+"""Benchmark the DM reminder fan-out against a local stub Bot API.
+
+Starts a tiny HTTP server that answers Bot API calls after a fixed delay
+(simulating Telegram's round trip), then sends one reminder to each of
+N fake residents at several concurrency levels. No database or real
+Telegram access is needed.
+
+Note: in production the bot's rate limiter caps sending at ~30 messages
+per second, which bounds throughput regardless of concurrency.
+
+Usage: python scripts/benchmark_dm_reminders.py [residents] [latency_ms]   (default 1000 50)
+"""
+
+import sys
+import json
+import asyncio
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import tornado.web
+from telegram import Bot
+from telegram.request import HTTPXRequest
+from src.reminders import format_dm_reminder, send_direct_messages
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+for noisy in ("httpx", "tornado.access"):
+    logging.getLogger(noisy).setLevel(logging.WARNING)
+
+STUB_PORT = 8765
+CONCURRENCY_LEVELS = [1, 8, 32, 128]
+
+
+class StubBotAPI(tornado.web.RequestHandler):
+    """Answers every Bot API method with a plausible result after `latency` seconds."""
+
+    def initialize(self, latency: float):
+        self.latency = latency
+
+    async def post(self, token: str, method: str):
+        await asyncio.sleep(self.latency)
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Stub", "username": "stub_bot"}
+        else:
+            chat_id = int(self.get_body_argument("chat_id", "0"))
+            result = {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": "ok",
+            }
+        self.set_header("Content-Type", "application/json")
+        self.write(json.dumps({"ok": True, "result": result}))
+
+
+async def run_benchmark(residents: int, latency_ms: int):
+    app = tornado.web.Application([
+        (r"/bot([^/]+)/(\w+)", StubBotAPI, {"latency": latency_ms / 1000}),
+    ])
+    server = app.listen(STUB_PORT, address="127.0.0.1")
+
+    tasks = ["Toilet 1", "Shower 2", "Kitchen A", "Fridge 3"]
+    messages = [
+        (1_000_000 + i, format_dm_reminder(f"Resident {i}", tasks, "⏰ Due in *2 days*"))
+        for i in range(residents)
+    ]
+
+    logger.info("=" * 60)
+    logger.info(f"DM reminder fan-out: {residents} residents, {latency_ms} ms stub latency")
+    logger.info("=" * 60)
+
+    try:
+        for concurrency in CONCURRENCY_LEVELS:
+            bot = Bot(
+                "123:stub",
+                base_url=f"http://127.0.0.1:{STUB_PORT}/bot",
+                request=HTTPXRequest(connection_pool_size=concurrency),
+            )
+            async with bot:
+                start = time.perf_counter()
+                results = await send_direct_messages(bot, messages, concurrency)
+                elapsed = time.perf_counter() - start
+
+            logger.info(
+                f"concurrency {concurrency:>4}: {elapsed:7.2f} s | "
+                f"{residents / elapsed:7.1f} msg/s | {results}"
+            )
+    finally:
+        server.stop()
+
+    logger.info("=" * 60)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    residents = args[0] if args else 1000
+    latency_ms = args[1] if len(args) > 1 else 50
+    asyncio.run(run_benchmark(residents, latency_ms))
@@ -0,0 +1,82 @@
+"""Benchmark menu callback handling with and without the menu cache.
+
+Replays the "Complete Task" navigation (category menu, then each
+category's task menu) through the real callback handler with a stub
+query object, first invalidating the menu cache before every callback
+(the old behaviour: rebuilt from the database each time), then with the
+cache warm. Read-only, so it is safe to run against a live database.
+
+Usage: python scripts/benchmark_menus.py [rounds]   (default 200)
+"""
+
+import sys
+import asyncio
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.database import get_async_db
+from src.current_week import get_current_week
+from src.menus import CATEGORY_AMOUNTS, invalidate_menus, menu_cache_stats
+from src.callback_codec import decode_callback, encode_callback
+from src.callback_router import router
+import src.handlers  # registers the callback routes
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUNDS = 200
+
+
+class StubQuery:
+    """Stands in for a CallbackQuery; edits are discarded."""
+
+    async def edit_message_text(self, *args, **kwargs):
+        pass
+
+
+async def replay(payloads, rounds: int, cached: bool) -> float:
+    """Handle every encoded callback `rounds` times; returns callbacks per second."""
+    query = StubQuery()
+    invalidate_menus()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for payload in payloads:
+            if not cached:
+                invalidate_menus()
+            press = decode_callback(payload)
+            await router.dispatch(query, press.route, dict(press.args))
+    elapsed = time.perf_counter() - start
+    return rounds * len(payloads) / elapsed
+
+
+async def run_benchmark(rounds: int):
+    async with get_async_db() as db:
+        current_week = await get_current_week(db)
+    if not current_week:
+        logger.error("No active week found; create one first (python -m src.bot or reset_db)")
+        return
+
+    # Encoded like the real buttons' callback_data
+    callbacks = ["complete:categories"] + [f"complete:category:{c}" for c in CATEGORY_AMOUNTS]
+    payloads = [encode_callback(data, current_week.id) for data in callbacks]
+
+    logger.info("=" * 60)
+    logger.info(f"Menu callbacks: {rounds} rounds x {len(callbacks)} callbacks")
+    logger.info("=" * 60)
+
+    uncached = await replay(payloads, rounds, cached=False)
+    cached = await replay(payloads, rounds, cached=True)
+
+    logger.info(f"rebuilt every time: {uncached:9.1f} callbacks/s")
+    logger.info(f"cached:             {cached:9.1f} callbacks/s ({cached / uncached:.1f}x)")
+    logger.info(f"cache stats: {menu_cache_stats()}")
+    logger.info("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROUNDS))
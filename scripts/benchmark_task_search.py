@@ -0,0 +1,60 @@
+"""Benchmark task-name lookups in the in-memory index.
+
+Builds indexes over synthetic task names ("Kitchen 12", "Fridge 3", ...)
+and times a mix of exact, prefix, typo and ambiguous queries. No database
+is needed.
+
+Usage: python scripts/benchmark_task_search.py [sizes...]   (default 12 1000 10000)
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.menus import CATEGORY_AMOUNTS
+from src.task_index import TaskEntry, TaskNameIndex
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [12, 1_000, 10_000]
+QUERIES = ["Kitchen 1", "kitch 1", "kitchn 2", "toliet 3", "fridge", "shower 10", "nothing here"]
+ROUNDS = 200
+
+
+def build_index(size: int) -> TaskNameIndex:
+    categories = sorted(CATEGORY_AMOUNTS)
+    return TaskNameIndex(
+        TaskEntry(i, f"{categories[i % len(categories)].title()} {i // len(categories) + 1}", None)
+        for i in range(size)
+    )
+
+
+def run_benchmark(sizes):
+    logger.info("=" * 60)
+    logger.info("Task-name lookup")
+    logger.info("=" * 60)
+
+    for size in sizes:
+        start = time.perf_counter()
+        index = build_index(size)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            for query in QUERIES:
+                index.lookup(query)
+        per_lookup = (time.perf_counter() - start) / (ROUNDS * len(QUERIES))
+
+        logger.info(f"{size:>6} task types: build {build_ms:7.1f} ms | lookup {per_lookup * 1e6:8.1f} µs")
+
+    logger.info("=" * 60)
+
+
+if __name__ == "__main__":
+    run_benchmark([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,105 @@
+"""Benchmark creating a week's task instances, per-row vs. INSERT ... SELECT.
+
+For each size, seeds that many task types inside a transaction, times both
+ways of creating one instance per task type and rolls everything back, so
+it is safe to run against a live database.
+
+Usage: python scripts/benchmark_week_creation.py [sizes...]   (default 10 1000 100000)
+"""
+
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import insert, select
+from src.database import get_db_session
+from src.models import TaskType, Week, TaskInstance
+from src.week_manager import task_instances_insert
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [10, 1_000, 100_000]
+
+
+def create_week(db) -> int:
+    week = Week(
+        year=1900,
+        week_number=1,
+        start_date=date(1900, 1, 1),
+        deadline=datetime(1900, 1, 7, 23, 59),
+        closed=False,
+    )
+    db.add(week)
+    db.flush()
+    return week.id
+
+
+def per_row(db, week_id: int):
+    """The old approach: load every task type and add instances one by one."""
+    for task_type in db.scalars(select(TaskType)).all():
+        db.add(TaskInstance(week_id=week_id, task_type_id=task_type.id, status="pending"))
+    db.flush()
+
+
+def bulk(db, week_id: int):
+    """Single INSERT ... SELECT FROM task_types."""
+    db.execute(task_instances_insert(week_id))
+
+
+def timed(db, func):
+    """Run one approach in a savepoint and roll it back; returns (seconds, rows created)."""
+    savepoint = db.begin_nested()
+    try:
+        week_id = create_week(db)
+        start = time.perf_counter()
+        func(db, week_id)
+        elapsed = time.perf_counter() - start
+        created = db.query(TaskInstance).filter_by(week_id=week_id).count()
+    finally:
+        savepoint.rollback()
+        db.expunge_all()
+    return elapsed, created
+
+
+def run_benchmark(sizes):
+    logger.info("=" * 60)
+    logger.info("Corridor Bot - Week Creation Benchmark")
+    logger.info("=" * 60)
+
+    db = get_db_session()
+    try:
+        existing = db.query(TaskType).count()
+        seeded = 0
+        for size in sorted(sizes):
+            # Top up the seeded task types to `size` (on top of the real ones)
+            db.execute(
+                insert(TaskType),
+                [{"name": f"Bench Task {i}", "category": "other"} for i in range(seeded, size)]
+            )
+            seeded = size
+
+            row_seconds, row_created = timed(db, per_row)
+            bulk_seconds, bulk_created = timed(db, bulk)
+            assert row_created == bulk_created == existing + size
+
+            logger.info(
+                f"{size:>7} task types: per-row {row_seconds * 1000:9.1f} ms | "
+                f"bulk {bulk_seconds * 1000:8.1f} ms | "
+                f"{row_seconds / bulk_seconds:5.1f}x faster"
+            )
+    finally:
+        db.rollback()
+        db.close()
+
+    logger.info("=" * 60)
+
+
+if __name__ == "__main__":
+    run_benchmark([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,186 @@
+"""Verify that the bot's hot queries are served by index scans.
+
+Seeds a large synthetic dataset inside a transaction, runs EXPLAIN on each
+hot query shape and rolls everything back afterwards, so it is safe to run
+against a live database.
+"""
+
+import sys
+import json
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.dialects import postgresql
+from src.database import get_db_session
+from src.models import Person, TaskType, TaskOptOut, Week, TaskInstance, CompletionLog
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Size of the synthetic dataset
+SEED_PEOPLE = 2000
+SEED_TASK_TYPES = 50
+SEED_WEEKS = 200
+
+# Plan node types that count as using an index
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def seed_dataset(db):
+    """Insert a large synthetic dataset (caller is responsible for rollback)."""
+    logger.info(
+        f"Seeding {SEED_PEOPLE} people, {SEED_TASK_TYPES} task types, {SEED_WEEKS} weeks..."
+    )
+
+    people = db.execute(
+        insert(Person).returning(Person.id),
+        [{"telegram_id": 9_000_000_000 + i, "name": f"Seed {i}"} for i in range(SEED_PEOPLE)]
+    ).scalars().all()
+
+    task_types = db.execute(
+        insert(TaskType).returning(TaskType.id),
+        [{"name": f"Seed Task {i}", "category": "other"} for i in range(SEED_TASK_TYPES)]
+    ).scalars().all()
+
+    start = date(1900, 1, 1)
+    weeks = db.execute(
+        insert(Week).returning(Week.id),
+        [
+            {
+                "year": 1900 + i // 50,
+                "week_number": i % 50 + 1,
+                "start_date": start + timedelta(weeks=i),
+                "deadline": datetime.combine(start + timedelta(weeks=i, days=6), datetime.min.time()),
+                "closed": True,
+            }
+            for i in range(SEED_WEEKS)
+        ]
+    ).scalars().all()
+
+    instances = db.execute(
+        insert(TaskInstance).returning(TaskInstance.id),
+        [
+            {
+                "week_id": week_id,
+                "task_type_id": task_type_id,
+                "status": "completed",
+                "completed_by": people[(w * SEED_TASK_TYPES + t) % len(people)],
+            }
+            for w, week_id in enumerate(weeks)
+            for t, task_type_id in enumerate(task_types)
+        ]
+    ).scalars().all()
+
+    db.execute(
+        insert(CompletionLog),
+        [{"task_instance_id": instance_id, "action": "completed"} for instance_id in instances]
+    )
+
+    db.execute(
+        insert(TaskOptOut),
+        [
+            {"person_id": person_id, "task_type_id": task_types[i % len(task_types)]}
+            for i, person_id in enumerate(people)
+        ]
+    )
+
+    db.execute(text("ANALYZE"))
+
+    return {
+        "week_id": weeks[len(weeks) // 2],
+        "person_id": people[len(people) // 2],
+        "task_type_id": task_types[len(task_types) // 2],
+        "task_instance_id": instances[len(instances) // 2],
+    }
+
+
+def hot_queries(ids):
+    """The query shapes issued by the handlers, with the indexes that may serve them."""
+    return {
+        "current week": (
+            select(Week).filter_by(closed=False).order_by(Week.deadline.desc()).limit(1),
+            {"ix_weeks_open_deadline"},
+        ),
+        "person by telegram_id": (
+            select(Person).filter_by(telegram_id=9_000_000_000 + SEED_PEOPLE // 2).limit(1),
+            {"ix_people_telegram_id"},
+        ),
+        "week tasks by status": (
+            select(TaskInstance).filter_by(week_id=ids["week_id"], status="completed"),
+            {"ix_task_instances_week_status", "uq_week_task"},
+        ),
+        "all-time stats": (
+            select(func.count(TaskInstance.id)).filter_by(completed_by=ids["person_id"]),
+            {"ix_task_instances_completed_by"},
+        ),
+        "opt-outs by task": (
+            select(TaskOptOut).filter_by(task_type_id=ids["task_type_id"]),
+            {"ix_task_opt_outs_task_type_id"},
+        ),
+        "completion log by task": (
+            select(CompletionLog).filter_by(task_instance_id=ids["task_instance_id"]),
+            {"ix_completion_log_task_instance_id"},
+        ),
+    }
+
+
+def plan_indexes(plan) -> set:
+    """Collect the names of indexes used anywhere in a JSON plan tree."""
+    used = set()
+    if plan.get("Node Type") in INDEX_NODES:
+        used.add(plan.get("Index Name"))
+    for child in plan.get("Plans", []):
+        used |= plan_indexes(child)
+    return used
+
+
+def check_query(db, label, query, expected) -> bool:
+    """EXPLAIN a query and check it uses one of the expected indexes."""
+    sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    result = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    plan = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+    used = plan_indexes(plan)
+
+    if used & expected:
+        logger.info(f"✅ {label}: {', '.join(sorted(used & expected))}")
+        return True
+
+    logger.error(f"❌ {label}: expected {sorted(expected)}, plan uses {sorted(used) or 'no index'}")
+    return False
+
+
+def run_checks():
+    """Seed, explain every hot query and roll back."""
+    logger.info("=" * 60)
+    logger.info("Corridor Bot - Index Usage Check")
+    logger.info("=" * 60)
+
+    db = get_db_session()
+    try:
+        ids = seed_dataset(db)
+        results = [
+            check_query(db, label, query, expected)
+            for label, (query, expected) in hot_queries(ids).items()
+        ]
+    finally:
+        db.rollback()
+        db.close()
+
+    logger.info("=" * 60)
+    if all(results):
+        logger.info("🎉 All hot queries use their indexes.")
+    else:
+        logger.error("❌ Some queries don't use an index. Run: alembic upgrade head")
+    logger.info("=" * 60)
+
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_checks())
@@ -9,7 +9,8 @@ sys.path.insert(0, str(project_root))
 
 from datetime import datetime, timedelta
 from src.database import get_db, init_db
-from src.models import Person, TaskType, TaskOptOut, Week, TaskInstance
+from src.models import Person, TaskType, TaskOptOut, Week
+from src.week_manager import task_instances_insert
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -258,29 +259,10 @@ def create_current_week(db):
         closed=False
     )
     db.add(week)
-    db.commit()
-    
-    # Get all task types and active people
-    task_types = db.query(TaskType).all()
-    people = db.query(Person).filter_by(active=True).all()
+    db.flush()
     
-    # Create task instances (excluding opted-out combinations)
-    created_count = 0
-    for task_type in task_types:
-        # Check if this is an optional task with opt-outs
-        opt_out_person_ids = [
-            opt.person_id 
-            for opt in db.query(TaskOptOut).filter_by(task_type_id=task_type.id).all()
-        ]
-        
-        # Always create the task instance (eligible people can claim it)
-        instance = TaskInstance(
-            week_id=week.id,
-            task_type_id=task_type.id,
-            status="pending"
-        )
-        db.add(instance)
-        created_count += 1
+    # Create one task instance per task type (eligible people can claim it)
+    created_count = db.execute(task_instances_insert(week.id)).rowcount
     
     db.commit()
     logger.info(f"Created week {week_num}/{year} with {created_count} task instances")
@@ -0,0 +1,78 @@
+"""Upload the corridor map and task instruction media to Telegram ahead of time.
+
+Each file is sent once to a private chat so its file_id gets cached; the
+bot then serves residents from the cache without uploading. Files that are
+already cached (and unchanged) are skipped.
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import select
+from telegram import Bot
+from telegram.error import TelegramError
+from src.config import settings
+from src.database import get_async_db
+from src.models import TaskType
+from src.media_cache import file_hash, find_task_media, get_cached_file_id, send_cached_media, task_media_key
+from src.handlers.info_handlers import MAP_MEDIA_KEY, MAP_PATH
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def collect_media():
+    """(cache key, path) for every media file the bot can send."""
+    media = []
+    if MAP_PATH.exists():
+        media.append((MAP_MEDIA_KEY, MAP_PATH))
+
+    async with get_async_db() as db:
+        task_names = (await db.scalars(select(TaskType.name).order_by(TaskType.name))).all()
+
+    for name in task_names:
+        path = find_task_media(name)
+        if path:
+            media.append((f"task-{task_media_key(name)}", path))
+    return media
+
+
+async def prewarm_media(chat_id: int):
+    """Upload media that has no valid cached file_id yet."""
+    media = await collect_media()
+    uploaded = failed = 0
+
+    bot_kwargs = {"base_url": settings.telegram_base_url} if settings.telegram_base_url else {}
+    async with Bot(settings.telegram_bot_token, **bot_kwargs) as bot:
+        for key, path in media:
+            if await get_cached_file_id(key, await file_hash(path)):
+                logger.info(f"✓ {key} already cached")
+                continue
+
+            try:
+                message = await send_cached_media(
+                    bot, key, path, chat_id=chat_id, caption=key, disable_notification=True
+                )
+                await message.delete()
+                uploaded += 1
+            except TelegramError as e:
+                logger.error(f"✗ Failed to upload {path.name}: {e}")
+                failed += 1
+
+    logger.info(f"{len(media)} media file(s): {uploaded} uploaded, {failed} failed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    chat_id = int(sys.argv[1]) if len(sys.argv) > 1 else settings.media_prewarm_chat_id
+    if chat_id is None:
+        print("Usage: python scripts/prewarm_media.py <private_chat_id> (or set MEDIA_PREWARM_CHAT_ID)")
+        sys.exit(1)
+
+    sys.exit(0 if asyncio.run(prewarm_media(chat_id)) else 1)
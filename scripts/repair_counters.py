@@ -0,0 +1,42 @@
+"""Recompute the denormalized week progress counters from task instances."""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import select
+from src.database import get_async_db
+from src.models import Week
+from src.week_manager import rebuild_week_counters
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def repair_counters(all_weeks: bool = False):
+    """Rebuild counters for open weeks (or every week with --all)."""
+    async with get_async_db() as db:
+        query = select(Week).order_by(Week.year, Week.week_number).with_for_update()
+        if not all_weeks:
+            query = query.filter_by(closed=False)
+        
+        weeks = (await db.scalars(query)).all()
+        repaired = 0
+        for week in weeks:
+            if await rebuild_week_counters(db, week):
+                repaired += 1
+                logger.warning(
+                    f"Repaired counters for week {week.week_number}/{week.year}: "
+                    f"{week.completed_count} completed"
+                )
+    
+    logger.info(f"Checked {len(weeks)} week(s), repaired {repaired}")
+
+
+if __name__ == "__main__":
+    asyncio.run(repair_counters(all_weeks="--all" in sys.argv[1:]))
@@ -10,6 +10,7 @@ sys.path.insert(0, str(project_root))
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
+    AIORateLimiter,
     Application,
     CommandHandler,
     CallbackQueryHandler,
@@ -18,29 +19,31 @@ from telegram.ext import (
 from telegram.constants import ParseMode
 
 from src.config import settings
-from src.database import get_db
+from src.current_week import get_current_week, is_open_week
+from src.database import get_async_db
+from src.identity_cache import get_person, person_cache_stats, remember_person
 from src.models import Person
-from src.menus import create_main_menu
+from src.menus import create_main_menu, menu_cache_stats
 from src.reminders import setup_reminders
-from src.week_manager import setup_week_rollover
+from src.task_index import get_task_index
+from src.week_manager import catch_up_rollover, setup_week_rollover
+from src.job_store import prune_stale_jobs, setup_job_store
+from src.update_processor import PerUserUpdateProcessor
+from src.outbox import get_outbox
+from src.notifications import NotificationCoalescer
+from src.executor import shutdown_executor
 
-# Import handlers
+from src.callback_codec import CallbackDataError, decode_callback
+from src.callback_router import router
+
+# Import handlers (this also registers their callback routes)
 from src.handlers import (
-    handle_complete_flow,
-    handle_amend_flow,
-    handle_ask_flow,
     cmd_status,
-    show_status_callback,
     cmd_tasks,
-    show_tasks_callback,
     cmd_my_stats,
-    show_stats_callback,
     cmd_show_map,
-    show_map_callback,
     cmd_optout,
-    handle_optout_flow,
     cmd_who_opted_out,
-    show_whooptedout_callback,
 )
 
 # Configure logging
@@ -50,21 +53,45 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shown for buttons from a previous week, an older release or with bad data
+EXPIRED_BUTTON_TEXT = "⌛ This button has expired. Use /menu for a fresh menu."
+
 
 class CorridorBot:
     """Main bot class with private/group chat controls."""
     
     def __init__(self):
         """Initialize the bot."""
-        self.app = Application.builder().token(settings.telegram_bot_token).build()
+        self.update_processor = PerUserUpdateProcessor(settings.max_concurrent_updates)
+        builder = (
+            Application.builder()
+            .token(settings.telegram_bot_token)
+            .concurrent_updates(self.update_processor)
+            # Keep within Telegram's global/per-group limits, honouring RetryAfter
+            .rate_limiter(AIORateLimiter(max_retries=3))
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+        )
+        if settings.telegram_base_url:
+            builder = builder.base_url(settings.telegram_base_url)
+        self.app = builder.build()
+        self.outbox = get_outbox(self.app)
+        self.group_digest = NotificationCoalescer(
+            self._send_to_group, settings.group_digest_seconds
+        )
         self.group_chat_id = settings.telegram_chat_id
         self._register_handlers()
         
+        # Scheduled jobs are stored in the database
+        setup_job_store(self.app)
+        
         # Setup reminders (twice a week)
         setup_reminders(self.app, self.group_chat_id)
         
         # Setup automatic week rollover
         setup_week_rollover(self.app, self.group_chat_id)
+        
+        prune_stale_jobs()
     
     def _register_handlers(self):
         """Register all command and callback handlers."""
@@ -79,7 +106,7 @@ class CorridorBot:
         self.app.add_handler(CommandHandler("optout", self._cmd_optout_wrapper))
         self.app.add_handler(CommandHandler("whooptedout", cmd_who_opted_out))
         
-        # Callback handler for button clicks
+        # Callback handler for button clicks (the handler modules register their own routes)
         self.app.add_handler(CallbackQueryHandler(self.handle_callback))
     
     def is_private_chat(self, update: Update) -> bool:
@@ -115,17 +142,32 @@ class CorridorBot:
                 parse_mode=ParseMode.MARKDOWN
             )
     
+    async def _post_init(self, app: Application):
+        """Start background delivery, catch up on missed week rollovers and load the task-name index."""
+        await self.outbox.start()
+        await catch_up_rollover(app, self.group_chat_id)
+        async with get_async_db() as db:
+            task_index = await get_task_index(db)
+        logger.info(f"Task-name index loaded ({len(task_index)} task types)")
+    
+    async def _post_shutdown(self, app: Application):
+        """Stop background delivery (unsent messages are kept for next start)."""
+        await self.group_digest.close()
+        await self.outbox.stop()
+        shutdown_executor()
+        logger.info(f"Identity cache stats: {person_cache_stats()}")
+        logger.info(f"Menu cache stats: {menu_cache_stats()}")
+    
     async def notify_group(self, message: str):
-        """Send a notification to the group chat."""
+        """Send a notification to the group chat (batched into digests)."""
         if self.group_chat_id:
-            try:
-                await self.app.bot.send_message(
-                    chat_id=self.group_chat_id,
-                    text=message,
-                    parse_mode=ParseMode.MARKDOWN
-                )
-            except Exception as e:
-                logger.error(f"Failed to send group notification: {e}")
+            await self.group_digest.add(message)
+    
+    async def _send_to_group(self, message: str):
+        try:
+            await self.outbox.send(self.group_chat_id, message, parse_mode=ParseMode.MARKDOWN)
+        except Exception as e:
+            logger.error(f"Failed to queue group notification: {e}")
     
     # ========== Wrapper functions for handlers that need bot methods ==========
     
@@ -146,103 +188,42 @@ class CorridorBot:
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle all button clicks."""
         query = update.callback_query
-        await query.answer()
-        
-        data = query.data
-        parts = data.split(":")
-        action = parts[0]
         
-        # Define which actions require private chat
-        private_actions = ["complete", "amend", "ask", "optout", "mystats", "map"]
-        
-        # Check if action requires private chat
-        if action in private_actions and not self.is_private_chat(update):
-            await self.redirect_to_private(update, action.title())
+        # Verified in memory, so forged data never reaches the database
+        try:
+            press = decode_callback(query.data)
+        except CallbackDataError as e:
+            logger.warning(f"Rejected callback data {query.data!r}: {e}")
+            await query.answer(EXPIRED_BUTTON_TEXT, show_alert=True)
             return
         
-        # Route to appropriate handler
-        if action == "menu":
-            await self.show_main_menu(query)
-        elif action == "status":
-            await show_status_callback(query)
-        elif action == "tasks":
-            await show_tasks_callback(query)
-        elif action == "mystats":
-            await show_stats_callback(query)
-        elif action == "map":
-            await show_map_callback(query)
-        elif action == "help":
-            await self.show_help_callback(query)
-        elif action == "whooptedout":
-            await show_whooptedout_callback(query)
-        elif action == "complete":
-            await handle_complete_flow(query, parts, self.notify_group)
-        elif action == "amend":
-            await handle_amend_flow(query, parts, self.notify_group)
-        elif action == "ask":
-            await handle_ask_flow(query, parts)
-        elif action == "optout":
-            await handle_optout_flow(query)
-    
-    async def show_main_menu(self, query):
-        """Show the main menu."""
-        is_private = query.message.chat.type == "private"
+        # Buttons pointing at a week's tasks only work during that week.
+        # The database is only asked when the cached current week disagrees
+        # (the cache may lag a rollover); the handlers re-check the week
+        # when they change anything.
+        if press.route.week_scoped:
+            async with get_async_db() as db:
+                current_week = await get_current_week(db)
+                week_open = current_week is not None and current_week.id == press.week_id
+                if not week_open:
+                    week_open = await is_open_week(db, press.week_id)
+            if not week_open:
+                await query.answer(EXPIRED_BUTTON_TEXT, show_alert=True)
+                return
         
-        if is_private:
-            text = (
-                "🤖 *Pablito's Corridor Manager*\n\n"
-                "🔒 Private Menu - Choose an action:"
-            )
-        else:
-            text = (
-                "🤖 *Pablito's Corridor Manager*\n\n"
-                "👥 Group Menu - Public actions only:"
-            )
-        
-        await query.edit_message_text(
-            text=text,
-            reply_markup=create_main_menu(is_private),
-            parse_mode=ParseMode.MARKDOWN
-        )
-    
-    async def show_help_callback(self, query):
-        """Show help via callback."""
-        is_private = query.message.chat.type == "private"
-        
-        if is_private:
-            text = (
-                "🤖 *Pablito's Corridor Manager*\n\n"
-                "🔒 *Private Chat Commands:*\n"
-                "/menu - Show full menu\n"
-                "/status - Weekly status\n"
-                "/tasks - List all tasks\n"
-                "/mystats - Your stats\n"
-                "/map - Corridor map\n"
-                "/optout <task> <reason> - Opt out\n"
-                "/whooptedout - See opt-outs\n\n"
-                "💡 Use buttons for easy task management!"
-            )
-        else:
-            text = (
-                "🤖 *Pablito's Corridor Manager*\n\n"
-                "👥 *Group Chat Commands:*\n"
-                "/status - Weekly status\n"
-                "/tasks - List all tasks\n"
-                "/whooptedout - See opt-outs\n\n"
-                "🔒 *Private Actions:*\n"
-                "To complete tasks, amend, or see your stats,\n"
-                "message me privately\n\n"
-                "💡 Use buttons for quick access!"
-            )
+        await query.answer()
         
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("« Back to Menu", callback_data="menu")
-        ]])
+        # Check if action requires private chat
+        if press.route.private and not self.is_private_chat(update):
+            await self.redirect_to_private(update, press.route.title)
+            return
         
-        await query.edit_message_text(
-            text=text,
-            reply_markup=keyboard,
-            parse_mode=ParseMode.MARKDOWN
+        await router.dispatch(
+            query,
+            press.route,
+            dict(press.args),
+            notify_group_func=self.notify_group,
+            user_data=context.user_data,
         )
     
     # ========== Command Handlers ==========
@@ -252,8 +233,8 @@ class CorridorBot:
         user = update.effective_user
         is_private = self.is_private_chat(update)
         
-        with get_db() as db:
-            person = db.query(Person).filter_by(telegram_id=user.id).first()
+        async with get_async_db() as db:
+            person = await get_person(db, user.id)
             
             if not person:
                 person = Person(
@@ -262,7 +243,8 @@ class CorridorBot:
                     username=user.username
                 )
                 db.add(person)
-                db.commit()
+                await db.commit()
+                remember_person(person)
                 
                 message = f"Bienvenido Mijo 😉! You're registered, {user.first_name}!\n\n"
             else:
@@ -332,10 +314,37 @@ class CorridorBot:
         await update.message.reply_text(text, parse_mode=ParseMode.MARKDOWN)
     
     def run(self):
-        """Start the bot."""
+        """Start the bot (webhook mode if enabled, long polling otherwise)."""
         logger.info("Starting Pablito's Corridor Manager Bot...")
-        self.app.run_polling(allowed_updates=Update.ALL_TYPES)
-
+        
+        if settings.webhook_enabled:
+            self.run_webhook()
+        else:
+            self.app.run_polling(allowed_updates=Update.ALL_TYPES)
+    
+    def run_webhook(self):
+        """Serve updates from Telegram over an in-process webhook server."""
+        self.app.run_webhook(**self.webhook_options())
+    
+    def webhook_options(self) -> dict:
+        """Keyword arguments for the webhook server, from the settings."""
+        if not settings.webhook_url:
+            raise ValueError("WEBHOOK_URL must be set when WEBHOOK_ENABLED is true")
+        
+        url_path = settings.webhook_path.strip("/")
+        webhook_url = f"{settings.webhook_url.rstrip('/')}/{url_path}"
+        logger.info(
+            f"Webhook mode: listening on {settings.webhook_listen}:{settings.webhook_port}/{url_path}"
+        )
+        
+        return dict(
+            listen=settings.webhook_listen,
+            port=settings.webhook_port,
+            url_path=url_path,
+            webhook_url=webhook_url,
+            secret_token=settings.webhook_secret_token,
+            allowed_updates=Update.ALL_TYPES,
+        )
 
 if __name__ == "__main__":
     bot = CorridorBot()
@@ -0,0 +1,160 @@
+"""Compact, signed encoding of inline-button callback_data.
+
+Buttons are written with the readable route strings of src.callback_router
+(e.g. "complete:task:123") and encoded into at most 64 bytes:
+
+    version | route code | week id | arguments | HMAC (6 bytes)
+
+Integers are varints, strings are length-prefixed UTF-8, and the whole
+thing is URL-safe base64. A press is decoded and verified in memory, so
+forged or garbled data is rejected before any database query, and buttons
+of week-scoped routes (those pointing at a week's tasks) only work during
+the week they were made for.
+"""
+
+import base64
+import hashlib
+import hmac
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from telegram.constants import InlineKeyboardButtonLimit
+
+from src.callback_router import CallbackRouter, Route, router
+from src.config import settings
+
+# ========== CONFIGURATION ==========
+
+# Bump when the layout changes; older buttons are then treated as expired
+CODEC_VERSION = 1
+
+# Truncated HMAC-SHA256 length (48 bits is plenty for a button press)
+MAC_BYTES = 6
+
+# ====================================
+
+_key: Optional[bytes] = None
+
+
+class CallbackDataError(ValueError):
+    """Callback data that is malformed, forged or from an older codec version."""
+
+
+@dataclass(frozen=True)
+class CallbackPress:
+    """A verified button press."""
+
+    route: Route
+    args: Dict[str, Any]
+    week_id: int  # 0 for buttons that are not week-scoped
+
+
+def _signing_key() -> bytes:
+    """HMAC key: CALLBACK_SECRET, or one derived from the bot token."""
+    global _key
+    if _key is None:
+        secret = settings.callback_secret or f"callback-data:{settings.telegram_bot_token}"
+        _key = hashlib.sha256(secret.encode()).digest()
+    return _key
+
+
+def _mac(body: bytes) -> bytes:
+    return hmac.new(_signing_key(), body, hashlib.sha256).digest()[:MAC_BYTES]
+
+
+def _write_varint(out: bytearray, value: int):
+    if value < 0:
+        raise ValueError(f"Cannot encode negative value {value} in callback data")
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        if pos >= len(data) or shift > 63:
+            raise CallbackDataError("Truncated varint")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_callback(data: str, week_id: Optional[int] = None, routes: CallbackRouter = router) -> str:
+    """Encode readable callback data (which must match a registered route).
+
+    Args:
+        data: e.g. "menu" or "complete:task:123"
+        week_id: Required for week-scoped routes, ignored otherwise
+    """
+    matched = routes.match(data)
+    if matched is None:
+        raise ValueError(f"No callback route matches {data!r}")
+    route, args = matched
+
+    if route.week_scoped and week_id is None:
+        raise ValueError(f"Callback route {route.pattern!r} needs a week id")
+
+    body = bytearray([CODEC_VERSION])
+    _write_varint(body, route.code)
+    _write_varint(body, week_id if route.week_scoped else 0)
+    for name, convert in route.params:
+        value = args[name]
+        if convert is int:
+            _write_varint(body, value)
+        else:
+            encoded = value.encode()
+            _write_varint(body, len(encoded))
+            body += encoded
+    body += _mac(bytes(body))
+
+    payload = base64.urlsafe_b64encode(bytes(body)).rstrip(b"=").decode()
+    if len(payload) > InlineKeyboardButtonLimit.MAX_CALLBACK_DATA:
+        raise ValueError(f"Callback data for {data!r} is too long ({len(payload)} bytes)")
+    return payload
+
+
+def decode_callback(payload: str, routes: CallbackRouter = router) -> CallbackPress:
+    """Verify and decode callback data produced by `encode_callback`.
+
+    Raises:
+        CallbackDataError: If the data is malformed, forged or from another codec version
+    """
+    try:
+        raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+    except ValueError:
+        raise CallbackDataError("Not base64")
+
+    if len(raw) <= MAC_BYTES or raw[0] != CODEC_VERSION:
+        raise CallbackDataError("Unknown callback data version")
+
+    body, mac = raw[:-MAC_BYTES], raw[-MAC_BYTES:]
+    if not hmac.compare_digest(mac, _mac(body)):
+        raise CallbackDataError("Bad signature")
+
+    code, pos = _read_varint(body, 1)
+    route = routes.by_code(code)
+    if route is None:
+        raise CallbackDataError(f"Unknown route code {code}")
+    week_id, pos = _read_varint(body, pos)
+
+    args = {}
+    for name, convert in route.params:
+        value, pos = _read_varint(body, pos)
+        if convert is not int:
+            end = pos + value
+            if end > len(body):
+                raise CallbackDataError("Truncated string argument")
+            try:
+                value = body[pos:end].decode()
+            except UnicodeDecodeError:
+                raise CallbackDataError("Invalid string argument")
+            pos = end
+        args[name] = value
+
+    if pos != len(body):
+        raise CallbackDataError("Trailing bytes")
+    return CallbackPress(route=route, args=args, week_id=week_id)
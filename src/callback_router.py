@@ -0,0 +1,197 @@
+"""Table-driven routing of inline-button callbacks.
+
+Handler modules register their callbacks declaratively:
+
+    @callback_route("complete:task:{task_instance_id:int}", code=0x12, private=True, week_scoped=True)
+    async def complete_task_by_id(query, task_instance_id, notify_group_func):
+        ...
+
+Patterns are `:`-separated segments, either literals or `{name}` /
+`{name:int}` parameters. They are compiled into a trie of segments, so a
+lookup costs one dict access per segment however many flows exist.
+Parameters are converted and passed as keyword arguments; extra keyword
+arguments given to `dispatch` (e.g. `notify_group_func`) are only passed
+to handlers that declare them.
+
+Every route has a stable numeric `code`, used by src.callback_codec to
+pack callback_data compactly; keep codes unchanged across releases.
+"""
+
+import inspect
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+# ========== CONFIGURATION ==========
+
+SEPARATOR = ":"
+
+# Converters for `{name:type}` parameters
+PARAM_TYPES: Dict[str, Callable[[str], Any]] = {
+    "str": str,
+    "int": int,
+}
+
+# ====================================
+
+# Splits a pattern on separators outside `{...}` parameters
+_PATTERN_SPLIT = re.compile(re.escape(SEPARATOR) + r"(?![^{]*})")
+
+
+@dataclass(frozen=True)
+class Route:
+    """A compiled callback route."""
+
+    pattern: str
+    code: int
+    handler: Callable
+    private: bool
+    week_scoped: bool
+    params: Tuple[Tuple[str, Callable[[str], Any]], ...]
+    accepts: FrozenSet[str]
+
+    @property
+    def title(self) -> str:
+        """Human-readable action name (used when redirecting to private chat)."""
+        return self.pattern.split(SEPARATOR, 1)[0].title()
+
+
+@dataclass
+class _Node:
+    literals: Dict[str, "_Node"] = field(default_factory=dict)
+    param: Optional["_Node"] = None
+    route: Optional[Route] = None
+
+
+class CallbackRouter:
+    """Maps callback_data strings to handlers."""
+
+    def __init__(self):
+        self._root = _Node()
+        self._routes: Dict[str, Route] = {}
+        # Parameterless patterns, matched with a single dict lookup
+        self._static: Dict[str, Route] = {}
+        self._by_code: Dict[int, Route] = {}
+
+    def add(
+        self,
+        pattern: str,
+        handler: Callable,
+        code: int,
+        private: bool = False,
+        week_scoped: bool = False,
+        replace: bool = False,
+    ) -> Route:
+        """Register `handler` for callback data matching `pattern`.
+
+        Args:
+            code: Stable numeric id of the route in encoded callback_data
+            private: Only allowed in private chats
+            week_scoped: Buttons are only valid during the week they were made for
+            replace: Allow re-registering an existing pattern
+        """
+        node = self._root
+        params = []
+        for segment in _PATTERN_SPLIT.split(pattern):
+            if segment.startswith("{") and segment.endswith("}"):
+                name, _, type_name = segment[1:-1].partition(":")
+                if type_name and type_name not in PARAM_TYPES:
+                    raise ValueError(f"Unknown parameter type '{type_name}' in {pattern!r}")
+                params.append((name, PARAM_TYPES[type_name or "str"]))
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.literals.setdefault(segment, _Node())
+
+        if node.route is not None and not replace:
+            raise ValueError(f"Callback pattern {pattern!r} conflicts with {node.route.pattern!r}")
+        if node.route is not None:
+            self._by_code.pop(node.route.code, None)
+        existing = self._by_code.get(code)
+        if existing is not None and existing.pattern != pattern:
+            raise ValueError(f"Callback code {code} of {pattern!r} is already used by {existing.pattern!r}")
+
+        signature = inspect.signature(handler)
+        route = Route(
+            pattern=pattern,
+            code=code,
+            handler=handler,
+            private=private,
+            week_scoped=week_scoped,
+            params=tuple(params),
+            accepts=frozenset(signature.parameters),
+        )
+        node.route = route
+        self._routes[pattern] = route
+        self._by_code[code] = route
+        if not params:
+            self._static[pattern] = route
+        return route
+
+    def route(self, pattern: str, code: int, private: bool = False, week_scoped: bool = False):
+        """Decorator form of `add`."""
+        def decorator(handler: Callable) -> Callable:
+            self.add(pattern, handler, code, private, week_scoped)
+            return handler
+        return decorator
+
+    def by_code(self, code: int) -> Optional[Route]:
+        """The route registered under a numeric code."""
+        return self._by_code.get(code)
+
+    def match(self, data: str) -> Optional[Tuple[Route, Dict[str, Any]]]:
+        """Find the route for callback data and its converted parameters.
+
+        Returns None if no route matches or a parameter fails to convert.
+        Literal segments take precedence over parameters.
+        """
+        route = self._static.get(data)
+        if route is not None:
+            return route, {}
+
+        found = self._walk(self._root, data.split(SEPARATOR), 0, [])
+        if found is None:
+            return None
+        node, values = found
+
+        route = node.route
+        try:
+            args = {name: convert(value) for (name, convert), value in zip(route.params, values)}
+        except ValueError:
+            return None
+        return route, args
+
+    def _walk(self, node: _Node, segments, index: int, values):
+        """Depth-first walk; tries the literal child before the parameter child."""
+        if index == len(segments):
+            return (node, values) if node.route is not None else None
+        segment = segments[index]
+        child = node.literals.get(segment)
+        if child is not None:
+            found = self._walk(child, segments, index + 1, values)
+            if found is not None:
+                return found
+        if node.param is not None:
+            return self._walk(node.param, segments, index + 1, values + [segment])
+        return None
+
+    async def dispatch(self, query, route: Route, args: Dict[str, Any], **extras):
+        """Call a matched route's handler.
+
+        `extras` are passed only if the handler declares a parameter of that name.
+        """
+        for name, value in extras.items():
+            if name in route.accepts:
+                args[name] = value
+        await route.handler(query, **args)
+
+    @property
+    def routes(self) -> Dict[str, Route]:
+        """Registered routes by pattern."""
+        return dict(self._routes)
+
+
+# Routes registered by the handler modules
+router = CallbackRouter()
+callback_route = router.route
@@ -24,10 +24,26 @@ class Settings(BaseSettings):
     # Telegram
     telegram_bot_token: str
     telegram_chat_id: str
+    telegram_base_url: Optional[str] = None  # e.g. a local stub Bot API for testing
+    media_prewarm_chat_id: Optional[int] = None  # private chat used to pre-upload media
+    callback_secret: Optional[str] = None  # signs button data (default: derived from the bot token)
+    
+    # Webhook mode (long polling is used when disabled)
+    webhook_enabled: bool = False
+    webhook_url: Optional[str] = None  # public base URL, e.g. https://bot.example.com
+    webhook_listen: str = "0.0.0.0"
+    webhook_port: int = 8443
+    webhook_path: str = "telegram"
+    webhook_secret_token: Optional[str] = None
     
     # Application
     debug: bool = False
     log_level: str = "INFO"
+    max_concurrent_updates: int = 16  # updates from the same user still run in order
+    group_digest_seconds: int = 0  # batch group notifications into digests (0 = send immediately)
+    blocking_pool_size: int = 4  # threads for blocking work (file I/O, sync calls)
+    dm_reminders_enabled: bool = False  # also DM each resident their open tasks
+    dm_reminder_concurrency: int = 8  # DMs in flight at once
     
     # Week Configuration
     week_deadline_day: str = "sunday"
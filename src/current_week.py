@@ -0,0 +1,127 @@
+"""Cached lookup of the active (open) week.
+
+Almost every update needs the current week, but it only changes at
+rollover. The week's id, number and deadline are cached in process memory
+and invalidated by the week manager when a week is closed or created.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Week
+
+# ========== CONFIGURATION ==========
+
+# Safety net for changes made outside this process (scripts, other replicas);
+# kept in line with the menu cache TTL
+CACHE_TTL_SECONDS = 60
+
+# ====================================
+
+
+@dataclass(frozen=True)
+class CurrentWeek:
+    """Immutable snapshot of the active week."""
+
+    id: int
+    year: int
+    week_number: int
+    deadline: datetime
+
+
+_cached: Optional[CurrentWeek] = None
+_cached_at = 0.0
+_generation = 0
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+async def load_current_week(db: AsyncSession, for_update: bool = False) -> Optional[Week]:
+    """Load the active Week row from the database, bypassing the cache.
+
+    Use this when the row itself is needed (e.g. to close it at rollover).
+    """
+    query = select(Week).filter_by(closed=False).order_by(Week.deadline.desc()).limit(1)
+    if for_update:
+        query = query.with_for_update()
+    return await db.scalar(query)
+
+
+async def get_current_week(db: AsyncSession) -> Optional[CurrentWeek]:
+    """Return the active week, from the cache when possible."""
+    global _cached, _cached_at
+
+    if _cached is not None and time.monotonic() - _cached_at < CACHE_TTL_SECONDS:
+        _stats["hits"] += 1
+        return _cached
+
+    _stats["misses"] += 1
+    generation = _generation
+    week = await load_current_week(db)
+    if week is None:
+        return None
+
+    current = CurrentWeek(
+        id=week.id,
+        year=week.year,
+        week_number=week.week_number,
+        deadline=week.deadline,
+    )
+
+    # Don't cache a result that raced with an invalidation
+    if generation == _generation:
+        _cached = current
+        _cached_at = time.monotonic()
+
+    return current
+
+
+async def get_current_week_row(db: AsyncSession) -> Optional[Week]:
+    """Return the active Week row (with its progress counters).
+
+    Resolves the id through the cache, so this is a primary-key lookup. If
+    the row turns out to be closed (another replica rolled over), the cache
+    is dropped and the lookup repeated once against the database.
+    """
+    current = await get_current_week(db)
+    if current is None:
+        return None
+    week = await db.get(Week, current.id)
+    if week is not None and not week.closed:
+        return week
+
+    invalidate_current_week()
+    current = await get_current_week(db)
+    if current is None:
+        return None
+    return await db.get(Week, current.id)
+
+
+async def is_open_week(db: AsyncSession, week_id: int) -> bool:
+    """Whether `week_id` is still open, checked against the database.
+
+    Bypasses the cache, so a week closed by another replica (or before this
+    process's cache expired) is never treated as current. If the answer
+    shows the cache is stale (the cached week is closed, or another week is
+    open), the cache is dropped.
+    """
+    week_open = await db.scalar(select(Week.id).filter_by(id=week_id, closed=False)) is not None
+    if _cached is not None and (_cached.id == week_id) != week_open:
+        invalidate_current_week()
+    return week_open
+
+
+def invalidate_current_week():
+    """Drop the cached week. Call after a week is closed or created."""
+    global _cached, _generation
+    _cached = None
+    _generation += 1
+    _stats["invalidations"] += 1
+
+
+def current_week_cache_stats() -> Dict[str, int]:
+    """Hit/miss/invalidation counters for the current-week cache."""
+    return dict(_stats)
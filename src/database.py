@@ -1,10 +1,11 @@
 """Database connection and session management."""
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import NullPool
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncGenerator, Generator
 import logging
 
 from src.config import settings
@@ -28,6 +29,24 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Create async engine (used by the bot's handlers and scheduled jobs)
+async_engine = create_async_engine(
+    settings.async_database_url,
+    echo=settings.debug,
+    pool_pre_ping=True,
+    pool_size=5,
+    max_overflow=10,
+)
+
+# Create async session factory
+# expire_on_commit=False keeps loaded attributes usable after commit,
+# since lazy loading is not available on AsyncSession.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 def init_db():
     """Initialize database (create all tables)."""
@@ -63,6 +82,30 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+@asynccontextmanager
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async context manager for database sessions.
+    
+    Use this inside handlers and jobs so queries don't block the event loop.
+    Relationships must be eager-loaded (joinedload/selectinload), since
+    lazy loading is not supported on AsyncSession.
+    
+    Usage:
+        async with get_async_db() as db:
+            user = await db.scalar(select(Person).limit(1))
+    """
+    db = AsyncSessionLocal()
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
 def get_db_session() -> Session:
     """
     Get a database session (remember to close it!).
@@ -0,0 +1,111 @@
+"""Bounded thread pool for blocking work.
+
+Database access is async, but some work still blocks: reading and hashing
+media files, and any synchronous library call. Running it through
+`run_blocking` keeps the event loop free to answer buttons, while the
+fixed pool size stops a burst of jobs from spawning unbounded threads.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BlockingExecutor:
+    """Thread pool wrapper that tracks queue depth and saturation."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._max_wait = 0.0
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run `func(*args, **kwargs)` in the pool and await its result."""
+        submitted_at = time.monotonic()
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, functools.partial(self._call, submitted_at, func, *args, **kwargs)
+        )
+
+    def _call(self, submitted_at: float, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        wait = time.monotonic() - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._max_wait = max(self._max_wait, wait)
+        if wait > 1:
+            logger.warning(f"Blocking pool saturated: {func.__name__} waited {wait:.1f}s for a thread")
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool usage metrics for monitoring."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "max_wait_seconds": round(self._max_wait, 3),
+            }
+
+    def shutdown(self):
+        """Wait for running work and release the threads."""
+        self._pool.shutdown(wait=True)
+
+
+_executor: Optional[BlockingExecutor] = None
+
+
+def get_executor() -> BlockingExecutor:
+    """The shared pool (created on first use)."""
+    global _executor
+    if _executor is None:
+        _executor = BlockingExecutor(settings.blocking_pool_size)
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call in the shared pool."""
+    return await get_executor().run(func, *args, **kwargs)
+
+
+def shutdown_executor():
+    """Log final metrics and stop the shared pool."""
+    global _executor
+    if _executor is not None:
+        logger.info(f"Blocking pool stats: {_executor.stats()}")
+        _executor.shutdown()
+        _executor = None
@@ -1,9 +1,19 @@
-"""Handlers package for the Corridor Bot."""
+"""Handlers package for the Corridor Bot.
+
+Importing this package also registers the handlers' callback routes
+(see src.callback_router).
+"""
 
 from .task_handlers import (
-    handle_complete_flow,
-    handle_amend_flow,
-    handle_ask_flow,
+    show_complete_categories,
+    show_complete_tasks,
+    complete_task_by_id,
+    show_amend_categories,
+    show_amend_tasks,
+    amend_task_by_id,
+    show_ask_categories,
+    show_ask_tasks,
+    show_task_instructions,
 )
 
 from .info_handlers import (
@@ -20,15 +30,23 @@ from .info_handlers import (
 from .optout_handlers import (
     cmd_optout,
     handle_optout_flow,
+    optout_task_callback,
     cmd_who_opted_out,
     show_whooptedout_callback,
+    show_task_opt_outs_callback,
 )
 
 __all__ = [
     # Task handlers
-    'handle_complete_flow',
-    'handle_amend_flow',
-    'handle_ask_flow',
+    'show_complete_categories',
+    'show_complete_tasks',
+    'complete_task_by_id',
+    'show_amend_categories',
+    'show_amend_tasks',
+    'amend_task_by_id',
+    'show_ask_categories',
+    'show_ask_tasks',
+    'show_task_instructions',
     # Info handlers
     'cmd_status',
     'show_status_callback',
@@ -41,6 +59,8 @@ __all__ = [
     # Opt-out handlers
     'cmd_optout',
     'handle_optout_flow',
+    'optout_task_callback',
     'cmd_who_opted_out',
     'show_whooptedout_callback',
+    'show_task_opt_outs_callback',
 ]
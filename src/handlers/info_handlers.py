@@ -1,36 +1,45 @@
 """Information handlers: status, stats, tasks list, map."""
 
-from pathlib import Path
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
+from sqlalchemy import func, select
+from sqlalchemy.orm import contains_eager, joinedload
 
-from src.database import get_db
-from src.models import Person, TaskType, TaskInstance, Week, TaskOptOut
-from src.menus import CATEGORY_AMOUNTS, CATEGORY_EMOJIS
+from src.callback_codec import encode_callback
+from src.callback_router import callback_route
+from src.current_week import get_current_week, get_current_week_row
+from src.database import get_async_db
+from src.identity_cache import get_person
+from src.models import Person, TaskType, TaskInstance, TaskOptOut, WeekPersonSummary
+from src.menus import CATEGORY_AMOUNTS, CATEGORY_EMOJIS, get_category_status_counts
+from src.media_cache import MEDIA_DIR, send_cached_media
 
-# Get project root for media files
-project_root = Path(__file__).parent.parent.parent
+MAP_PATH = MEDIA_DIR / "corridor-overview.jpg"
+MAP_MEDIA_KEY = "corridor-map"
 
 
 async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show detailed status (AVAILABLE IN BOTH)."""
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+    async with get_async_db() as db:
+        current_week = await get_current_week_row(db)
         
         if not current_week:
             await update.message.reply_text("❌ No active week found.")
             return
         
-        all_instances = (
-            db.query(TaskInstance)
-            .filter_by(week_id=current_week.id)
+        status_counts = await get_category_status_counts(db, current_week.id)
+        
+        completed = (await db.scalars(
+            select(TaskInstance)
+            .filter_by(week_id=current_week.id, status="completed")
             .join(TaskType)
+            .options(
+                contains_eager(TaskInstance.task_type),
+                joinedload(TaskInstance.completer)
+            )
             .order_by(TaskType.category, TaskType.name)
-            .all()
-        )
-        
-        completed = [t for t in all_instances if t.status == "completed"]
+        )).all()
         
         message = (
             f"📅 *Week {current_week.week_number}/{current_week.year}*\n"
@@ -41,13 +50,12 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         message += "📈 *Progress by Category*\n"
         
         by_category = {}
-        for task in all_instances:
-            category = task.task_type.category or "other"
+        for category, status, count in status_counts:
             if category not in by_category:
                 by_category[category] = {"completed": 0, "total": 0}
             by_category[category]["total"] = CATEGORY_AMOUNTS.get(category, 1)
-            if task.status == "completed":
-                by_category[category]["completed"] += 1
+            if status == "completed":
+                by_category[category]["completed"] += count
         
         for category in sorted(by_category.keys()):
             emoji = CATEGORY_EMOJIS.get(category, "📦")
@@ -67,8 +75,7 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Completed tasks (last 5)
         message += f"✅ *Completed ({completed_count})*\n"
         for task in completed[-5:]:
-            completer = db.query(Person).get(task.completed_by)
-            message += f"  • {task.task_type.name} - {completer.name}\n"
+            message += f"  • {task.task_type.name} - {task.completer.name}\n"
         if completed_count > 5:
             message += f"  ... and {completed_count - 5} more\n"
         
@@ -78,9 +85,10 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
             message += f"\n🎉 All tasks done! Time to relax! 😎🍹\n"
         
         # Non-contributors
-        completed_by_ids = [t.completed_by for t in completed if t.completed_by]
-        active_people = db.query(Person).filter_by(active=True).all()
-        not_contributed = [p for p in active_people if p.id not in completed_by_ids]
+        active_people = (await db.scalars(select(Person).filter_by(active=True))).all()
+        not_contributed = [
+            p for p in active_people if current_week.person_completed_count(p.id) == 0
+        ]
         
         if not done and not_contributed:
             message += f"\n¿Y entonces qué? 😡🔪\n"
@@ -90,18 +98,18 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN)
 
 
+@callback_route("status", code=0x03)
 async def show_status_callback(query):
     """Show status via callback (AVAILABLE IN BOTH)."""
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+    async with get_async_db() as db:
+        current_week = await get_current_week_row(db)
         
         if not current_week:
             await query.edit_message_text("❌ No active week found.")
             return
         
         # Get progress summary
-        all_instances = db.query(TaskInstance).filter_by(week_id=current_week.id).all()
-        completed_count = len([t for t in all_instances if t.status == "completed"])
+        completed_count = current_week.completed_count
         total = sum([CATEGORY_AMOUNTS.get(cat, 1) for cat in CATEGORY_AMOUNTS.keys()])
         
         progress = int((completed_count / total) * 10) if total > 0 else 0
@@ -115,7 +123,7 @@ async def show_status_callback(query):
         )
         
         keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("« Back to Menu", callback_data="menu")
+            InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))
         ]])
         
         await query.edit_message_text(
@@ -127,8 +135,10 @@ async def show_status_callback(query):
 
 async def cmd_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """List all tasks (AVAILABLE IN BOTH)."""
-    with get_db() as db:
-        tasks = db.query(TaskType).order_by(TaskType.category, TaskType.name).all()
+    async with get_async_db() as db:
+        tasks = (await db.scalars(
+            select(TaskType).order_by(TaskType.category, TaskType.name)
+        )).all()
         
         by_category = {}
         for task in tasks:
@@ -151,10 +161,13 @@ async def cmd_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN)
 
 
+@callback_route("tasks", code=0x04)
 async def show_tasks_callback(query):
     """Show tasks list via callback (AVAILABLE IN BOTH)."""
-    with get_db() as db:
-        tasks = db.query(TaskType).order_by(TaskType.category, TaskType.name).all()
+    async with get_async_db() as db:
+        tasks = (await db.scalars(
+            select(TaskType).order_by(TaskType.category, TaskType.name)
+        )).all()
         
         by_category = {}
         for task in tasks:
@@ -179,7 +192,7 @@ async def show_tasks_callback(query):
         message += "💡 Use `/tasks` for complete list"
         
         keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("« Back to Menu", callback_data="menu")
+            InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))
         ]])
         
         await query.edit_message_text(
@@ -197,21 +210,22 @@ async def cmd_my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, is_pr
     
     user = update.effective_user
     
-    with get_db() as db:
-        person = db.query(Person).filter_by(telegram_id=user.id).first()
+    async with get_async_db() as db:
+        person = await get_person(db, user.id)
         if not person:
             await update.message.reply_text("❌ You're not registered! Use /start first.")
             return
         
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+        current_week = await get_current_week(db)
+        week_tasks = []
         
         if current_week:
-            week_tasks = (
-                db.query(TaskInstance)
+            week_tasks = (await db.scalars(
+                select(TaskInstance)
                 .filter_by(week_id=current_week.id, completed_by=person.id)
                 .join(TaskType)
-                .all()
-            )
+                .options(contains_eager(TaskInstance.task_type))
+            )).all()
             
             message = (
                 f"📊 *Stats for {person.name}*\n\n"
@@ -226,15 +240,22 @@ async def cmd_my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, is_pr
         else:
             message = f"📊 *Stats for {person.name}*\n\nNo active week."
         
-        all_time = db.query(TaskInstance).filter_by(completed_by=person.id).count()
-        message += f"\n*All-Time:*\nTotal: *{all_time}* tasks\n"
+        # Closed weeks come from their summaries; add the current week
+        history_count, history_minutes, history_weeks = await get_history_totals(db, person.id)
+        week_minutes = sum(task.task_type.estimated_duration_minutes or 0 for task in week_tasks)
+        message += (
+            f"\n*All-Time:*\n"
+            f"Total: *{history_count + len(week_tasks)}* tasks\n"
+            f"Time: ~{history_minutes + week_minutes} min\n"
+            f"Weeks contributed: {history_weeks + (1 if week_tasks else 0)}\n"
+        )
         
-        opt_outs = (
-            db.query(TaskOptOut)
+        opt_outs = (await db.scalars(
+            select(TaskOptOut)
             .filter_by(person_id=person.id)
             .join(TaskType)
-            .all()
-        )
+            .options(contains_eager(TaskOptOut.task_type))
+        )).all()
         
         if opt_outs:
             message += f"\n*Opted out of:*\n"
@@ -244,26 +265,42 @@ async def cmd_my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, is_pr
     await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN)
 
 
+async def get_history_totals(db, person_id: int):
+    """A person's totals over closed weeks, read from the week summaries.
+    
+    Returns:
+        (tasks completed, minutes, weeks with at least one task)
+    """
+    row = (await db.execute(
+        select(
+            func.coalesce(func.sum(WeekPersonSummary.completed_count), 0),
+            func.coalesce(func.sum(WeekPersonSummary.minutes), 0),
+            func.count(WeekPersonSummary.id).filter(WeekPersonSummary.completed_count > 0),
+        ).filter_by(person_id=person_id)
+    )).one()
+    return tuple(row)
+
+
+@callback_route("mystats", code=0x05, private=True)
 async def show_stats_callback(query):
     """Show personal stats via callback (PRIVATE ONLY)."""
     user = query.from_user
     
-    with get_db() as db:
-        person = db.query(Person).filter_by(telegram_id=user.id).first()
+    async with get_async_db() as db:
+        person = await get_person(db, user.id)
         if not person:
             await query.edit_message_text("❌ You're not registered!")
             return
         
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+        current_week = await get_current_week_row(db)
         
         if current_week:
-            week_count = db.query(TaskInstance).filter_by(
-                week_id=current_week.id, completed_by=person.id
-            ).count()
+            week_count = current_week.person_completed_count(person.id)
         else:
             week_count = 0
         
-        all_time = db.query(TaskInstance).filter_by(completed_by=person.id).count()
+        history_count, _, _ = await get_history_totals(db, person.id)
+        all_time = history_count + week_count
         
         message = (
             f"📊 *Stats for {person.name}*\n\n"
@@ -273,7 +310,7 @@ async def show_stats_callback(query):
         )
         
         keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("« Back to Menu", callback_data="menu")
+            InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))
         ]])
         
         await query.edit_message_text(
@@ -289,33 +326,32 @@ async def cmd_show_map(update: Update, context: ContextTypes.DEFAULT_TYPE, is_pr
         await redirect_func(update, "Map")
         return
     
-    media_path = project_root / "media" / "corridor-overview.jpg"
-    
-    if media_path.exists():
-        with open(media_path, "rb") as img_file:
-            await context.bot.send_photo(
-                chat_id=update.effective_chat.id,
-                photo=img_file,
-                caption="🗺️ *Corridor Map*",
-                parse_mode=ParseMode.MARKDOWN
-            )
+    if MAP_PATH.exists():
+        await send_cached_media(
+            context.bot,
+            MAP_MEDIA_KEY,
+            MAP_PATH,
+            chat_id=update.effective_chat.id,
+            caption="🗺️ *Corridor Map*",
+            parse_mode=ParseMode.MARKDOWN
+        )
     else:
         await update.message.reply_text("❌ Map not found.")
 
 
+@callback_route("map", code=0x06, private=True)
 async def show_map_callback(query):
     """Show map via callback (PRIVATE ONLY)."""
-    media_path = project_root / "media" / "corridor-overview.jpg"
-    
-    if media_path.exists():
-        with open(media_path, "rb") as img_file:
-            await query.message.reply_photo(
-                photo=img_file,
-                caption="🗺️ *Corridor Map*",
-                parse_mode=ParseMode.MARKDOWN
-            )
+    if MAP_PATH.exists():
+        await send_cached_media(
+            query.message,
+            MAP_MEDIA_KEY,
+            MAP_PATH,
+            caption="🗺️ *Corridor Map*",
+            parse_mode=ParseMode.MARKDOWN
+        )
         keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("« Back to Menu", callback_data="menu")
+            InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))
         ]])
         await query.edit_message_text(
             "Map sent above! ⬆️",
@@ -325,6 +361,6 @@ async def show_map_callback(query):
         await query.edit_message_text(
             "❌ Map not found.",
             reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("« Back to Menu", callback_data="menu")
+                InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))
             ]])
         )
@@ -1,11 +1,19 @@
 """Opt-out related handlers."""
 
+from typing import Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager, joinedload
 
-from src.database import get_db
+from src.callback_codec import encode_callback
+from src.callback_router import callback_route
+from src.database import get_async_db
+from src.identity_cache import get_person
+from src.menus import invalidate_menus
 from src.models import Person, TaskType, TaskOptOut
+from src.task_index import TaskLookup, TaskNameIndex, get_task_index
 
 
 async def cmd_optout(update: Update, context: ContextTypes.DEFAULT_TYPE, is_private_chat_func, redirect_func, notify_group_func):
@@ -27,76 +35,150 @@ async def cmd_optout(update: Update, context: ContextTypes.DEFAULT_TYPE, is_priv
         )
         return
     
-    # First argument is task, rest is reason
-    task_query = context.args[0]
-    reason = " ".join(context.args[1:])
     user = update.effective_user
     
-    with get_db() as db:
+    async with get_async_db() as db:
         # Get person
-        person = db.query(Person).filter_by(telegram_id=user.id).first()
+        person = await get_person(db, user.id)
         if not person:
             await update.message.reply_text(
                 "❌ You're not registered! Use /start to register first."
             )
             return
         
-        # Find matching task type
-        task_type = (
-            db.query(TaskType)
-            .filter(TaskType.name.ilike(f"%{task_query}%"))
-            .first()
-        )
+        # Find matching task type (the name may span several words)
+        task_index = await get_task_index(db)
+        lookup, reason = split_task_and_reason(task_index, context.args)
         
-        if not task_type:
+        task_type = await db.get(TaskType, lookup.best.id) if lookup.best else None
+        if not lookup.candidates or (lookup.best and not task_type):
             await update.message.reply_text(
-                f"❌ Task matching '{task_query}' not found.\n\n"
+                f"❌ Task matching '{context.args[0]}' not found.\n\n"
                 f"Use /tasks to see all available tasks."
             )
             return
         
-        # Check if already opted out
-        existing_opt_out = (
-            db.query(TaskOptOut)
-            .filter_by(person_id=person.id, task_type_id=task_type.id)
-            .first()
-        )
-        
-        if existing_opt_out:
+        if not lookup.best:
+            # Several tasks match equally well; the reason waits for the user's pick
+            context.user_data["optout_reason"] = reason
             await update.message.reply_text(
-                f"⚠️ You're already opted out of '{task_type.name}'.\n"
-                f"Current reason: {existing_opt_out.reason}\n\n"
-                f"Contact an administrator if you want to change the reason or opt back in."
+                "🤔 Which task do you want to opt out of?",
+                reply_markup=task_choice_keyboard(lookup.candidates, "optout")
             )
             return
         
-        # Create opt-out
-        opt_out = TaskOptOut(
-            person_id=person.id,
-            task_type_id=task_type.id,
-            reason=reason
+        await record_opt_out(db, person, task_type, reason, update.message.reply_text, notify_group_func)
+
+
+def split_task_and_reason(task_index: TaskNameIndex, args) -> Tuple[TaskLookup, str]:
+    """Split /optout arguments into the task lookup and the reason.
+    
+    The longest leading run of words that matches any task is taken as the
+    task name (so "Fridge 1 I have my own fridge" finds "Fridge 1"), then
+    trailing words that don't change the match are given back to the reason
+    (so "Shower 2 shower at gym" keeps "shower at gym"). At least one word
+    is always left for the reason.
+    """
+    for words in range(len(args) - 1, 0, -1):
+        lookup = task_index.lookup(" ".join(args[:words]))
+        if lookup.candidates:
+            break
+    else:
+        return TaskLookup(best=None), " ".join(args[1:])
+    
+    while words > 1:
+        shorter = task_index.lookup(" ".join(args[:words - 1]))
+        if not _same_match(shorter, lookup):
+            break
+        lookup, words = shorter, words - 1
+    return lookup, " ".join(args[words:])
+
+
+def _same_match(a: TaskLookup, b: TaskLookup) -> bool:
+    """Whether two lookups point at the same task (or the same choices)."""
+    if a.best or b.best:
+        return a.best == b.best
+    return a.candidates == b.candidates
+
+
+def task_choice_keyboard(candidates, action: str) -> InlineKeyboardMarkup:
+    """One button per candidate task, for the user to pick from."""
+    keyboard = [
+        [InlineKeyboardButton(task.name, callback_data=encode_callback(f"{action}:task:{task.id}"))]
+        for task in candidates
+    ]
+    keyboard.append([InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))])
+    return InlineKeyboardMarkup(keyboard)
+
+
+async def record_opt_out(db, person, task_type: TaskType, reason: str, reply_func, notify_group_func):
+    """Record an opt-out, confirm it to the user and tell the group."""
+    # Check if already opted out
+    existing_opt_out = await db.scalar(
+        select(TaskOptOut)
+        .filter_by(person_id=person.id, task_type_id=task_type.id)
+        .limit(1)
+    )
+    
+    if existing_opt_out:
+        await reply_func(
+            f"⚠️ You're already opted out of '{task_type.name}'.\n"
+            f"Current reason: {existing_opt_out.reason}\n\n"
+            f"Contact an administrator if you want to change the reason or opt back in."
         )
-        db.add(opt_out)
-        db.commit()
+        return
+    
+    # Create opt-out
+    opt_out = TaskOptOut(
+        person_id=person.id,
+        task_type_id=task_type.id,
+        reason=reason
+    )
+    db.add(opt_out)
+    await db.commit()
+    invalidate_menus()
+    
+    # Send confirmation in private chat
+    message = (
+        f"✅ Opt-out successful!\n\n"
+        f"You've opted out of: *{task_type.name}*\n"
+        f"Reason: {reason}\n\n"
+        f"You won't be expected to complete this task.\n"
+        f"Use `/whooptedout {task_type.name}` to see all opt-outs for this task."
+    )
+    await reply_func(message, parse_mode=ParseMode.MARKDOWN)
+    
+    # NOTIFY GROUP
+    group_message = (
+        f"ℹ️ {person.name} opted out of *{task_type.name}*\n"
+        f"Reason: {reason}"
+    )
+    await notify_group_func(group_message)
+
+
+@callback_route("optout:task:{task_type_id:int}", code=0x09, private=True)
+async def optout_task_callback(query, task_type_id, user_data, notify_group_func):
+    """Opt out of the task picked from the /optout choices (PRIVATE ONLY)."""
+    reason = user_data.pop("optout_reason", None)
+    if not reason:
+        await query.edit_message_text("❌ This choice has expired. Please send /optout again.")
+        return
+    
+    async with get_async_db() as db:
+        person = await get_person(db, query.from_user.id)
+        if not person:
+            await query.edit_message_text("❌ You're not registered! Use /start to register first.")
+            return
         
-        # Send confirmation in private chat
-        message = (
-            f"✅ Opt-out successful!\n\n"
-            f"You've opted out of: *{task_type.name}*\n"
-            f"Reason: {reason}\n\n"
-            f"You won't be expected to complete this task.\n"
-            f"Use `/whooptedout {task_type.name}` to see all opt-outs for this task."
-        )
-        await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN)
+        task_type = await db.get(TaskType, task_type_id)
+        if not task_type:
+            await query.edit_message_text("❌ Task not found. Use /tasks to see all available tasks.")
+            return
         
-        # NOTIFY GROUP
-        group_message = (
-            f"ℹ️ {person.name} opted out of *{task_type.name}*\n"
-            f"Reason: {reason}"
-        )
-        await notify_group_func(group_message)
+        await record_opt_out(db, person, task_type, reason, query.edit_message_text, notify_group_func)
 
 
+@callback_route("optout:categories", code=0x08, private=True)
 async def handle_optout_flow(query):
     """Handle opt-out flow (PRIVATE ONLY - shows message about using command)."""
     # Opt-out requires a reason, so we direct to command
@@ -110,7 +192,7 @@ async def handle_optout_flow(query):
     )
     
     keyboard = InlineKeyboardMarkup([[
-        InlineKeyboardButton("« Back to Menu", callback_data="menu")
+        InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))
     ]])
     
     await query.edit_message_text(
@@ -122,15 +204,18 @@ async def handle_optout_flow(query):
 
 async def cmd_who_opted_out(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show opt-outs (AVAILABLE IN BOTH)."""
-    with get_db() as db:
+    async with get_async_db() as db:
         if not context.args:
-            opt_outs = (
-                db.query(TaskOptOut)
+            opt_outs = (await db.scalars(
+                select(TaskOptOut)
                 .join(Person)
                 .join(TaskType)
+                .options(
+                    contains_eager(TaskOptOut.person),
+                    contains_eager(TaskOptOut.task_type)
+                )
                 .order_by(TaskType.category, TaskType.name)
-                .all()
-            )
+            )).all()
             
             if not opt_outs:
                 await update.message.reply_text("ℹ️ No opt-outs yet!")
@@ -141,8 +226,7 @@ async def cmd_who_opted_out(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 task_name = opt_out.task_type.name
                 if task_name not in by_task:
                     by_task[task_name] = []
-                person = db.query(Person).get(opt_out.person_id)
-                by_task[task_name].append(f"{person.name} ({opt_out.reason})")
+                by_task[task_name].append(f"{opt_out.person.name} ({opt_out.reason})")
             
             message = "📋 *Current Opt-Outs*\n\n"
             for task_name in sorted(by_task.keys()):
@@ -153,35 +237,70 @@ async def cmd_who_opted_out(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
         else:
             task_query = " ".join(context.args)
-            task_type = db.query(TaskType).filter(TaskType.name.ilike(f"%{task_query}%")).first()
+            lookup = (await get_task_index(db)).lookup(task_query)
             
-            if not task_type:
+            task_type = await db.get(TaskType, lookup.best.id) if lookup.best else None
+            if not lookup.candidates or (lookup.best and not task_type):
                 await update.message.reply_text(f"❌ Task '{task_query}' not found.")
                 return
             
-            opt_outs = db.query(TaskOptOut).filter_by(task_type_id=task_type.id).all()
+            if not lookup.best:
+                await update.message.reply_text(
+                    f"🤔 Several tasks match '{task_query}'. Which one?",
+                    reply_markup=task_choice_keyboard(lookup.candidates, "whooptedout")
+                )
+                return
             
-            if not opt_outs:
-                message = f"ℹ️ No opt-outs for *{task_type.name}*"
-            else:
-                message = f"📋 *Opt-Outs for {task_type.name}*\n\n"
-                for opt_out in opt_outs:
-                    person = db.query(Person).get(opt_out.person_id)
-                    message += f"• {person.name}\n  Reason: {opt_out.reason}\n\n"
+            message = await format_task_opt_outs(db, task_type)
     
     await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN)
 
 
+async def format_task_opt_outs(db, task_type: TaskType) -> str:
+    """List the opt-outs of one task."""
+    opt_outs = (await db.scalars(
+        select(TaskOptOut)
+        .filter_by(task_type_id=task_type.id)
+        .options(joinedload(TaskOptOut.person))
+    )).all()
+    
+    if not opt_outs:
+        return f"ℹ️ No opt-outs for *{task_type.name}*"
+    
+    message = f"📋 *Opt-Outs for {task_type.name}*\n\n"
+    for opt_out in opt_outs:
+        message += f"• {opt_out.person.name}\n  Reason: {opt_out.reason}\n\n"
+    return message
+
+
+@callback_route("whooptedout:task:{task_type_id:int}", code=0x0A)
+async def show_task_opt_outs_callback(query, task_type_id):
+    """Show the opt-outs of the task picked from the /whooptedout choices (AVAILABLE IN BOTH)."""
+    async with get_async_db() as db:
+        task_type = await db.get(TaskType, task_type_id)
+        if not task_type:
+            await query.edit_message_text("❌ Task not found.")
+            return
+        
+        message = await format_task_opt_outs(db, task_type)
+    
+    await query.edit_message_text(text=message, parse_mode=ParseMode.MARKDOWN)
+
+
+@callback_route("whooptedout", code=0x07)
 async def show_whooptedout_callback(query):
     """Show opt-outs via callback (AVAILABLE IN BOTH)."""
-    with get_db() as db:
-        opt_outs = (
-            db.query(TaskOptOut)
+    async with get_async_db() as db:
+        opt_outs = (await db.scalars(
+            select(TaskOptOut)
             .join(Person)
             .join(TaskType)
+            .options(
+                contains_eager(TaskOptOut.person),
+                contains_eager(TaskOptOut.task_type)
+            )
             .order_by(TaskType.category, TaskType.name)
-            .all()
-        )
+        )).all()
         
         if not opt_outs:
             message = "ℹ️ No one has opted out yet!"
@@ -191,8 +310,7 @@ async def show_whooptedout_callback(query):
                 task_name = opt_out.task_type.name
                 if task_name not in by_task:
                     by_task[task_name] = []
-                person = db.query(Person).get(opt_out.person_id)
-                by_task[task_name].append(f"{person.name}")
+                by_task[task_name].append(f"{opt_out.person.name}")
             
             message = "📋 *Current Opt-Outs*\n\n"
             for task_name in sorted(list(by_task.keys())[:5]):  # Show first 5
@@ -206,7 +324,7 @@ async def show_whooptedout_callback(query):
             message += "\n💡 Use `/whooptedout` for full list"
         
         keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("« Back to Menu", callback_data="menu")
+            InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))
         ]])
         
         await query.edit_message_text(
@@ -1,82 +1,176 @@
 """Task-related handlers: complete, amend, ask instructions."""
 
+import logging
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
+from telegram.error import TelegramError
+from sqlalchemy import select, text, update
+from sqlalchemy.orm import joinedload
 
-from src.database import get_db
-from src.models import Person, TaskType, TaskInstance, Week, TaskOptOut, CompletionLog
-from src.menus import CATEGORY_AMOUNTS, CATEGORY_EMOJIS, create_category_menu, create_task_menu
+from src.callback_codec import encode_callback
+from src.callback_router import callback_route
+from src.database import get_async_db
+from src.identity_cache import get_person
+from src.models import TaskType, TaskInstance, Week, TaskOptOut, CompletionLog
+from src.menus import CATEGORY_AMOUNTS, CATEGORY_EMOJIS, create_category_menu, create_task_menu, invalidate_menus
+from src.media_cache import find_task_media, send_cached_media, task_media_key
 
+logger = logging.getLogger(__name__)
 
-async def handle_complete_flow(query, parts, notify_group_func):
-    """Handle the complete task flow (PRIVATE ONLY)."""
-    if len(parts) == 2 and parts[1] == "categories":
-        # Show category menu
-        text = "✅ *Complete a Task*\n\nSelect a category:"
-        keyboard = create_category_menu("complete")
-        
-        if not keyboard:
-            await query.edit_message_text("❌ No active week found.")
-            return
-        
+
+@callback_route("complete:categories", code=0x10, private=True)
+async def show_complete_categories(query):
+    """Show the category menu of the complete task flow (PRIVATE ONLY)."""
+    text = "✅ *Complete a Task*\n\nSelect a category:"
+    keyboard = await create_category_menu("complete")
+    
+    if not keyboard:
+        await query.edit_message_text("❌ No active week found.")
+        return
+    
+    await query.edit_message_text(
+        text=text,
+        reply_markup=keyboard,
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+@callback_route("complete:category:{category}", code=0x11, private=True, week_scoped=True)
+async def show_complete_tasks(query, category):
+    """Show a category's pending tasks in the complete task flow (PRIVATE ONLY)."""
+    emoji = CATEGORY_EMOJIS.get(category, "📦")
+    text = f"✅ *Complete a Task*\n\n{emoji} {category.title()} - Select a task:"
+    
+    keyboard = await create_task_menu(category, "complete")
+    
+    if not keyboard:
         await query.edit_message_text(
-            text=text,
-            reply_markup=keyboard,
-            parse_mode=ParseMode.MARKDOWN
+            f"ℹ️ No pending tasks in {category}!",
+            reply_markup=InlineKeyboardMarkup([[
+                InlineKeyboardButton("« Back", callback_data=encode_callback("complete:categories"))
+            ]])
         )
+        return
     
-    elif len(parts) == 3 and parts[1] == "category":
-        # Show tasks in category
-        category = parts[2]
-        emoji = CATEGORY_EMOJIS.get(category, "📦")
-        text = f"✅ *Complete a Task*\n\n{emoji} {category.title()} - Select a task:"
-        
-        keyboard = create_task_menu(category, "complete")
-        
-        if not keyboard:
-            await query.edit_message_text(
-                f"ℹ️ No pending tasks in {category}!",
-                reply_markup=InlineKeyboardMarkup([[
-                    InlineKeyboardButton("« Back", callback_data="complete:categories")
-                ]])
-            )
-            return
-        
-        await query.edit_message_text(
-            text=text,
-            reply_markup=keyboard,
-            parse_mode=ParseMode.MARKDOWN
+    await query.edit_message_text(
+        text=text,
+        reply_markup=keyboard,
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+async def _transition_task(db, task_instance: TaskInstance, from_status: str, **values) -> bool:
+    """Atomically change a task's status if nobody else changed it first.
+    
+    The task's week must still be open: its row is read with a KEY SHARE
+    lock, which waits for a rollover holding the row FOR UPDATE (and then
+    sees the week closed), and makes a rollover wait until this transaction
+    commits. KEY SHARE does not conflict with the counter UPDATE of other
+    completions, so completions of different tasks don't queue on it.
+    
+    The UPDATE then only matches the row in the status and version we read,
+    so of several concurrent presses on the same task exactly one wins.
+    
+    Returns:
+        True if this call won the transition
+    """
+    week_open = await db.scalar(
+        select(Week.id)
+        .where(Week.id == task_instance.week_id, Week.closed.is_(False))
+        .with_for_update(read=True, key_share=True)
+    )
+    if week_open is None:
+        return False
+    
+    result = await db.execute(
+        update(TaskInstance)
+        .where(
+            TaskInstance.id == task_instance.id,
+            TaskInstance.status == from_status,
+            TaskInstance.version == task_instance.version,
         )
+        .values(version=TaskInstance.version + 1, **values)
+        .returning(TaskInstance.id)
+    )
+    return result.scalar() is not None
+
+
+def _json_bump_sql(dialect: str, column: str, key_param: str) -> str:
+    """SQL expression adding :delta to one entry of a JSON counter column.
+    
+    `key_param` names the bind parameter holding the entry's key (a JSON
+    path on SQLite). Missing keys count as 0 and keys that drop to 0 are
+    removed.
+    """
+    if dialect == "postgresql":
+        key = f"CAST(:{key_param} AS text)"
+        current = f"COALESCE(({column}->>{key})::int, 0) + CAST(:delta AS integer)"
+        return (
+            f"CASE WHEN {current} <= 0 THEN ({column}::jsonb - {key})::json "
+            f"ELSE jsonb_set({column}::jsonb, ARRAY[{key}], to_jsonb({current}))::json END"
+        )
+    current = f"COALESCE(json_extract({column}, :{key_param}), 0) + :delta"
+    return (
+        f"CASE WHEN {current} <= 0 THEN json_remove({column}, :{key_param}) "
+        f"ELSE json_set({column}, :{key_param}, {current}) END"
+    )
+
+
+async def _record_completion(db, week_id: int, category, person_id: int, delta: int = 1):
+    """Atomically update a week's progress counters (delta=-1 for an amendment).
+    
+    A single UPDATE computes the new values from the row as it is when
+    written, so concurrent completions never lose each other's counts and
+    the week row is only locked until this transaction commits.
+    
+    Returns:
+        The week's new (completed_count, person_completed)
+    """
+    connection = await db.connection()
+    dialect = connection.dialect.name
+    keys = {"category_key": category or "other", "person_key": str(person_id)}
+    if dialect != "postgresql":
+        keys = {name: f'$."{key}"' for name, key in keys.items()}
     
-    elif len(parts) == 3 and parts[1] == "task":
-        # Complete the selected task
-        await complete_task_by_id(query, int(parts[2]), notify_group_func)
+    result = await db.execute(
+        text(
+            f"UPDATE weeks SET completed_count = completed_count + :delta, "
+            f"category_completed = {_json_bump_sql(dialect, 'category_completed', 'category_key')}, "
+            f"person_completed = {_json_bump_sql(dialect, 'person_completed', 'person_key')} "
+            f"WHERE id = :week_id RETURNING completed_count, person_completed"
+        ).columns(Week.completed_count, Week.person_completed),
+        {"week_id": week_id, "delta": delta, **keys},
+    )
+    return result.one()
 
 
+@callback_route("complete:task:{task_instance_id:int}", code=0x12, private=True, week_scoped=True)
 async def complete_task_by_id(query, task_instance_id, notify_group_func):
     """Complete a task by its instance ID (PRIVATE ONLY)."""
     user = query.from_user
     
-    with get_db() as db:
+    async with get_async_db() as db:
         # Get person
-        person = db.query(Person).filter_by(telegram_id=user.id).first()
+        person = await get_person(db, user.id)
         if not person:
             await query.edit_message_text("❌ You're not registered! Use /start first.")
             return
         
         # Get task instance
-        task_instance = db.query(TaskInstance).get(task_instance_id)
+        task_instance = await db.get(
+            TaskInstance, task_instance_id, options=[joinedload(TaskInstance.task_type)]
+        )
         if not task_instance or task_instance.status != "pending":
             await query.edit_message_text("❌ Task not found or already completed.")
             return
         
         # Check opt-out
-        opt_out = (
-            db.query(TaskOptOut)
+        opt_out = await db.scalar(
+            select(TaskOptOut)
             .filter_by(person_id=person.id, task_type_id=task_instance.task_type_id)
-            .first()
+            .limit(1)
         )
         
         if opt_out:
@@ -84,15 +178,28 @@ async def complete_task_by_id(query, task_instance_id, notify_group_func):
                 f"⚠️ You've opted out of '{task_instance.task_type.name}'.\n"
                 f"Reason: {opt_out.reason}",
                 reply_markup=InlineKeyboardMarkup([[
-                    InlineKeyboardButton("« Back to Menu", callback_data="menu")
+                    InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))
                 ]])
             )
             return
         
-        # Mark as complete
-        task_instance.status = "completed"
-        task_instance.completed_by = person.id
-        task_instance.completed_at = datetime.now()
+        # Mark as complete (only if still pending)
+        marked = await _transition_task(
+            db,
+            task_instance,
+            "pending",
+            status="completed",
+            completed_by=person.id,
+            completed_at=datetime.now(),
+        )
+        if not marked:
+            await query.edit_message_text("❌ Task not found or already completed.")
+            return
+        
+        # Update week counters
+        completed, person_completed = await _record_completion(
+            db, task_instance.week_id, task_instance.task_type.category, person.id
+        )
         
         # Log
         log = CompletionLog(
@@ -102,19 +209,14 @@ async def complete_task_by_id(query, task_instance_id, notify_group_func):
             message_id=query.message.message_id
         )
         db.add(log)
-        db.commit()
+        await db.commit()
+        invalidate_menus()
         
         # Get stats
-        current_week = db.query(Week).get(task_instance.week_id)
-        completed = db.query(TaskInstance).filter_by(
-            week_id=current_week.id, status="completed"
-        ).count()
         total = sum([CATEGORY_AMOUNTS.get(cat, 1) for cat in CATEGORY_AMOUNTS.keys()])
         remaining = total - completed
         
-        personal_count = db.query(TaskInstance).filter_by(
-            week_id=current_week.id, completed_by=person.id
-        ).count()
+        personal_count = (person_completed or {}).get(str(person.id), 0)
         
         # Send confirmation in private chat
         message = (
@@ -126,8 +228,8 @@ async def complete_task_by_id(query, task_instance_id, notify_group_func):
         )
         
         keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("✅ Complete Another", callback_data="complete:categories")],
-            [InlineKeyboardButton("« Back to Menu", callback_data="menu")]
+            [InlineKeyboardButton("✅ Complete Another", callback_data=encode_callback("complete:categories"))],
+            [InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))]
         ])
         
         await query.edit_message_text(
@@ -151,70 +253,87 @@ async def complete_task_by_id(query, task_instance_id, notify_group_func):
         await notify_group_func(group_message)
 
 
-async def handle_amend_flow(query, parts, notify_group_func):
-    """Handle the amend task flow (PRIVATE ONLY)."""
-    if len(parts) == 2 and parts[1] == "categories":
-        text = "❌ *Amend a Task*\n\nSelect a category:"
-        keyboard = create_category_menu("amend")
-        
-        if not keyboard:
-            await query.edit_message_text("ℹ️ No completed tasks to amend.")
-            return
-        
-        await query.edit_message_text(
-            text=text,
-            reply_markup=keyboard,
-            parse_mode=ParseMode.MARKDOWN
-        )
+@callback_route("amend:categories", code=0x20, private=True)
+async def show_amend_categories(query):
+    """Show the category menu of the amend task flow (PRIVATE ONLY)."""
+    text = "❌ *Amend a Task*\n\nSelect a category:"
+    keyboard = await create_category_menu("amend")
     
-    elif len(parts) == 3 and parts[1] == "category":
-        category = parts[2]
-        emoji = CATEGORY_EMOJIS.get(category, "📦")
-        text = f"❌ *Amend a Task*\n\n{emoji} {category.title()} - Select a task:"
-        
-        keyboard = create_task_menu(category, "amend")
-        
-        if not keyboard:
-            await query.edit_message_text(
-                f"ℹ️ No completed tasks in {category} to amend!",
-                reply_markup=InlineKeyboardMarkup([[
-                    InlineKeyboardButton("« Back", callback_data="amend:categories")
-                ]])
-            )
-            return
-        
+    if not keyboard:
+        await query.edit_message_text("ℹ️ No completed tasks to amend.")
+        return
+    
+    await query.edit_message_text(
+        text=text,
+        reply_markup=keyboard,
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+@callback_route("amend:category:{category}", code=0x21, private=True, week_scoped=True)
+async def show_amend_tasks(query, category):
+    """Show a category's completed tasks in the amend task flow (PRIVATE ONLY)."""
+    emoji = CATEGORY_EMOJIS.get(category, "📦")
+    text = f"❌ *Amend a Task*\n\n{emoji} {category.title()} - Select a task:"
+    
+    keyboard = await create_task_menu(category, "amend")
+    
+    if not keyboard:
         await query.edit_message_text(
-            text=text,
-            reply_markup=keyboard,
-            parse_mode=ParseMode.MARKDOWN
+            f"ℹ️ No completed tasks in {category} to amend!",
+            reply_markup=InlineKeyboardMarkup([[
+                InlineKeyboardButton("« Back", callback_data=encode_callback("amend:categories"))
+            ]])
         )
+        return
     
-    elif len(parts) == 3 and parts[1] == "task":
-        await amend_task_by_id(query, int(parts[2]), notify_group_func)
+    await query.edit_message_text(
+        text=text,
+        reply_markup=keyboard,
+        parse_mode=ParseMode.MARKDOWN
+    )
 
 
+@callback_route("amend:task:{task_instance_id:int}", code=0x22, private=True, week_scoped=True)
 async def amend_task_by_id(query, task_instance_id, notify_group_func):
     """Amend a task by its instance ID (PRIVATE ONLY)."""
     user = query.from_user
     
-    with get_db() as db:
-        person = db.query(Person).filter_by(telegram_id=user.id).first()
+    async with get_async_db() as db:
+        person = await get_person(db, user.id)
         if not person:
             await query.edit_message_text("❌ You're not registered!")
             return
         
-        task_instance = db.query(TaskInstance).get(task_instance_id)
+        task_instance = await db.get(
+            TaskInstance,
+            task_instance_id,
+            options=[joinedload(TaskInstance.task_type), joinedload(TaskInstance.completer)]
+        )
         if not task_instance or task_instance.status != "completed":
             await query.edit_message_text("❌ Task not found or not completed.")
             return
         
         # Get original completer
-        original_completer = db.query(Person).get(task_instance.completed_by)
+        original_completer = task_instance.completer
+        
+        # Undo completion (only if still completed)
+        amended = await _transition_task(
+            db,
+            task_instance,
+            "completed",
+            status="pending",
+            completed_by=None,
+            completed_at=None,
+        )
+        if not amended:
+            await query.edit_message_text("❌ Task not found or not completed.")
+            return
         
-        # Undo completion
-        task_instance.status = "pending"
-        task_instance.completed_by = None
-        task_instance.completed_at = None
+        # Update week counters
+        await _record_completion(
+            db, task_instance.week_id, task_instance.task_type.category, original_completer.id, delta=-1
+        )
         
         # Log amendment
         log = CompletionLog(
@@ -224,7 +343,8 @@ async def amend_task_by_id(query, task_instance_id, notify_group_func):
             message_id=query.message.message_id
         )
         db.add(log)
-        db.commit()
+        await db.commit()
+        invalidate_menus()
         
         # Send confirmation in private chat
         message = (
@@ -235,8 +355,8 @@ async def amend_task_by_id(query, task_instance_id, notify_group_func):
         )
         
         keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("❌ Amend Another", callback_data="amend:categories")],
-            [InlineKeyboardButton("« Back to Menu", callback_data="menu")]
+            [InlineKeyboardButton("❌ Amend Another", callback_data=encode_callback("amend:categories"))],
+            [InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))]
         ])
         
         await query.edit_message_text(
@@ -253,39 +373,41 @@ async def amend_task_by_id(query, task_instance_id, notify_group_func):
         await notify_group_func(group_message)
 
 
-async def handle_ask_flow(query, parts):
-    """Handle the ask instructions flow (PRIVATE ONLY)."""
-    if len(parts) == 2 and parts[1] == "categories":
-        text = "❓ *Ask Instructions*\n\nSelect a category:"
-        keyboard = create_category_menu("ask")
-        
-        await query.edit_message_text(
-            text=text,
-            reply_markup=keyboard,
-            parse_mode=ParseMode.MARKDOWN
-        )
+@callback_route("ask:categories", code=0x30, private=True)
+async def show_ask_categories(query):
+    """Show the category menu of the ask instructions flow (PRIVATE ONLY)."""
+    text = "❓ *Ask Instructions*\n\nSelect a category:"
+    keyboard = await create_category_menu("ask")
     
-    elif len(parts) == 3 and parts[1] == "category":
-        category = parts[2]
-        emoji = CATEGORY_EMOJIS.get(category, "📦")
-        text = f"❓ *Ask Instructions*\n\n{emoji} {category.title()} - Select a task:"
-        
-        keyboard = create_task_menu(category, "ask")
-        
-        await query.edit_message_text(
-            text=text,
-            reply_markup=keyboard,
-            parse_mode=ParseMode.MARKDOWN
-        )
+    await query.edit_message_text(
+        text=text,
+        reply_markup=keyboard,
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+@callback_route("ask:category:{category}", code=0x31, private=True, week_scoped=True)
+async def show_ask_tasks(query, category):
+    """Show a category's tasks in the ask instructions flow (PRIVATE ONLY)."""
+    emoji = CATEGORY_EMOJIS.get(category, "📦")
+    text = f"❓ *Ask Instructions*\n\n{emoji} {category.title()} - Select a task:"
+    
+    keyboard = await create_task_menu(category, "ask")
     
-    elif len(parts) == 3 and parts[1] == "task":
-        await show_task_instructions(query, int(parts[2]))
+    await query.edit_message_text(
+        text=text,
+        reply_markup=keyboard,
+        parse_mode=ParseMode.MARKDOWN
+    )
 
 
+@callback_route("ask:task:{task_instance_id:int}", code=0x32, private=True, week_scoped=True)
 async def show_task_instructions(query, task_instance_id):
     """Show instructions for a task (PRIVATE ONLY)."""
-    with get_db() as db:
-        task_instance = db.query(TaskInstance).get(task_instance_id)
+    async with get_async_db() as db:
+        task_instance = await db.get(
+            TaskInstance, task_instance_id, options=[joinedload(TaskInstance.task_type)]
+        )
         if not task_instance:
             await query.edit_message_text("❌ Task not found.")
             return
@@ -307,8 +429,8 @@ async def show_task_instructions(query, task_instance_id):
             message += f"⏱ Time: {task_type.estimated_duration_minutes} min\n"
         
         keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("❓ Ask Another", callback_data="ask:categories")],
-            [InlineKeyboardButton("« Back to Menu", callback_data="menu")]
+            [InlineKeyboardButton("❓ Ask Another", callback_data=encode_callback("ask:categories"))],
+            [InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))]
         ])
         
         await query.edit_message_text(
@@ -316,3 +438,26 @@ async def show_task_instructions(query, task_instance_id):
             reply_markup=keyboard,
             parse_mode=ParseMode.MARKDOWN
         )
+    
+    await send_task_media(query.message, task_type)
+
+
+async def send_task_media(message, task_type: TaskType):
+    """Send a task's instruction photo/video below the instructions, if it has one.
+    
+    Local files under media/tasks/ are uploaded once and then sent by cached
+    file_id; otherwise a file_id set directly on the task type is used.
+    """
+    media_path = find_task_media(task_type.name)
+    try:
+        if media_path:
+            await send_cached_media(
+                message,
+                f"task-{task_media_key(task_type.name)}",
+                media_path,
+                caption=f"📋 {task_type.name}"
+            )
+        elif task_type.media_file_id:
+            await message.reply_photo(photo=task_type.media_file_id, caption=f"📋 {task_type.name}")
+    except TelegramError as e:
+        logger.error(f"Failed to send media for {task_type.name}: {e}")
@@ -0,0 +1,117 @@
+"""Cached telegram_id → person lookup.
+
+Every private action starts by resolving the Telegram user to a resident.
+Residents rarely change, so a lightweight record (id, name, active) is kept
+in a bounded LRU cache. It is filled on /start or on first use, and an
+entry is dropped whenever a Person's name or active flag is changed
+through the ORM.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Person
+
+# ========== CONFIGURATION ==========
+
+# Most residents kept in memory (least recently used are evicted first)
+CACHE_MAX_SIZE = 1024
+
+# Safety net for changes made outside this process (scripts, other replicas)
+CACHE_TTL_SECONDS = 3600
+
+# ====================================
+
+
+@dataclass(frozen=True)
+class PersonRecord:
+    """Immutable snapshot of a resident's identity."""
+
+    id: int
+    telegram_id: int
+    name: str
+    active: bool
+
+
+_cache: "OrderedDict[int, tuple[PersonRecord, float]]" = OrderedDict()
+_generation = 0
+_stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+
+def remember_person(person: Person) -> PersonRecord:
+    """Cache a Person row (e.g. right after registration) and return its record."""
+    record = PersonRecord(
+        id=person.id,
+        telegram_id=person.telegram_id,
+        name=person.name,
+        active=bool(person.active),
+    )
+    _cache[record.telegram_id] = (record, time.monotonic())
+    _cache.move_to_end(record.telegram_id)
+    while len(_cache) > CACHE_MAX_SIZE:
+        _cache.popitem(last=False)
+        _stats["evictions"] += 1
+    return record
+
+
+async def get_person(db: AsyncSession, telegram_id: int) -> Optional[PersonRecord]:
+    """Return the registered person for a Telegram user, from the cache when possible.
+
+    Unregistered users are not cached, so /start takes effect immediately.
+    """
+    cached = _cache.get(telegram_id)
+    if cached is not None and time.monotonic() - cached[1] < CACHE_TTL_SECONDS:
+        _cache.move_to_end(telegram_id)
+        _stats["hits"] += 1
+        return cached[0]
+
+    _stats["misses"] += 1
+    generation = _generation
+    person = await db.scalar(select(Person).filter_by(telegram_id=telegram_id).limit(1))
+    if person is None:
+        return None
+
+    # Don't cache a result that raced with an invalidation
+    if generation != _generation:
+        return PersonRecord(person.id, person.telegram_id, person.name, bool(person.active))
+    return remember_person(person)
+
+
+def invalidate_person(telegram_id: Optional[int] = None):
+    """Drop one cached person (or everyone when telegram_id is None)."""
+    global _generation
+    if telegram_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(telegram_id, None)
+    _generation += 1
+    _stats["invalidations"] += 1
+
+
+def person_cache_stats() -> Dict[str, float]:
+    """Hit/miss counters and hit rate of the identity cache."""
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "size": len(_cache),
+        "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0.0,
+    }
+
+
+@event.listens_for(Person, "after_update")
+def _person_updated(mapper, connection, target: Person):
+    state = inspect(target)
+    if any(state.attrs[attr].history.has_changes() for attr in ("name", "active", "telegram_id")):
+        invalidate_person(target.telegram_id)
+        old_telegram_ids = state.attrs.telegram_id.history.deleted
+        for old_telegram_id in old_telegram_ids:
+            invalidate_person(old_telegram_id)
+
+
+@event.listens_for(Person, "after_delete")
+def _person_deleted(mapper, connection, target: Person):
+    invalidate_person(target.telegram_id)
@@ -0,0 +1,224 @@
+"""Persistent scheduling for reminder and rollover jobs.
+
+Jobs are kept in an APScheduler SQLAlchemy job store (table
+`apscheduler_jobs`) attached to the JobQueue's scheduler, so their next run
+time survives restarts. A run that was due while the bot was down fires
+once on start-up (runs are coalesced) if it is still within the job's
+misfire grace time, and is skipped otherwise.
+
+APScheduler 3 cannot share one job store between several schedulers (each
+would fire the same jobs), so with several bot replicas only one, the
+scheduler leader, attaches the store and runs the jobs. Leadership is a
+Postgres session-level advisory lock held on a dedicated connection; the
+other replicas retry every LEADER_RETRY_SECONDS and take over if the
+leader goes away. On other databases (SQLite in tests) the process is
+always the leader.
+
+The store uses a synchronous engine. Start-up and leadership changes run
+its queries off the event loop, but APScheduler itself queries the store
+from the loop when jobs are added or fall due; those are single-row
+lookups on a handful of rows a few times a week, so they are accepted.
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.util import undefined
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.engine import Connection, Engine
+from telegram.ext import Application, ContextTypes
+
+from src.config import settings
+from src.executor import run_blocking
+
+# ========== CONFIGURATION ==========
+
+JOBSTORE_ALIAS = "persistent"
+JOBS_TABLE = "apscheduler_jobs"
+
+# Postgres advisory lock key held by the scheduler leader
+SCHEDULER_LOCK_KEY = 727_002
+
+# How often replicas check (or, for the leader, confirm) leadership
+LEADER_RETRY_SECONDS = 60
+
+# ====================================
+
+_application: Optional[Application] = None
+_engine: Optional[Engine] = None
+_store: Optional[SQLAlchemyJobStore] = None
+# Holds the advisory lock while this process is the leader (None on SQLite)
+_leader_connection: Optional[Connection] = None
+_is_leader = False
+# Every job this process schedules, so a new leader can (re)add them all
+_jobs: Dict[str, Tuple[Callable, BaseTrigger, Optional[int], dict]] = {}
+
+
+def setup_job_store(app: Application, url: Optional[str] = None):
+    """Prepare persistent scheduling and try to become the scheduler leader.
+
+    Call before scheduling jobs, after the Application is built. If another
+    replica is the leader, jobs are only recorded here until this process
+    takes over.
+    """
+    global _application, _engine, _store, _is_leader
+    _application = app
+    _jobs.clear()
+
+    _engine = create_engine(url or settings.database_url, pool_pre_ping=True)
+    _store = None
+    _is_leader = _acquire_leadership()
+    if _is_leader:
+        _attach_store()
+    else:
+        print("Another replica runs the scheduled jobs; standing by")
+
+    app.job_queue.run_repeating(
+        _check_leadership, interval=LEADER_RETRY_SECONDS, name="scheduler-leadership"
+    )
+
+
+def is_scheduler_leader() -> bool:
+    """Whether this process runs the persistent jobs."""
+    return _is_leader
+
+
+def _acquire_leadership() -> bool:
+    """Take the scheduler lock if it is free (always succeeds off Postgres)."""
+    global _leader_connection
+    if _engine.dialect.name != "postgresql":
+        return True
+
+    connection = _engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        acquired = connection.scalar(select(func.pg_try_advisory_lock(SCHEDULER_LOCK_KEY)))
+    except Exception:
+        connection.close()
+        raise
+    if not acquired:
+        connection.close()
+        return False
+    _leader_connection = connection
+    return True
+
+
+def _leadership_alive() -> bool:
+    """Whether the connection holding the scheduler lock is still up."""
+    if _leader_connection is None:
+        return True
+    try:
+        _leader_connection.scalar(select(1))
+        return True
+    except Exception:
+        return False
+
+
+def _attach_store():
+    global _store
+    scheduler = _application.job_queue.scheduler
+    _store = SQLAlchemyJobStore(engine=_engine, tablename=JOBS_TABLE)
+    if not scheduler.running:
+        # Started now so stored jobs can be read before the scheduler runs
+        # (a running scheduler starts the store itself)
+        _store.start(scheduler, JOBSTORE_ALIAS)
+    scheduler.add_jobstore(_store, alias=JOBSTORE_ALIAS)
+
+
+def _take_over() -> bool:
+    """Become the leader if the lock is free and schedule every known job."""
+    global _is_leader
+    if not _acquire_leadership():
+        return False
+    _is_leader = True
+    _attach_store()
+    for job_id in _jobs:
+        _add_job(job_id)
+    prune_stale_jobs()
+    return True
+
+
+def _step_down():
+    """Stop running persistent jobs after losing the lock's connection."""
+    global _is_leader, _leader_connection, _store
+    _is_leader = False
+    _store = None
+    _application.job_queue.scheduler.remove_jobstore(JOBSTORE_ALIAS, shutdown=False)
+    if _leader_connection is not None:
+        try:
+            _leader_connection.close()
+        except Exception:
+            pass
+        _leader_connection = None
+
+
+async def _check_leadership(context: ContextTypes.DEFAULT_TYPE):
+    """Periodic job: followers try to take over, the leader checks its lock."""
+    if _is_leader:
+        if not await run_blocking(_leadership_alive):
+            print("Lost the scheduler lock connection; another replica may take over")
+            _step_down()
+    elif await run_blocking(_take_over):
+        print("Became the scheduler leader; scheduled jobs now run here")
+
+
+def get_application() -> Application:
+    """The Application scheduled jobs run against."""
+    if _application is None:
+        raise RuntimeError("Job store is not set up; call setup_job_store() first")
+    return _application
+
+
+def schedule_job(
+    job_id: str,
+    func: Callable,
+    trigger: BaseTrigger,
+    misfire_grace_time: Optional[int],
+    **kwargs,
+):
+    """Add or update a persistent job (on the leader; followers only record it).
+
+    `func` must be a module-level function (it is stored by reference) and
+    kwargs must be picklable. If the job is already stored with the same
+    trigger, its stored next run time is kept, so a run missed during the
+    downtime is caught up instead of being rescheduled away.
+
+    Args:
+        misfire_grace_time: Seconds a run may be late and still execute
+            (None = always run, however late)
+    """
+    _jobs[job_id] = (func, trigger, misfire_grace_time, kwargs)
+    if _is_leader:
+        _add_job(job_id)
+
+
+def _add_job(job_id: str):
+    func, trigger, misfire_grace_time, kwargs = _jobs[job_id]
+
+    next_run_time = undefined
+    existing = _store.lookup_job(job_id)
+    if existing and existing.next_run_time and str(existing.trigger) == str(trigger):
+        next_run_time = existing.next_run_time
+
+    get_application().job_queue.scheduler.add_job(
+        func,
+        trigger,
+        id=job_id,
+        name=job_id,
+        kwargs=kwargs,
+        jobstore=JOBSTORE_ALIAS,
+        misfire_grace_time=misfire_grace_time,
+        coalesce=True,
+        max_instances=1,
+        next_run_time=next_run_time,
+        replace_existing=True,
+    )
+
+
+def prune_stale_jobs():
+    """Remove stored jobs that are no longer scheduled (e.g. a dropped reminder time)."""
+    if not _is_leader:
+        return
+    for job in _store.get_all_jobs():
+        if job.id not in _jobs:
+            _store.remove_job(job.id)
+            print(f"Removed stale scheduled job: {job.id}")
@@ -0,0 +1,135 @@
+"""Send local media by Telegram file_id.
+
+A file is uploaded once; the file_id Telegram returns is stored in the
+`media_files` table together with a hash of the file and reused for every
+later send. If the file on disk changes (or Telegram rejects the stored
+file_id) the file is uploaded again.
+"""
+
+import hashlib
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from telegram import Bot, Message
+from telegram.error import BadRequest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from src.database import get_async_db
+from src.executor import run_blocking
+from src.models import MediaFile
+
+logger = logging.getLogger(__name__)
+
+# ========== CONFIGURATION ==========
+
+MEDIA_DIR = Path(__file__).parent.parent / "media"
+
+# Task instruction media: media/tasks/<task-name-slug>.<ext>, e.g. toilet-1.jpg
+TASK_MEDIA_DIR = MEDIA_DIR / "tasks"
+
+MEDIA_KINDS = {
+    ".jpg": "photo",
+    ".jpeg": "photo",
+    ".png": "photo",
+    ".webp": "photo",
+    ".mp4": "video",
+    ".mov": "video",
+    ".gif": "animation",
+}
+
+# ====================================
+
+# (path, mtime, size) -> sha256, so unchanged files aren't re-read
+_hashes: Dict[Tuple[str, int, int], str] = {}
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+async def file_hash(path: Path) -> str:
+    """sha256 of a file, memoized on its modification time and size."""
+    stat = path.stat()
+    memo_key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _hashes:
+        _hashes[memo_key] = await run_blocking(_sha256, path)
+    return _hashes[memo_key]
+
+
+def media_kind(path: Path) -> str:
+    """'photo', 'video' or 'animation', from the file extension."""
+    return MEDIA_KINDS[path.suffix.lower()]
+
+
+def task_media_key(task_name: str) -> str:
+    """Slug used for a task's media file name and cache key."""
+    return re.sub(r"[^a-z0-9]+", "-", task_name.lower()).strip("-")
+
+
+def find_task_media(task_name: str) -> Optional[Path]:
+    """Instruction photo/video for a task under media/tasks/, if there is one."""
+    slug = task_media_key(task_name)
+    for suffix in MEDIA_KINDS:
+        path = TASK_MEDIA_DIR / f"{slug}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+async def get_cached_file_id(key: str, content_hash: str) -> Optional[str]:
+    """Stored file_id for `key`, or None if missing or uploaded from other content."""
+    async with get_async_db() as db:
+        cached = await db.scalar(select(MediaFile).filter_by(key=key))
+    if cached is None or cached.content_hash != content_hash:
+        return None
+    return cached.file_id
+
+
+async def store_file_id(key: str, content_hash: str, file_id: str):
+    """Remember the file_id Telegram assigned to an upload."""
+    try:
+        async with get_async_db() as db:
+            cached = await db.scalar(select(MediaFile).filter_by(key=key))
+            if cached is None:
+                db.add(MediaFile(key=key, content_hash=content_hash, file_id=file_id))
+            else:
+                cached.content_hash = content_hash
+                cached.file_id = file_id
+    except IntegrityError:
+        # Another request stored the same upload first
+        logger.debug(f"file_id for {key} already stored")
+
+
+def _sent_file_id(message: Message, kind: str) -> str:
+    if kind == "photo":
+        return message.photo[-1].file_id  # largest size
+    return getattr(message, kind).file_id
+
+
+async def send_cached_media(target: Union[Bot, Message], key: str, path: Path, **kwargs) -> Message:
+    """Send a local photo/video, uploading it only if no valid file_id is stored.
+
+    `target` is either the Bot (pass `chat_id` in kwargs) or a Message to
+    reply to. Other kwargs (caption, parse_mode, ...) are passed through.
+    """
+    kind = media_kind(path)
+    method = f"send_{kind}" if isinstance(target, Bot) else f"reply_{kind}"
+    send = getattr(target, method)
+
+    content_hash = await file_hash(path)
+    file_id = await get_cached_file_id(key, content_hash)
+
+    if file_id:
+        try:
+            return await send(**{kind: file_id}, **kwargs)
+        except BadRequest as e:
+            logger.warning(f"Stored file_id for {key} was rejected ({e}), uploading again")
+
+    data = await run_blocking(path.read_bytes)
+    message = await send(**{kind: data}, filename=path.name, **kwargs)
+
+    await store_file_id(key, content_hash, _sent_file_id(message, kind))
+    logger.info(f"Uploaded {path.name} and cached its file_id as '{key}'")
+    return message
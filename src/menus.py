@@ -1,8 +1,39 @@
-"""Menu creation functions for the Corridor Bot."""
+"""Menu creation functions for the Corridor Bot.
 
+Importing this module registers the "menu" and "help" callback routes, so
+every module that builds a "« Back to Menu" button can encode it.
+
+The main menus are static and built once. Category and task
+menus depend on the week's task statuses, so they are cached per
+(week, action, category) and dropped by `invalidate_menus()` whenever a
+task is completed or amended, an opt-out is recorded or the week rolls
+over. A short TTL bounds staleness from changes made by other replicas
+(the handlers re-check a task's status before acting on it).
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from src.database import get_db
-from src.models import TaskType, TaskInstance, Week
+from telegram.constants import ParseMode
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+
+from src.callback_codec import encode_callback
+from src.callback_router import callback_route
+from src.current_week import get_current_week
+from src.database import get_async_db
+from src.models import TaskType, TaskInstance
+
+# ========== CONFIGURATION ==========
+
+# Safety net for changes made outside this process (scripts, other replicas)
+MENU_CACHE_TTL_SECONDS = 60
+
+# Upper bound on cached menus (the category comes from callback data)
+MENU_CACHE_MAX_SIZE = 256
+
+# ====================================
 
 # Category configuration
 CATEGORY_AMOUNTS = {
@@ -27,118 +58,264 @@ CATEGORY_EMOJIS = {
     "other": "📦"
 }
 
+# (week id, action, category or None for the category menu)
+MenuKey = Tuple[int, str, Optional[str]]
 
-def create_main_menu(is_private: bool = True) -> InlineKeyboardMarkup:
-    """Create the main menu keyboard based on chat type."""
+_menu_cache: Dict[MenuKey, Tuple[Optional[InlineKeyboardMarkup], float]] = {}
+_menu_version = 0
+_menu_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+async def get_category_status_counts(db: AsyncSession, week_id: int) -> List[Tuple[str, str, int]]:
+    """Count a week's task instances per (category, status) in one query.
+    
+    Tasks without a category are reported under "other", so callers should
+    accumulate counts rather than assume one row per category.
+    """
+    result = await db.execute(
+        select(TaskType.category, TaskInstance.status, func.count(TaskInstance.id))
+        .join(TaskType)
+        .filter(TaskInstance.week_id == week_id)
+        .group_by(TaskType.category, TaskInstance.status)
+    )
+    return [(category or "other", status, count) for category, status, count in result]
+
+
+def _build_main_menu(is_private: bool) -> InlineKeyboardMarkup:
+    """Build the main menu keyboard based on chat type."""
     if is_private:
         # Full menu for private chat
         keyboard = [
             [
-                InlineKeyboardButton("📋 View Status", callback_data="status"),
-                InlineKeyboardButton("✅ Complete Task", callback_data="complete:categories")
+                InlineKeyboardButton("📋 View Status", callback_data=encode_callback("status")),
+                InlineKeyboardButton("✅ Complete Task", callback_data=encode_callback("complete:categories"))
             ],
             [
-                InlineKeyboardButton("❌ Amend Task", callback_data="amend:categories"),
-                InlineKeyboardButton("❓ Ask Instructions", callback_data="ask:categories")
+                InlineKeyboardButton("❌ Amend Task", callback_data=encode_callback("amend:categories")),
+                InlineKeyboardButton("❓ Ask Instructions", callback_data=encode_callback("ask:categories"))
             ],
             [
-                InlineKeyboardButton("🚫 Opt Out", callback_data="optout:categories"),
-                InlineKeyboardButton("📊 My Stats", callback_data="mystats")
+                InlineKeyboardButton("🚫 Opt Out", callback_data=encode_callback("optout:categories")),
+                InlineKeyboardButton("📊 My Stats", callback_data=encode_callback("mystats"))
             ],
             [
-                InlineKeyboardButton("🗺️ Show Map", callback_data="map"),
-                InlineKeyboardButton("💡 Help", callback_data="help")
+                InlineKeyboardButton("🗺️ Show Map", callback_data=encode_callback("map")),
+                InlineKeyboardButton("💡 Help", callback_data=encode_callback("help"))
             ]
         ]
     else:
         # Limited menu for group chat (only public actions)
         keyboard = [
             [
-                InlineKeyboardButton("📋 View Status", callback_data="status"),
-                InlineKeyboardButton("📝 List Tasks", callback_data="tasks")
+                InlineKeyboardButton("📋 View Status", callback_data=encode_callback("status")),
+                InlineKeyboardButton("📝 List Tasks", callback_data=encode_callback("tasks"))
             ],
             [
-                InlineKeyboardButton("👥 Who Opted Out", callback_data="whooptedout"),
-                InlineKeyboardButton("💡 Help", callback_data="help")
+                InlineKeyboardButton("👥 Who Opted Out", callback_data=encode_callback("whooptedout")),
+                InlineKeyboardButton("💡 Help", callback_data=encode_callback("help"))
             ]
         ]
     
     return InlineKeyboardMarkup(keyboard)
 
 
-def create_category_menu(action: str = "complete") -> InlineKeyboardMarkup:
+# The main menus never change, so each is built once (markups are immutable).
+# Built on first use rather than at import, since encoding the buttons needs
+# the callback routes to be registered.
+_main_menus: Dict[bool, InlineKeyboardMarkup] = {}
+
+
+def create_main_menu(is_private: bool = True) -> InlineKeyboardMarkup:
+    """Return the main menu keyboard based on chat type."""
+    menu = _main_menus.get(is_private)
+    if menu is None:
+        menu = _main_menus[is_private] = _build_main_menu(is_private)
+    return menu
+
+
+@callback_route("menu", code=0x01)
+async def show_main_menu(query):
+    """Show the main menu."""
+    is_private = query.message.chat.type == "private"
+    
+    if is_private:
+        text = (
+            "🤖 *Pablito's Corridor Manager*\n\n"
+            "🔒 Private Menu - Choose an action:"
+        )
+    else:
+        text = (
+            "🤖 *Pablito's Corridor Manager*\n\n"
+            "👥 Group Menu - Public actions only:"
+        )
+    
+    await query.edit_message_text(
+        text=text,
+        reply_markup=create_main_menu(is_private),
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+@callback_route("help", code=0x02)
+async def show_help_callback(query):
+    """Show help via callback."""
+    is_private = query.message.chat.type == "private"
+    
+    if is_private:
+        text = (
+            "🤖 *Pablito's Corridor Manager*\n\n"
+            "🔒 *Private Chat Commands:*\n"
+            "/menu - Show full menu\n"
+            "/status - Weekly status\n"
+            "/tasks - List all tasks\n"
+            "/mystats - Your stats\n"
+            "/map - Corridor map\n"
+            "/optout <task> <reason> - Opt out\n"
+            "/whooptedout - See opt-outs\n\n"
+            "💡 Use buttons for easy task management!"
+        )
+    else:
+        text = (
+            "🤖 *Pablito's Corridor Manager*\n\n"
+            "👥 *Group Chat Commands:*\n"
+            "/status - Weekly status\n"
+            "/tasks - List all tasks\n"
+            "/whooptedout - See opt-outs\n\n"
+            "🔒 *Private Actions:*\n"
+            "To complete tasks, amend, or see your stats,\n"
+            "message me privately\n\n"
+            "💡 Use buttons for quick access!"
+        )
+    
+    keyboard = InlineKeyboardMarkup([[
+        InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))
+    ]])
+    
+    await query.edit_message_text(
+        text=text,
+        reply_markup=keyboard,
+        parse_mode=ParseMode.MARKDOWN
+    )
+
+
+def invalidate_menus():
+    """Drop all cached category/task menus.
+    
+    Call after a task's status changes (complete/amend), an opt-out is
+    recorded, or the week rolls over.
+    """
+    global _menu_version
+    _menu_cache.clear()
+    _menu_version += 1
+    _menu_stats["invalidations"] += 1
+
+
+def menu_cache_stats() -> Dict[str, int]:
+    """Hit/miss/invalidation counters for the menu cache."""
+    return {**_menu_stats, "size": len(_menu_cache)}
+
+
+def _get_cached_menu(key: MenuKey):
+    """Return (True, markup) for a fresh cache entry, else (False, None)."""
+    cached = _menu_cache.get(key)
+    if cached is not None and time.monotonic() - cached[1] < MENU_CACHE_TTL_SECONDS:
+        _menu_stats["hits"] += 1
+        return True, cached[0]
+    _menu_stats["misses"] += 1
+    return False, None
+
+
+def _store_menu(key: MenuKey, version: int, markup: Optional[InlineKeyboardMarkup]):
+    # Don't cache a menu that raced with an invalidation
+    if version != _menu_version:
+        return
+    if len(_menu_cache) >= MENU_CACHE_MAX_SIZE:
+        _menu_cache.clear()
+    _menu_cache[key] = (markup, time.monotonic())
+
+
+async def create_category_menu(action: str = "complete") -> InlineKeyboardMarkup:
     """Create category selection menu with progress."""
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+    async with get_async_db() as db:
+        current_week = await get_current_week(db)
         
         if not current_week:
             return None
         
-        # Get task counts by category
-        all_instances = (
-            db.query(TaskInstance)
-            .filter_by(week_id=current_week.id)
-            .join(TaskType)
-            .all()
-        )
+        key = (current_week.id, action, None)
+        found, markup = _get_cached_menu(key)
+        if found:
+            return markup
         
-        by_category = {}
-        for task in all_instances:
-            category = task.task_type.category or "other"
-            if category not in by_category:
-                by_category[category] = {"completed": 0, "total": 0}
-            if action == "complete" and task.status == "pending":
-                by_category[category]["total"] += 1
-            elif action == "amend" and task.status == "completed":
-                by_category[category]["total"] += 1
-            else:
-                # For ask/optout, count all tasks
-                by_category[category]["total"] += 1
-            
-            if task.status == "completed":
-                by_category[category]["completed"] += 1
+        version = _menu_version
+        # Get task counts by category
+        status_counts = await get_category_status_counts(db, current_week.id)
+    
+    by_category = {}
+    for category, status, count in status_counts:
+        if category not in by_category:
+            by_category[category] = {"completed": 0, "total": 0}
+        if action == "complete" and status == "pending":
+            by_category[category]["total"] += count
+        elif action == "amend" and status == "completed":
+            by_category[category]["total"] += count
+        else:
+            # For ask/optout, count all tasks
+            by_category[category]["total"] += count
         
-        # Create buttons (2 per row)
-        keyboard = []
-        row = []
-        for category in sorted(by_category.keys()):
-            if by_category[category]["total"] == 0:
-                continue  # Skip categories with no tasks
-            
-            emoji = CATEGORY_EMOJIS.get(category, "📦")
-            stats = by_category[category]
-            button_text = f"{emoji} {category.title()} ({stats['completed']}/{CATEGORY_AMOUNTS.get(category, 1)})"
-            
-            row.append(InlineKeyboardButton(
-                button_text,
-                callback_data=f"{action}:category:{category}"
-            ))
-            
-            if len(row) == 2:
-                keyboard.append(row)
-                row = []
+        if status == "completed":
+            by_category[category]["completed"] += count
+    
+    # Create buttons (2 per row)
+    keyboard = []
+    row = []
+    for category in sorted(by_category.keys()):
+        if by_category[category]["total"] == 0:
+            continue  # Skip categories with no tasks
         
-        if row:  # Add remaining button
-            keyboard.append(row)
+        emoji = CATEGORY_EMOJIS.get(category, "📦")
+        stats = by_category[category]
+        button_text = f"{emoji} {category.title()} ({stats['completed']}/{CATEGORY_AMOUNTS.get(category, 1)})"
         
-        # Add back button
-        keyboard.append([InlineKeyboardButton("« Back to Menu", callback_data="menu")])
+        row.append(InlineKeyboardButton(
+            button_text,
+            callback_data=encode_callback(f"{action}:category:{category}", current_week.id)
+        ))
         
-        return InlineKeyboardMarkup(keyboard)
+        if len(row) == 2:
+            keyboard.append(row)
+            row = []
+    
+    if row:  # Add remaining button
+        keyboard.append(row)
+    
+    # Add back button
+    keyboard.append([InlineKeyboardButton("« Back to Menu", callback_data=encode_callback("menu"))])
+    
+    markup = InlineKeyboardMarkup(keyboard)
+    _store_menu(key, version, markup)
+    return markup
 
 
-def create_task_menu(category: str, action: str = "complete") -> InlineKeyboardMarkup:
+async def create_task_menu(category: str, action: str = "complete") -> InlineKeyboardMarkup:
     """Create task selection menu for a category."""
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+    async with get_async_db() as db:
+        current_week = await get_current_week(db)
         
         if not current_week:
             return None
         
+        key = (current_week.id, action, category)
+        found, markup = _get_cached_menu(key)
+        if found:
+            return markup
+        
+        version = _menu_version
         # Get tasks for this category
         query = (
-            db.query(TaskInstance)
+            select(TaskInstance)
             .join(TaskType)
+            .options(contains_eager(TaskInstance.task_type))
             .filter(
                 TaskInstance.week_id == current_week.id,
                 TaskType.category == category
@@ -152,9 +329,10 @@ def create_task_menu(category: str, action: str = "complete") -> InlineKeyboardM
             query = query.filter(TaskInstance.status == "completed")
         # For ask/optout, show all tasks
         
-        tasks = query.order_by(TaskType.name).all()
+        tasks = (await db.scalars(query.order_by(TaskType.name))).all()
         
         if not tasks:
+            _store_menu(key, version, None)
             return None
         
         # Create buttons (1 per row for readability)
@@ -169,10 +347,12 @@ def create_task_menu(category: str, action: str = "complete") -> InlineKeyboardM
             
             keyboard.append([InlineKeyboardButton(
                 button_text,
-                callback_data=f"{action}:task:{task.id}"
+                callback_data=encode_callback(f"{action}:task:{task.id}", current_week.id)
             )])
         
         # Add back button
-        keyboard.append([InlineKeyboardButton("« Back to Categories", callback_data=f"{action}:categories")])
+        keyboard.append([InlineKeyboardButton("« Back to Categories", callback_data=encode_callback(f"{action}:categories"))])
         
-        return InlineKeyboardMarkup(keyboard)
+        markup = InlineKeyboardMarkup(keyboard)
+        _store_menu(key, version, markup)
+        return markup
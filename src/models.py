@@ -3,8 +3,8 @@
 from datetime import datetime
 from typing import Optional, List
 from sqlalchemy import (
-    Boolean, Column, Integer, String, Text, DateTime, Date, 
-    ForeignKey, Numeric, UniqueConstraint, BIGINT, CheckConstraint
+    Boolean, Column, Integer, String, Text, DateTime, Date, JSON,
+    ForeignKey, Numeric, UniqueConstraint, BIGINT, CheckConstraint, Index, text
 )
 from sqlalchemy.orm import declarative_base, relationship, Mapped
 from sqlalchemy.sql import func
@@ -64,7 +64,7 @@ class TaskOptOut(Base):
     
     id = Column(Integer, primary_key=True)
     person_id = Column(Integer, ForeignKey("people.id", ondelete="CASCADE"), nullable=False)
-    task_type_id = Column(Integer, ForeignKey("task_types.id", ondelete="CASCADE"), nullable=False)
+    task_type_id = Column(Integer, ForeignKey("task_types.id", ondelete="CASCADE"), nullable=False, index=True)
     reason = Column(String(200), nullable=True)
     created_at = Column(DateTime, default=func.now())
     
@@ -93,14 +93,30 @@ class Week(Base):
     deadline = Column(DateTime, nullable=False)
     closed = Column(Boolean, default=False)
     
+    # Progress counters, maintained by the complete/amend handlers
+    completed_count = Column(Integer, nullable=False, default=0, server_default="0")
+    category_completed = Column(JSON, nullable=False, default=dict, server_default="{}")  # {category: count}
+    person_completed = Column(JSON, nullable=False, default=dict, server_default="{}")    # {person_id: count}
+    
     # Unique constraint
     __table_args__ = (
         UniqueConstraint("year", "week_number", name="uq_year_week"),
+        # "Current week" lookup: open weeks ordered by deadline
+        Index("ix_weeks_open_deadline", "deadline", postgresql_where=text("closed = false")),
     )
     
     # Relationships
     task_instances = relationship("TaskInstance", back_populates="week", cascade="all, delete-orphan")
     penalties = relationship("Penalty", back_populates="week", cascade="all, delete-orphan")
+    summary = relationship("WeekSummary", back_populates="week", uselist=False, cascade="all, delete-orphan")
+    
+    def category_completed_count(self, category: str) -> int:
+        """Completed tasks in a category this week."""
+        return (self.category_completed or {}).get(category, 0)
+    
+    def person_completed_count(self, person_id: int) -> int:
+        """Tasks completed by a person this week."""
+        return (self.person_completed or {}).get(str(person_id), 0)
     
     def __repr__(self):
         return f"<Week(id={self.id}, year={self.year}, week={self.week_number}, closed={self.closed})>"
@@ -115,14 +131,16 @@ class TaskInstance(Base):
     week_id = Column(Integer, ForeignKey("weeks.id", ondelete="CASCADE"), nullable=False)
     task_type_id = Column(Integer, ForeignKey("task_types.id", ondelete="CASCADE"), nullable=False)
     status = Column(String(20), default="pending")  # pending, completed, skipped
-    completed_by = Column(Integer, ForeignKey("people.id"), nullable=True)
+    completed_by = Column(Integer, ForeignKey("people.id"), nullable=True, index=True)
     completed_at = Column(DateTime, nullable=True)
     notes = Column(Text, nullable=True)
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # bumped on every status change
     
     # Unique constraint
     __table_args__ = (
         UniqueConstraint("week_id", "task_type_id", name="uq_week_task"),
         CheckConstraint("status IN ('pending', 'completed', 'skipped')", name="check_status"),
+        Index("ix_task_instances_week_status", "week_id", "status"),
     )
     
     # Relationships
@@ -141,7 +159,7 @@ class CompletionLog(Base):
     __tablename__ = "completion_log"
     
     id = Column(Integer, primary_key=True)
-    task_instance_id = Column(Integer, ForeignKey("task_instances.id", ondelete="CASCADE"), nullable=False)
+    task_instance_id = Column(Integer, ForeignKey("task_instances.id", ondelete="CASCADE"), nullable=False, index=True)
     person_id = Column(Integer, ForeignKey("people.id", ondelete="SET NULL"), nullable=True)
     action = Column(String(20), nullable=False)  # completed, claimed, disputed, unclaimed
     timestamp = Column(DateTime, default=func.now())
@@ -174,4 +192,85 @@ class Penalty(Base):
     week = relationship("Week", back_populates="penalties")
     
     def __repr__(self):
-        return f"<Penalty(id={self.id}, person_id={self.person_id}, amount={self.amount_eur}, paid={self.paid})>"
\ No newline at end of file
+        return f"<Penalty(id={self.id}, person_id={self.person_id}, amount={self.amount_eur}, paid={self.paid})>"
+
+
+class OutboundMessage(Base):
+    """Messages queued for sending to Telegram (kept until delivered)."""
+    
+    __tablename__ = "outbound_messages"
+    
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(BIGINT, nullable=False)
+    text = Column(Text, nullable=False)
+    parse_mode = Column(String(20), nullable=True)
+    status = Column(String(20), nullable=False, default="pending", index=True)  # pending, sending, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    claimed_at = Column(DateTime, nullable=True)  # when a process took it for delivery
+    
+    __table_args__ = (
+        CheckConstraint("status IN ('pending', 'sending', 'failed')", name="check_outbound_status"),
+    )
+    
+    def __repr__(self):
+        return f"<OutboundMessage(id={self.id}, chat_id={self.chat_id}, status='{self.status}')>"
+
+
+class MediaFile(Base):
+    """Telegram file_ids of uploaded local media, so files are sent only once."""
+    
+    __tablename__ = "media_files"
+    
+    id = Column(Integer, primary_key=True)
+    key = Column(String(100), nullable=False, unique=True)  # e.g. 'corridor-map'
+    content_hash = Column(String(64), nullable=False)  # sha256 of the uploaded file
+    file_id = Column(String(200), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<MediaFile(key='{self.key}', file_id='{self.file_id}')>"
+
+
+class WeekSummary(Base):
+    """Results of a closed week, written once at rollover."""
+    
+    __tablename__ = "week_summaries"
+    
+    id = Column(Integer, primary_key=True)
+    week_id = Column(Integer, ForeignKey("weeks.id", ondelete="CASCADE"), nullable=False, unique=True)
+    completed_count = Column(Integer, nullable=False, default=0)
+    total_tasks = Column(Integer, nullable=False, default=0)
+    total_minutes = Column(Integer, nullable=False, default=0)  # sum of estimated_duration_minutes
+    created_at = Column(DateTime, default=func.now())
+    
+    # Relationships
+    week = relationship("Week", back_populates="summary")
+    people = relationship("WeekPersonSummary", back_populates="week_summary", cascade="all, delete-orphan")
+    
+    def __repr__(self):
+        return f"<WeekSummary(week_id={self.week_id}, completed={self.completed_count}/{self.total_tasks})>"
+
+
+class WeekPersonSummary(Base):
+    """One person's results in a closed week (completed_count=0: didn't contribute)."""
+    
+    __tablename__ = "week_person_summaries"
+    
+    id = Column(Integer, primary_key=True)
+    week_summary_id = Column(Integer, ForeignKey("week_summaries.id", ondelete="CASCADE"), nullable=False)
+    person_id = Column(Integer, ForeignKey("people.id", ondelete="CASCADE"), nullable=False, index=True)
+    completed_count = Column(Integer, nullable=False, default=0)
+    minutes = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("week_summary_id", "person_id", name="uq_week_summary_person"),
+    )
+    
+    # Relationships
+    week_summary = relationship("WeekSummary", back_populates="people")
+    person = relationship("Person")
+    
+    def __repr__(self):
+        return f"<WeekPersonSummary(week_summary_id={self.week_summary_id}, person_id={self.person_id}, completed={self.completed_count})>"
@@ -0,0 +1,80 @@
+"""Coalescing of group notifications.
+
+During a cleaning evening many tasks get completed within minutes. Instead
+of one group message per completion, events are buffered for a short
+window and sent as a single digest.
+"""
+
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Awaitable, Callable, List, Optional
+from telegram.constants import MessageLimit
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationCoalescer:
+    """Buffer group messages and send them as one digest per window."""
+
+    def __init__(self, send_func: Callable[[str], Awaitable[None]], window_seconds: float):
+        self.send_func = send_func
+        self.window_seconds = window_seconds
+        self._buffer: List[str] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def add(self, message: str):
+        """Queue a message; the first one in a window schedules the flush."""
+        if self.window_seconds <= 0:
+            await self.send_func(message)
+            return
+
+        self._buffer.append(message)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window_seconds)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Send everything buffered so far as one message."""
+        messages, self._buffer = self._buffer, []
+        if not messages:
+            return
+
+        if len(messages) == 1:
+            digests = messages
+        else:
+            digests = _build_digests(messages)
+
+        for text in digests:
+            try:
+                await self.send_func(text)
+            except Exception as e:
+                logger.error(f"Failed to send notification digest: {e}")
+
+    async def close(self):
+        """Cancel the pending timer and send what's buffered right away."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._flush_task
+            self._flush_task = None
+        await self.flush()
+
+
+def _build_digests(messages: List[str]) -> List[str]:
+    """Join messages under a header, splitting to stay within Telegram's length limit."""
+    header = f"📣 *Corridor updates ({len(messages)})*\n\n"
+    digests = []
+    current = header
+    for message in messages:
+        # `current` ends with the separator, which is stripped from a digest's last message
+        if current != header and len(current) + len(message) > MessageLimit.MAX_TEXT_LENGTH:
+            digests.append(current.rstrip())
+            current = ""
+        current += message + "\n\n"
+    digests.append(current.rstrip())
+    return digests
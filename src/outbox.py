@@ -0,0 +1,216 @@
+"""Persistent outbound message queue.
+
+Group notifications, reminders and week summaries are written to the
+`outbound_messages` table and delivered by a background worker, so a
+flood-limit error or network hiccup delays a message instead of losing it.
+Telegram's global and per-group rate limits (including RetryAfter) are
+enforced by the AIORateLimiter installed on the Application; this module
+adds persistence and retries on top.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from contextlib import suppress
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Optional
+from telegram import Bot
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+from telegram.ext import Application
+from sqlalchemy import and_, or_, update
+
+from src.database import get_async_db
+from src.models import OutboundMessage
+
+logger = logging.getLogger(__name__)
+
+# ========== CONFIGURATION ==========
+
+# Give up on a message after this many failed delivery attempts
+MAX_ATTEMPTS = 5
+
+# Delay before retrying after a network error (doubled on every attempt)
+RETRY_BACKOFF_SECONDS = 5
+
+# A message claimed this long ago by a process that never delivered it
+# (crashed or killed) may be claimed again by the next one to start
+STALE_CLAIM_SECONDS = 600
+
+# ====================================
+
+
+class Outbox:
+    """Queue messages durably and deliver them in order, per chat.
+
+    Rows are claimed (status "sending") by the process that delivers them:
+    `send` inserts them already claimed and `start` claims rows left
+    unsent, so replicas starting together never deliver the same message
+    twice. Each chat's messages go out one at a time, in order; a message
+    waiting for a retry holds back the rest of its chat but not other chats.
+    """
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        # Message ids per chat, oldest first; the head is the one being delivered
+        self._chats: Dict[int, Deque[int]] = {}
+        # Chats whose head message can be delivered now
+        self._ready: "asyncio.Queue[int]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Claim messages left unsent by a previous run and start delivering."""
+        now = datetime.now()
+        async with get_async_db() as db:
+            claimed = (await db.execute(
+                update(OutboundMessage)
+                .where(or_(
+                    OutboundMessage.status == "pending",
+                    and_(
+                        OutboundMessage.status == "sending",
+                        OutboundMessage.claimed_at < now - timedelta(seconds=STALE_CLAIM_SECONDS),
+                    ),
+                ))
+                .values(status="sending", claimed_at=now)
+                .returning(OutboundMessage.id, OutboundMessage.chat_id)
+            )).all()
+
+        for message_id, chat_id in sorted(claimed):
+            self._enqueue(chat_id, message_id)
+        if claimed:
+            logger.info(f"Resending {len(claimed)} unsent message(s)")
+
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker and release undelivered messages for the next run."""
+        if self._worker:
+            self._worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+
+        message_ids = [message_id for queue in self._chats.values() for message_id in queue]
+        self._chats.clear()
+        if message_ids:
+            async with get_async_db() as db:
+                await db.execute(
+                    update(OutboundMessage)
+                    .where(OutboundMessage.id.in_(message_ids), OutboundMessage.status == "sending")
+                    .values(status="pending", claimed_at=None)
+                )
+
+    async def send(self, chat_id, text: str, parse_mode: Optional[str] = ParseMode.MARKDOWN):
+        """Queue a message for delivery."""
+        async with get_async_db() as db:
+            message = OutboundMessage(
+                chat_id=int(chat_id),
+                text=text,
+                parse_mode=parse_mode,
+                status="sending",
+                claimed_at=datetime.now(),
+            )
+            db.add(message)
+            await db.flush()
+            message_id = message.id
+
+        self._enqueue(int(chat_id), message_id)
+
+    def pending_count(self) -> int:
+        """Messages waiting in memory (including ones waiting for a retry)."""
+        return sum(len(queue) for queue in self._chats.values())
+
+    def _enqueue(self, chat_id: int, message_id: int):
+        queue = self._chats.get(chat_id)
+        if queue is None:
+            self._chats[chat_id] = deque([message_id])
+            self._ready.put_nowait(chat_id)
+        else:
+            queue.append(message_id)
+
+    async def _run(self):
+        while True:
+            chat_id = await self._ready.get()
+            queue = self._chats.get(chat_id)
+            if not queue:
+                continue
+            message_id = queue[0]
+            try:
+                retry_in = await self._deliver(message_id)
+            except Exception:
+                logger.exception(f"Unexpected error delivering outbound message {message_id}")
+                retry_in = None
+
+            if retry_in is not None:
+                # Keep the message at the head so the chat's order is preserved
+                asyncio.get_running_loop().call_later(retry_in, self._ready.put_nowait, chat_id)
+                continue
+
+            queue.popleft()
+            if queue:
+                self._ready.put_nowait(chat_id)
+            else:
+                del self._chats[chat_id]
+
+    async def _deliver(self, message_id: int) -> Optional[float]:
+        """Try to send a message.
+
+        Returns:
+            Seconds to wait before retrying it, or None if it is done with
+            (delivered, given up on, or no longer ours)
+        """
+        async with get_async_db() as db:
+            message = await db.get(OutboundMessage, message_id)
+            if message is None or message.status != "sending":
+                return None
+            chat_id, text, parse_mode = message.chat_id, message.text, message.parse_mode
+            attempts = message.attempts + 1
+
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+        except RetryAfter as e:
+            # The rate limiter already retried; wait as long as Telegram asked
+            return await self._record_failure(message_id, attempts, e, retry_in=e.retry_after)
+        except (BadRequest, Forbidden) as e:
+            # Retrying won't help (bad markup, bot removed from chat, ...)
+            return await self._record_failure(message_id, attempts, e, retry_in=None)
+        except NetworkError as e:
+            return await self._record_failure(
+                message_id, attempts, e, retry_in=RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+            )
+        except TelegramError as e:
+            return await self._record_failure(message_id, attempts, e, retry_in=None)
+
+        async with get_async_db() as db:
+            message = await db.get(OutboundMessage, message_id)
+            if message is not None:
+                await db.delete(message)
+        return None
+
+    async def _record_failure(self, message_id: int, attempts: int, error: Exception, retry_in) -> Optional[float]:
+        give_up = retry_in is None or attempts >= MAX_ATTEMPTS
+
+        async with get_async_db() as db:
+            message = await db.get(OutboundMessage, message_id)
+            if message is None:
+                return None
+            message.attempts = attempts
+            message.last_error = str(error)
+            if give_up:
+                message.status = "failed"
+            else:
+                # Still ours: renew the claim for the retry
+                message.claimed_at = datetime.now()
+
+        if give_up:
+            logger.error(f"Giving up on outbound message {message_id} after {attempts} attempt(s): {error}")
+            return None
+        logger.warning(f"Outbound message {message_id} failed ({error}), retrying in {retry_in}s")
+        return retry_in
+
+
+def get_outbox(app: Application) -> Outbox:
+    """Return the Application's outbox (created on first use)."""
+    if "outbox" not in app.bot_data:
+        app.bot_data["outbox"] = Outbox(app.bot)
+    return app.bot_data["outbox"]
@@ -4,15 +4,28 @@ CONFIGURATION:
 - Edit REMINDER_DAYS to set which days reminders are sent
 - Edit REMINDER_TIMES to set what times reminders are sent
 - Edit DEADLINE_DAY to change when the week ends
+- Set DM_REMINDERS_ENABLED to also message residents privately
 """
 
+import asyncio
 from datetime import datetime, time, timedelta
+from typing import Dict, List, Tuple
+from apscheduler.triggers.cron import CronTrigger
+from telegram import Bot
 from telegram.ext import Application
 from telegram.constants import ParseMode
+from telegram.error import Forbidden, TelegramError
+from telegram.helpers import escape_markdown
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import get_db
-from src.models import Person, TaskInstance, Week
+from src.config import settings
+from src.current_week import get_current_week_row
+from src.database import get_async_db
+from src.job_store import get_application, schedule_job
+from src.models import Person, TaskInstance, TaskOptOut, TaskType
 from src.menus import CATEGORY_AMOUNTS
+from src.outbox import get_outbox
 
 # ========== CONFIGURATION ==========
 
@@ -28,23 +41,30 @@ REMINDER_TIMES = [
 # When does the week end? (0=Monday, 6=Sunday)
 DEADLINE_DAY = 6  # Sunday
 
+# How late a reminder may still be sent after downtime (seconds)
+REMINDER_MISFIRE_GRACE_SECONDS = 2 * 60 * 60  # 2 hours
+
+# How many tasks to list in a direct-message reminder
+DM_MAX_TASKS_LISTED = 10
+
 # ====================================
 
 
 async def send_reminder(app: Application, group_chat_id: int):
     """Send a reminder about pending tasks to the group."""
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
+    async with get_async_db() as db:
+        current_week = await get_current_week_row(db)
         
         if not current_week:
             return  # No active week
         
-        # Get all task instances for the week
-        all_instances = db.query(TaskInstance).filter_by(week_id=current_week.id).all()
-        completed_count = len([t for t in all_instances if t.status == "completed"])
+        completed_count = current_week.completed_count
         total = sum([CATEGORY_AMOUNTS.get(cat, 1) for cat in CATEGORY_AMOUNTS.keys()])
         remaining = total - completed_count
         
+        time_msg = format_time_left(current_week.deadline)
+        dm_messages = []
+        
         if remaining == 0:
             # All tasks done - send celebration
             message = (
@@ -53,24 +73,11 @@ async def send_reminder(app: Application, group_chat_id: int):
             )
         else:
             # Tasks remaining - send reminder
-            # Calculate days until deadline
-            now = datetime.now()
-            days_until_deadline = (current_week.deadline - now).days
-            
-            if days_until_deadline < 0:
-                time_msg = "⚠️ *OVERDUE!*"
-            elif days_until_deadline == 0:
-                time_msg = "⏰ *Due TODAY!*"
-            elif days_until_deadline == 1:
-                time_msg = "⏰ *Due TOMORROW!*"
-            else:
-                time_msg = f"⏰ Due in *{days_until_deadline} days*"
-            
             # Get non-contributors
-            completed = [t for t in all_instances if t.status == "completed"]
-            completed_by_ids = [t.completed_by for t in completed if t.completed_by]
-            active_people = db.query(Person).filter_by(active=True).all()
-            not_contributed = [p for p in active_people if p.id not in completed_by_ids]
+            active_people = (await db.scalars(select(Person).filter_by(active=True))).all()
+            not_contributed = [
+                p for p in active_people if current_week.person_completed_count(p.id) == 0
+            ]
             
             progress = int((completed_count / total) * 10) if total > 0 else 0
             progress_bar = "█" * progress + "░" * (10 - progress)
@@ -89,16 +96,118 @@ async def send_reminder(app: Application, group_chat_id: int):
                 message += "\n\n"
             
             message += "¡Hagámosle pues! 💪"
-        
-        # Send to group
-        try:
-            await app.bot.send_message(
-                chat_id=group_chat_id,
-                text=message,
-                parse_mode=ParseMode.MARKDOWN
-            )
-        except Exception as e:
-            print(f"Failed to send reminder: {e}")
+            
+            if settings.dm_reminders_enabled:
+                pending_by_person = await get_pending_tasks_by_person(db, current_week.id)
+                dm_messages = [
+                    (telegram_id, format_dm_reminder(name, tasks, time_msg))
+                    for (person_id, telegram_id, name), tasks in pending_by_person.items()
+                    if current_week.person_completed_count(person_id) == 0
+                ]
+    
+    # Send to group
+    try:
+        await get_outbox(app).send(group_chat_id, message, parse_mode=ParseMode.MARKDOWN)
+    except Exception as e:
+        print(f"Failed to queue reminder: {e}")
+    
+    if dm_messages:
+        results = await send_direct_messages(app.bot, dm_messages, settings.dm_reminder_concurrency)
+        print(f"DM reminders: {results}")
+
+
+def format_time_left(deadline: datetime) -> str:
+    """Deadline line for reminders ("Due TODAY!", "Due in 3 days", ...)."""
+    # Calculate days until deadline
+    days_until_deadline = (deadline - datetime.now()).days
+    
+    if days_until_deadline < 0:
+        return "⚠️ *OVERDUE!*"
+    elif days_until_deadline == 0:
+        return "⏰ *Due TODAY!*"
+    elif days_until_deadline == 1:
+        return "⏰ *Due TOMORROW!*"
+    return f"⏰ Due in *{days_until_deadline} days*"
+
+
+async def get_pending_tasks_by_person(
+    db: AsyncSession, week_id: int
+) -> Dict[Tuple[int, int, str], List[str]]:
+    """Pending tasks each active person can do this week, in one query.
+    
+    Tasks a person opted out of are excluded. People with no eligible
+    task are left out.
+    
+    Returns:
+        {(person_id, telegram_id, name): [task name, ...]}
+    """
+    rows = await db.execute(
+        select(Person.id, Person.telegram_id, Person.name, TaskType.name)
+        .select_from(Person)
+        .join(TaskInstance, and_(TaskInstance.week_id == week_id, TaskInstance.status == "pending"))
+        .join(TaskType, TaskType.id == TaskInstance.task_type_id)
+        .outerjoin(
+            TaskOptOut,
+            and_(TaskOptOut.person_id == Person.id, TaskOptOut.task_type_id == TaskType.id)
+        )
+        .filter(Person.active == True, TaskOptOut.id.is_(None))
+        .order_by(Person.id, TaskType.category, TaskType.name)
+    )
+    
+    pending_by_person: Dict[Tuple[int, int, str], List[str]] = {}
+    for person_id, telegram_id, name, task_name in rows:
+        pending_by_person.setdefault((person_id, telegram_id, name), []).append(task_name)
+    return pending_by_person
+
+
+def format_dm_reminder(name: str, tasks: List[str], time_msg: str) -> str:
+    """Personal reminder listing the tasks someone can still pick up."""
+    message = (
+        f"👋 Hi {escape_markdown(name)}!\n\n"
+        f"{time_msg}\n"
+        f"You haven't done a task this week yet. Still open for you:\n"
+    )
+    for task_name in tasks[:DM_MAX_TASKS_LISTED]:
+        message += f"• {escape_markdown(task_name)}\n"
+    if len(tasks) > DM_MAX_TASKS_LISTED:
+        message += f"_…and {len(tasks) - DM_MAX_TASKS_LISTED} more_\n"
+    message += "\nUse /menu to mark one as done. ¡Hagámosle pues! 💪"
+    return message
+
+
+async def send_direct_messages(
+    bot: Bot, messages: List[Tuple[int, str]], concurrency: int
+) -> Dict[str, int]:
+    """Send private messages concurrently, at most `concurrency` in flight.
+    
+    Telegram's global rate limit is enforced by the bot's rate limiter;
+    the semaphore only bounds how many requests wait on it at once.
+    Residents who never started the bot (or blocked it) are skipped.
+    
+    Returns:
+        Counts of sent, blocked and failed messages
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {"sent": 0, "blocked": 0, "failed": 0}
+    
+    async def send_one(chat_id: int, text: str):
+        async with semaphore:
+            try:
+                await bot.send_message(chat_id=chat_id, text=text, parse_mode=ParseMode.MARKDOWN)
+                results["sent"] += 1
+            except Forbidden:
+                results["blocked"] += 1
+            except TelegramError as e:
+                print(f"Failed to send DM reminder to {chat_id}: {e}")
+                results["failed"] += 1
+    
+    await asyncio.gather(*(send_one(chat_id, text) for chat_id, text in messages))
+    return results
+
+
+async def reminder_job(group_chat_id: int):
+    """Scheduled entry point for a reminder."""
+    await send_reminder(get_application(), group_chat_id)
 
 
 def setup_reminders(app: Application, group_chat_id: int):
@@ -110,16 +219,22 @@ def setup_reminders(app: Application, group_chat_id: int):
         app: The Telegram Application instance
         group_chat_id: The group chat ID to send reminders to
     """
-    job_queue = app.job_queue
+    timezone = app.job_queue.scheduler.timezone
     
-    # Schedule reminders for each day and time
+    # Schedule reminders for each day and time (persisted, see src.job_store)
     for day in REMINDER_DAYS:
         for reminder_time in REMINDER_TIMES:
-            job_queue.run_daily(
-                callback=lambda context: send_reminder(app, group_chat_id),
-                time=reminder_time,
-                days=(day,),  # Tuple of days
-                name=f"reminder_{day}_{reminder_time.hour}_{reminder_time.minute}"
+            schedule_job(
+                f"reminder_{day}_{reminder_time.hour}_{reminder_time.minute}",
+                reminder_job,
+                CronTrigger(
+                    day_of_week=day,
+                    hour=reminder_time.hour,
+                    minute=reminder_time.minute,
+                    timezone=timezone
+                ),
+                misfire_grace_time=REMINDER_MISFIRE_GRACE_SECONDS,
+                group_chat_id=group_chat_id
             )
     
     print(f"✅ Reminders scheduled:")
@@ -0,0 +1,232 @@
+"""In-memory fuzzy search over task names for /optout and /whooptedout.
+
+Names are normalized into tokens (lowercase, accents stripped, letters
+and digits split: "Toilet1" -> "toilet", "1"). Every query token must
+match a token of the task, exactly, as a prefix, or within a small edit
+distance, and tasks are ranked by how well they match. The index is
+loaded at start-up, rebuilt when task types are changed through the ORM,
+and expires after a while as a safety net for changes made elsewhere.
+"""
+
+import bisect
+import heapq
+import re
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import TaskType
+
+# ========== CONFIGURATION ==========
+
+# Safety net for changes made outside this process (scripts, other replicas)
+CACHE_TTL_SECONDS = 3600
+
+# Most tasks offered in a disambiguation keyboard
+MAX_CANDIDATES = 6
+
+# Points per query token, by how it matched
+EXACT_SCORE = 3
+PREFIX_SCORE = 2
+TYPO_SCORE = 1
+
+# ====================================
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a task name or query into normalized tokens."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _TOKEN_RE.findall(stripped)
+
+
+def _max_typos(token: str) -> int:
+    """Edit distance tolerated for a query token (none for short or numeric tokens)."""
+    if token.isdigit() or len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+def _within_distance(a: str, b: str, limit: int) -> bool:
+    """Whether a and b are at most `limit` edits apart (a swap of neighbours counts once)."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            )
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if min(current) > limit and min(previous) > limit:
+            return False
+        before, previous = previous, current
+    return previous[-1] <= limit
+
+
+@dataclass(frozen=True)
+class TaskEntry:
+    """A searchable task type."""
+
+    id: int
+    name: str
+    category: Optional[str]
+
+
+@dataclass(frozen=True)
+class TaskLookup:
+    """Result of a task-name search.
+
+    `best` is set when one task clearly matches; otherwise `candidates`
+    (best first) can be offered to the user to pick from.
+    """
+
+    best: Optional[TaskEntry]
+    candidates: List[TaskEntry] = field(default_factory=list)
+
+
+class TaskNameIndex:
+    """Token index over task names."""
+
+    def __init__(self, tasks: Iterable[TaskEntry]):
+        self._tasks: Dict[int, TaskEntry] = {}
+        self._task_tokens: Dict[int, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._by_name: Dict[Tuple[str, ...], int] = {}
+
+        for task in tasks:
+            tokens = tuple(tokenize(task.name))
+            self._tasks[task.id] = task
+            self._task_tokens[task.id] = tokens
+            self._by_name.setdefault(tokens, task.id)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(task.id)
+
+        self._vocabulary = sorted(self._postings)
+        # Typos are only matched against words (numbers must match exactly)
+        self._words = [token for token in self._vocabulary if not token.isdigit()]
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def _token_scores(self, query_token: str) -> Dict[int, int]:
+        """Best score of one query token for every task it matches."""
+        scores: Dict[int, int] = {}
+
+        def credit(token: str, score: int):
+            for task_id in self._postings[token]:
+                if scores.get(task_id, 0) < score:
+                    scores[task_id] = score
+
+        if query_token in self._postings:
+            credit(query_token, EXACT_SCORE)
+
+        start = bisect.bisect_left(self._vocabulary, query_token)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(query_token):
+                break
+            if token != query_token:
+                credit(token, PREFIX_SCORE)
+
+        limit = _max_typos(query_token)
+        if limit:
+            for token in self._words:
+                if token != query_token and _within_distance(query_token, token, limit):
+                    credit(token, TYPO_SCORE)
+
+        return scores
+
+    def search(self, query: str, limit: int = MAX_CANDIDATES) -> List[TaskEntry]:
+        """Tasks matching every token of `query`, best match first."""
+        return [task for task, _ in self._ranked(query, limit)]
+
+    def _ranked(self, query: str, limit: int) -> List[Tuple[TaskEntry, int]]:
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        totals: Optional[Dict[int, int]] = None
+        for query_token in query_tokens:
+            scores = self._token_scores(query_token)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {task_id: totals[task_id] + score for task_id, score in scores.items() if task_id in totals}
+            if not totals:
+                return []
+
+        # Higher score first, then names with fewer unmatched tokens, then by name
+        ranked = heapq.nsmallest(
+            limit,
+            totals,
+            key=lambda task_id: (
+                -totals[task_id],
+                len(self._task_tokens[task_id]),
+                self._tasks[task_id].name,
+            ),
+        )
+        return [(self._tasks[task_id], totals[task_id]) for task_id in ranked]
+
+    def lookup(self, query: str) -> TaskLookup:
+        """Find the task a user most likely meant.
+
+        An exact (normalized) name match, a single match or a match scoring
+        higher than all others wins; if several tasks match equally well,
+        they are returned as candidates.
+        """
+        exact_id = self._by_name.get(tuple(tokenize(query)))
+        if exact_id is not None:
+            return TaskLookup(best=self._tasks[exact_id], candidates=[self._tasks[exact_id]])
+
+        ranked = self._ranked(query, MAX_CANDIDATES)
+        candidates = [task for task, _ in ranked]
+        if len(ranked) == 1 or (len(ranked) > 1 and ranked[0][1] > ranked[1][1]):
+            return TaskLookup(best=candidates[0], candidates=candidates)
+        return TaskLookup(best=None, candidates=candidates)
+
+
+_index: Optional[TaskNameIndex] = None
+_loaded_at = 0.0
+_generation = 0
+
+
+async def get_task_index(db: AsyncSession) -> TaskNameIndex:
+    """Return the task-name index, (re)loading it from the database when needed."""
+    global _index, _loaded_at
+
+    if _index is not None and time.monotonic() - _loaded_at < CACHE_TTL_SECONDS:
+        return _index
+
+    generation = _generation
+    rows = await db.execute(select(TaskType.id, TaskType.name, TaskType.category))
+    index = TaskNameIndex(TaskEntry(id, name, category) for id, name, category in rows)
+
+    # Don't cache an index that raced with an invalidation
+    if generation == _generation:
+        _index = index
+        _loaded_at = time.monotonic()
+    return index
+
+
+def invalidate_task_index():
+    """Drop the index; it is rebuilt on next use."""
+    global _index, _generation
+    _index = None
+    _generation += 1
+
+
+@event.listens_for(TaskType, "after_insert")
+@event.listens_for(TaskType, "after_update")
+@event.listens_for(TaskType, "after_delete")
+def _task_type_changed(mapper, connection, target: TaskType):
+    invalidate_task_index()
@@ -0,0 +1,107 @@
+"""Concurrent update processing with per-user ordering.
+
+Updates from different residents are handled in parallel, while updates
+from the same resident (e.g. a double-clicked button) run one after the
+other, in arrival order.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Process updates concurrently, serialized per user (or chat).
+
+    An update first waits for earlier updates with the same key and only
+    then takes one of the `max_concurrent_updates` slots, so a user with a
+    backlog holds at most one slot and never delays other users.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, int] = {}
+        self._in_flight = 0
+        self._waiting = 0
+        self._max_waiting = 0
+        self._processed = 0
+
+    @staticmethod
+    def _ordering_key(update: object) -> Optional[int]:
+        """Key updates must be ordered by: the user, falling back to the chat."""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_user:
+            return update.effective_user.id
+        if update.effective_chat:
+            return update.effective_chat.id
+        return None
+
+    # Overrides the base class, which takes a slot before calling
+    # do_process_update (so queued updates of one user would fill the slots)
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:  # type: ignore[misc]
+        """Run the update once earlier updates with the same key are done and a slot is free."""
+        key = self._ordering_key(update)
+        if key is None:
+            async with self._semaphore:
+                await self.do_process_update(update, coroutine)
+            return
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._pending[key] = self._pending.get(key, 0) + 1
+        try:
+            if lock.locked():
+                self._waiting += 1
+                self._max_waiting = max(self._max_waiting, self._waiting)
+                try:
+                    await lock.acquire()
+                finally:
+                    self._waiting -= 1
+            else:
+                await lock.acquire()
+
+            try:
+                async with self._semaphore:
+                    await self.do_process_update(update, coroutine)
+            finally:
+                lock.release()
+        finally:
+            self._pending[key] -= 1
+            if self._pending[key] == 0:
+                del self._pending[key]
+                del self._locks[key]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Run the update (ordering and the concurrency cap are handled by process_update)."""
+        await self._run(coroutine)
+
+    async def _run(self, coroutine: Awaitable[Any]) -> None:
+        self._in_flight += 1
+        try:
+            await coroutine
+        finally:
+            self._in_flight -= 1
+            self._processed += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Queue-depth metrics for monitoring."""
+        return {
+            "max_concurrent_updates": self.max_concurrent_updates,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "max_waiting": self._max_waiting,
+            "active_keys": len(self._locks),
+            "processed": self._processed,
+        }
+
+    async def initialize(self) -> None:
+        """Nothing to set up."""
+
+    async def shutdown(self) -> None:
+        """Log final metrics."""
+        logger.info(f"Update processor stats: {self.stats()}")
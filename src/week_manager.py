@@ -6,13 +6,24 @@ This module handles:
 - Creating a new week automatically
 """
 
+import asyncio
 from datetime import datetime, timedelta
+from typing import List, Optional
+from apscheduler.triggers.cron import CronTrigger
 from telegram.ext import Application
 from telegram.constants import ParseMode
+from sqlalchemy import Integer, String, cast, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from src.database import get_db
-from src.models import Person, TaskInstance, Week, TaskType
-from src.menus import CATEGORY_AMOUNTS
+from src.current_week import invalidate_current_week, load_current_week
+from src.database import get_async_db
+from src.job_store import get_application, schedule_job
+from src.models import Person, TaskInstance, Week, TaskType, WeekSummary, WeekPersonSummary
+from src.menus import CATEGORY_AMOUNTS, invalidate_menus
+from src.outbox import get_outbox
 
 # ========== CONFIGURATION ==========
 
@@ -30,8 +41,14 @@ NEW_WEEK_DEADLINE_DAY = 6  # Sunday
 # New week deadline time (hour, minute)
 NEW_WEEK_DEADLINE_TIME = (23, 59)  # 11:59 PM
 
+# Postgres advisory lock key guarding rollover (shared by all bot replicas)
+ROLLOVER_LOCK_KEY = 727_001
+
 # ====================================
 
+# Serializes rollovers within this process
+_rollover_lock = asyncio.Lock()
+
 
 async def check_and_rollover_week(app: Application, group_chat_id: int):
     """Check if week has ended and perform rollover if needed.
@@ -42,93 +59,188 @@ async def check_and_rollover_week(app: Application, group_chat_id: int):
     3. Closes current week
     4. Creates new week (if enabled)
     """
-    with get_db() as db:
-        # Get current active week
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
-        
-        if not current_week:
-            # No active week - create one
-            if AUTO_CREATE_NEW_WEEK:
-                await create_new_week(db, app, group_chat_id)
-            return
-        
-        # Check if deadline has passed
-        now = datetime.now()
-        if now < current_week.deadline:
-            # Week still active
-            return
-        
-        # Week has ended - perform rollover
-        await perform_week_rollover(db, current_week, app, group_chat_id)
+    await rollover_week(app, group_chat_id)
 
 
-async def perform_week_rollover(db, current_week: Week, app: Application, group_chat_id: int):
-    """Perform the week rollover process.
+async def acquire_rollover_lock(db: AsyncSession):
+    """Take the cross-replica rollover lock for the current transaction.
     
-    1. Generate summary
-    2. Send message to group
-    3. Close current week
-    4. Create new week
+    On Postgres this is a transaction-scoped advisory lock, released on
+    commit or rollback. Other databases (SQLite in tests) rely on the
+    in-process lock alone.
     """
-    # Generate summary message
-    summary = generate_week_summary(db, current_week)
+    connection = await db.connection()
+    if connection.dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(ROLLOVER_LOCK_KEY)))
+
+
+async def catch_up_rollover(app: Application, group_chat_id: int):
+    """Startup reconciliation for deadlines that passed while the bot was down.
     
-    # Send to group
+    Closes and summarizes the expired week, records the weeks that were
+    missed entirely and creates the current one.
+    """
     try:
-        await app.bot.send_message(
-            chat_id=group_chat_id,
-            text=summary,
-            parse_mode=ParseMode.MARKDOWN
-        )
+        if await rollover_week(app, group_chat_id):
+            print("✅ Caught up on week rollover at startup")
+    except Exception as e:
+        print(f"Startup week rollover failed: {e}")
+
+
+async def rollover_week(
+    app: Application,
+    group_chat_id: int,
+    week_id: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> bool:
+    """Close the active week and start the next one, at most once.
+    
+    Without `week_id` (scheduled check) the active week is only closed once
+    its deadline has passed; with it (manual rollover) that week is closed
+    right away, if it is still the active one. Concurrent calls, from this
+    process or other replicas, are serialized and re-check the state after
+    taking the lock, so only the first one does anything.
+    
+    Weeks whose deadline passed entirely while the bot was down are
+    created as closed weeks in the same transaction, so history has no gaps.
+    
+    Args:
+        now: Current time (overridable to simulate a clock)
+    
+    Returns:
+        True if this call closed or created a week
+    """
+    now = now or datetime.now()
+    summary = None
+    missed_weeks = []
+    new_week = None
+    
+    async with _rollover_lock:
+        async with get_async_db() as db:
+            await acquire_rollover_lock(db)
+            current_week = await load_current_week(db, for_update=True)
+            
+            if current_week is None:
+                # No active week - create one
+                if not AUTO_CREATE_NEW_WEEK:
+                    return False
+                latest_week = await db.scalar(select(Week).order_by(Week.deadline.desc()).limit(1))
+                if latest_week:
+                    missed_weeks = await record_missed_weeks(db, latest_week.deadline, now)
+                new_week = await create_new_week(db, after=now)
+                if new_week is None and not missed_weeks:
+                    return False
+            else:
+                if week_id is not None and current_week.id != week_id:
+                    # Already rolled over by someone else
+                    return False
+                if week_id is None and now < current_week.deadline:
+                    # Week still active
+                    return False
+                
+                summary = await generate_week_summary(db, current_week)
+                current_week.closed = True
+                if AUTO_CREATE_NEW_WEEK:
+                    missed_weeks = await record_missed_weeks(db, current_week.deadline, now)
+                    new_week = await create_new_week(db, after=now)
+        # Closing and creating are committed together here
+    
+    invalidate_current_week()
+    invalidate_menus()
+    
+    outbox = get_outbox(app)
+    try:
+        if summary:
+            await outbox.send(group_chat_id, summary, parse_mode=ParseMode.MARKDOWN)
+        if missed_weeks:
+            await outbox.send(group_chat_id, format_missed_weeks_notice(missed_weeks), parse_mode=ParseMode.MARKDOWN)
+        if new_week:
+            await outbox.send(group_chat_id, format_new_week_announcement(new_week), parse_mode=ParseMode.MARKDOWN)
     except Exception as e:
-        print(f"Failed to send week summary: {e}")
+        print(f"Failed to queue rollover messages: {e}")
     
-    # Close current week
-    current_week.closed = True
-    db.commit()
+    return True
+
+
+async def write_week_summary(db: AsyncSession, week: Week) -> WeekSummary:
+    """Snapshot a closing week's results into week_summaries (once per week).
     
-    # Create new week
-    if AUTO_CREATE_NEW_WEEK:
-        await create_new_week(db, app, group_chat_id)
+    Per-person completion counts and minutes (from estimated_duration_minutes)
+    come from one aggregate over the week's completed tasks; active people
+    who did nothing get a row with zero completions.
+    """
+    existing = await db.scalar(
+        select(WeekSummary).filter_by(week_id=week.id).options(selectinload(WeekSummary.people))
+    )
+    if existing:
+        return existing
+    
+    rows = (await db.execute(
+        select(
+            TaskInstance.completed_by,
+            func.count(TaskInstance.id),
+            func.coalesce(func.sum(TaskType.estimated_duration_minutes), 0)
+        )
+        .join(TaskType)
+        .filter(TaskInstance.week_id == week.id, TaskInstance.status == "completed")
+        .group_by(TaskInstance.completed_by)
+    )).all()
+    active_ids = (await db.scalars(select(Person.id).filter_by(active=True))).all()
+    
+    per_person = {person_id: (count, minutes) for person_id, count, minutes in rows if person_id is not None}
+    for person_id in active_ids:
+        per_person.setdefault(person_id, (0, 0))
+    
+    summary = WeekSummary(
+        week_id=week.id,
+        completed_count=sum(count for _, count, _ in rows),
+        total_tasks=sum([CATEGORY_AMOUNTS.get(cat, 1) for cat in CATEGORY_AMOUNTS.keys()]),
+        total_minutes=sum(minutes for _, _, minutes in rows),
+        people=[
+            WeekPersonSummary(person_id=person_id, completed_count=count, minutes=minutes)
+            for person_id, (count, minutes) in per_person.items()
+        ],
+    )
+    db.add(summary)
+    await db.flush()
+    return summary
 
 
-def generate_week_summary(db, week: Week) -> str:
+async def generate_week_summary(db: AsyncSession, week: Week) -> str:
     """Generate a summary message for the completed week.
     
+    Writes the week's snapshot (see write_week_summary) and renders it.
+    
     Returns a message with:
     - Week completion status
     - Contributors (sorted by contribution)
     - Non-contributors with gentle reminder
     """
-    # Get all task instances for the week
-    all_instances = db.query(TaskInstance).filter_by(week_id=week.id).all()
-    completed_tasks = [t for t in all_instances if t.status == "completed"]
+    summary = await write_week_summary(db, week)
+    total = summary.total_tasks
+    completed_count = summary.completed_count
+    remaining = max(total - completed_count, 0)
     
-    # Calculate total tasks
-    total = sum([CATEGORY_AMOUNTS.get(cat, 1) for cat in CATEGORY_AMOUNTS.keys()])
-    completed_count = len(completed_tasks)
-    remaining = total - completed_count
-    
-    # Get all active people
-    active_people = db.query(Person).filter_by(active=True).all()
+    # Names for everyone in the snapshot, in one query
+    person_ids = [entry.person_id for entry in summary.people]
+    names = dict((await db.execute(
+        select(Person.id, Person.name).filter(Person.id.in_(person_ids))
+    )).all())
     
     # Calculate contributions per person
     contributions = {}
-    for task in completed_tasks:
-        if task.completed_by:
-            person = db.query(Person).get(task.completed_by)
-            if person:
-                if person.name not in contributions:
-                    contributions[person.name] = 0
-                contributions[person.name] += 1
+    for entry in summary.people:
+        if entry.completed_count > 0:
+            name = names[entry.person_id]
+            contributions[name] = contributions.get(name, 0) + entry.completed_count
     
     # Sort by contribution (descending)
     sorted_contributors = sorted(contributions.items(), key=lambda x: x[1], reverse=True)
     
     # Find non-contributors
-    contributor_names = set(contributions.keys())
-    all_names = {p.name for p in active_people}
-    non_contributors = sorted(all_names - contributor_names)
+    non_contributors = sorted(
+        names[entry.person_id] for entry in summary.people if entry.completed_count == 0
+    )
     
     # Build message
     message = f"📅 *Week {week.week_number}/{week.year} Summary*\n\n"
@@ -142,6 +254,9 @@ def generate_week_summary(db, week: Week) -> str:
         message += f"📊 *Progress:* {completed_count}/{total} tasks ({progress_percent}%)\n"
         message += f"⚠️ {remaining} tasks were not completed.\n\n"
     
+    if summary.total_minutes:
+        message += f"⏱ About {summary.total_minutes} minutes of cleaning this week.\n\n"
+    
     # Thank contributors
     if sorted_contributors:
         message += "🌟 *Thank you to our contributors:*\n"
@@ -174,79 +289,193 @@ def generate_week_summary(db, week: Week) -> str:
     return message
 
 
-async def create_new_week(db, app: Application, group_chat_id: int):
-    """Create a new week with task instances.
+def task_instances_insert(week_id: int):
+    """INSERT ... SELECT creating a pending instance of every task type for a week.
     
-    This creates:
-    1. New Week entry
-    2. TaskInstances for all active TaskTypes
-    3. Announcement message to group
+    Runs as a single statement regardless of the number of task types.
     """
-    # Calculate week number and deadline
-    now = datetime.now()
-    year = now.year
-    week_number = now.isocalendar()[1]
+    return insert(TaskInstance).from_select(
+        ["week_id", "task_type_id", "status"],
+        select(
+            cast(literal(week_id), Integer),
+            TaskType.id,
+            cast(literal("pending"), String),
+        ),
+    )
+
+
+async def next_week_deadline(db: AsyncSession, after: datetime) -> datetime:
+    """The first deadline after `after` that starts a new week.
     
-    # Calculate next deadline
+    The deadline falls on DEADLINE_DAY; its ISO week identifies the week and
+    must come after the latest existing week (e.g. after an early close).
+    """
     # Find the next occurrence of DEADLINE_DAY
-    days_until_deadline = (NEW_WEEK_DEADLINE_DAY - now.weekday()) % 7
+    days_until_deadline = (NEW_WEEK_DEADLINE_DAY - after.weekday()) % 7
     if days_until_deadline == 0:
         # If today is the deadline day, set it for next week
         days_until_deadline = 7
     
-    deadline = now + timedelta(days=days_until_deadline)
+    deadline = after + timedelta(days=days_until_deadline)
     deadline = deadline.replace(
         hour=NEW_WEEK_DEADLINE_TIME[0],
         minute=NEW_WEEK_DEADLINE_TIME[1],
-        second=59
+        second=59,
+        microsecond=0
     )
     
-    # Create week
-    new_week = Week(
-        week_number=week_number,
-        year=year,
-        deadline=deadline,
-        closed=False
-    )
-    db.add(new_week)
-    db.flush()  # Get the ID
-    
-    # Create task instances for all task types
-    task_types = db.query(TaskType).all()
-    for task_type in task_types:
-        task_instance = TaskInstance(
-            task_type_id=task_type.id,
-            week_id=new_week.id,
-            status="pending"
+    latest = (await db.execute(
+        select(Week.year, Week.week_number)
+        .order_by(Week.year.desc(), Week.week_number.desc())
+        .limit(1)
+    )).first()
+    while latest and tuple(deadline.isocalendar()[:2]) <= tuple(latest):
+        deadline += timedelta(days=7)
+    
+    return deadline
+
+
+async def create_new_week(
+    db: AsyncSession,
+    after: Optional[datetime] = None,
+    closed: bool = False,
+) -> Optional[Week]:
+    """Create a new week with task instances (the caller commits).
+    
+    This creates:
+    1. New Week entry, unless one with the same year/week number exists
+    2. TaskInstances for all active TaskTypes
+    
+    Args:
+        after: The new deadline is the next one after this (default: now)
+        closed: Create the week already closed (for missed weeks)
+    
+    Returns:
+        The new week, or None if that week already existed
+    """
+    deadline = await next_week_deadline(db, after or datetime.now())
+    year, week_number, _ = deadline.isocalendar()
+    start_date = deadline.date() - timedelta(days=deadline.weekday())
+    
+    # Create week (INSERT ... ON CONFLICT DO NOTHING on uq_year_week)
+    connection = await db.connection()
+    insert_week = pg_insert if connection.dialect.name == "postgresql" else sqlite_insert
+    new_week_id = await db.scalar(
+        insert_week(Week)
+        .values(
+            year=year,
+            week_number=week_number,
+            start_date=start_date,
+            deadline=deadline,
+            closed=closed
         )
-        db.add(task_instance)
+        .on_conflict_do_nothing(index_elements=["year", "week_number"])
+        .returning(Week.id)
+    )
     
-    db.commit()
+    if new_week_id is None:
+        print(f"Week {week_number}/{year} already exists, not creating it again")
+        return None
     
-    # Send announcement to group
+    # Create task instances for all task types (one INSERT ... SELECT)
+    await db.execute(task_instances_insert(new_week_id))
+    
+    return await db.get(Week, new_week_id)
+
+
+async def record_missed_weeks(db: AsyncSession, last_deadline: datetime, now: datetime) -> List[Week]:
+    """Create closed weeks for every deadline between `last_deadline` and `now`.
+    
+    These are weeks the bot was down for: nothing was completed, but they
+    keep the weekly history (and stats) continuous.
+    """
+    missed_weeks = []
+    while (await next_week_deadline(db, last_deadline)) <= now:
+        week = await create_new_week(db, after=last_deadline, closed=True)
+        if week is None:
+            break
+        await write_week_summary(db, week)
+        missed_weeks.append(week)
+        last_deadline = week.deadline
+    
+    if missed_weeks:
+        print(f"Recorded {len(missed_weeks)} missed week(s)")
+    return missed_weeks
+
+
+def format_missed_weeks_notice(weeks: List[Week]) -> str:
+    """Group message listing weeks that passed while the bot was down."""
+    labels = ", ".join(f"{week.week_number}/{week.year}" for week in weeks)
+    return (
+        f"⏸️ *Missed weeks*\n\n"
+        f"The bot was offline over week{'s' if len(weeks) != 1 else ''} {labels}. "
+        f"They were recorded with no completed tasks."
+    )
+
+
+def format_new_week_announcement(week: Week) -> str:
+    """Announcement message for a newly started week."""
     total = sum([CATEGORY_AMOUNTS.get(cat, 1) for cat in CATEGORY_AMOUNTS.keys()])
-    announcement = (
+    return (
         f"🆕 *New Week Started!*\n\n"
-        f"📅 Week {week_number}/{year}\n"
-        f"⏰ Deadline: {deadline.strftime('%A, %B %d at %H:%M')}\n"
+        f"📅 Week {week.week_number}/{week.year}\n"
+        f"⏰ Deadline: {week.deadline.strftime('%A, %B %d at %H:%M')}\n"
         f"📋 Tasks to complete: {total}\n\n"
         f"Let's make this week great! ¡Hagámosle pues! 💪"
     )
+
+
+async def rebuild_week_counters(db: AsyncSession, week: Week) -> bool:
+    """Recompute a week's progress counters from its task instances.
     
-    try:
-        await app.bot.send_message(
-            chat_id=group_chat_id,
-            text=announcement,
-            parse_mode=ParseMode.MARKDOWN
-        )
-    except Exception as e:
-        print(f"Failed to send new week announcement: {e}")
+    The counters are normally maintained by the complete/amend handlers;
+    this repairs them if they ever drift (e.g. after manual DB edits).
+    
+    Returns:
+        True if the stored counters were wrong and have been fixed
+    """
+    rows = await db.execute(
+        select(TaskType.category, TaskInstance.completed_by, func.count(TaskInstance.id))
+        .join(TaskType)
+        .filter(TaskInstance.week_id == week.id, TaskInstance.status == "completed")
+        .group_by(TaskType.category, TaskInstance.completed_by)
+    )
+    
+    completed_count = 0
+    category_completed = {}
+    person_completed = {}
+    for category, person_id, count in rows:
+        category = category or "other"
+        completed_count += count
+        category_completed[category] = category_completed.get(category, 0) + count
+        if person_id is not None:
+            person_completed[str(person_id)] = person_completed.get(str(person_id), 0) + count
+    
+    changed = (
+        week.completed_count != completed_count
+        or (week.category_completed or {}) != category_completed
+        or (week.person_completed or {}) != person_completed
+    )
+    if changed:
+        week.completed_count = completed_count
+        week.category_completed = category_completed
+        week.person_completed = person_completed
+    
+    return changed
+
+
+async def rollover_job(group_chat_id: int):
+    """Scheduled entry point for the daily rollover check."""
+    await check_and_rollover_week(get_application(), group_chat_id)
 
 
 def setup_week_rollover(app: Application, group_chat_id: int):
     """Setup automatic week rollover job.
     
     This schedules a daily job that checks if the week needs to roll over.
+    The job is persisted (see src.job_store); a check missed while the bot
+    was down runs once at start-up, however late, since rollover is
+    idempotent.
     
     Args:
         app: The Telegram Application instance
@@ -254,15 +483,19 @@ def setup_week_rollover(app: Application, group_chat_id: int):
     """
     from datetime import time
     
-    job_queue = app.job_queue
-    
     # Schedule daily check at configured time
     check_time = time(hour=ROLLOVER_CHECK_TIME[0], minute=ROLLOVER_CHECK_TIME[1])
     
-    job_queue.run_daily(
-        callback=lambda context: check_and_rollover_week(app, group_chat_id),
-        time=check_time,
-        name="week_rollover_check"
+    schedule_job(
+        "week_rollover_check",
+        rollover_job,
+        CronTrigger(
+            hour=check_time.hour,
+            minute=check_time.minute,
+            timezone=app.job_queue.scheduler.timezone
+        ),
+        misfire_grace_time=None,
+        group_chat_id=group_chat_id
     )
     
     print(f"✅ Week rollover scheduled:")
@@ -279,14 +512,15 @@ async def force_week_rollover(app: Application, group_chat_id: int):
     Use this for testing or manual rollover.
     Can be called from a command like /closeweek
     """
-    with get_db() as db:
-        current_week = db.query(Week).filter_by(closed=False).order_by(Week.deadline.desc()).first()
-        
-        if not current_week:
-            return "❌ No active week to close."
-        
-        await perform_week_rollover(db, current_week, app, group_chat_id)
+    async with get_async_db() as db:
+        current_week = await load_current_week(db)
+    
+    if not current_week:
+        return "❌ No active week to close."
+    
+    if await rollover_week(app, group_chat_id, week_id=current_week.id):
         return "✅ Week rolled over manually!"
+    return "ℹ️ The week was already rolled over."
 
 
 # ========== USAGE EXAMPLE ==========
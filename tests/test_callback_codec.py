@@ -0,0 +1,175 @@
+"""Tests for the signed callback_data encoding and the week check on presses."""
+
+import base64
+import re
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from telegram.constants import InlineKeyboardButtonLimit
+
+import src.bot as bot_module
+import src.callback_codec as codec
+from src.bot import EXPIRED_BUTTON_TEXT, CorridorBot
+from src.callback_codec import MAC_BYTES, CallbackDataError, decode_callback, encode_callback
+from src.callback_router import router
+from src.menus import CATEGORY_AMOUNTS
+from src.models import Week
+
+from tests.conftest import FakeQuery
+
+# Largest id an Integer primary key can hold
+MAX_ID = 2**31 - 1
+
+LONGEST_CATEGORY = max(CATEGORY_AMOUNTS, key=len)
+
+
+def sample_data(route) -> str:
+    """Readable callback data for `route`, with the largest argument values."""
+    data = re.sub(r"\{\w+:int\}", str(MAX_ID), route.pattern)
+    return re.sub(r"\{\w+\}", LONGEST_CATEGORY, data)
+
+
+def raw(payload: str) -> bytes:
+    return base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+
+
+def encoded(body: bytes) -> str:
+    """Sign `body` with the real key, as encode_callback would."""
+    return base64.urlsafe_b64encode(body + codec._mac(body)).rstrip(b"=").decode()
+
+
+@pytest.mark.parametrize("pattern", sorted(router.routes))
+def test_every_route_round_trips_within_the_size_limit(pattern):
+    route = router.routes[pattern]
+    data = sample_data(route)
+
+    payload = encode_callback(data, week_id=MAX_ID)
+    press = decode_callback(payload)
+
+    assert len(payload) <= InlineKeyboardButtonLimit.MAX_CALLBACK_DATA
+    assert press.route is route
+    assert press.args == router.match(data)[1]
+    assert press.week_id == (MAX_ID if route.week_scoped else 0)
+
+
+def test_largest_task_id_fits_in_64_bytes():
+    payload = encode_callback(f"complete:task:{MAX_ID}", week_id=MAX_ID)
+
+    assert len(payload) <= 64
+    assert decode_callback(payload).args == {"task_instance_id": MAX_ID}
+
+
+def test_forged_mac_is_rejected():
+    body = raw(encode_callback("complete:task:1", week_id=1))
+    forged = body[:-1] + bytes([body[-1] ^ 0x01])
+
+    with pytest.raises(CallbackDataError, match="signature"):
+        decode_callback(base64.urlsafe_b64encode(forged).decode())
+
+
+def test_changed_argument_is_rejected():
+    body = raw(encode_callback("complete:task:1", week_id=1))
+    # The task id is the last byte before the MAC
+    tampered = body[:-MAC_BYTES - 1] + b"\x02" + body[-MAC_BYTES:]
+
+    with pytest.raises(CallbackDataError, match="signature"):
+        decode_callback(base64.urlsafe_b64encode(tampered).decode())
+
+
+@pytest.mark.parametrize("keep", [1, MAC_BYTES, MAC_BYTES + 2])
+def test_truncated_data_is_rejected(keep):
+    body = raw(encode_callback("complete:task:1", week_id=1))
+
+    with pytest.raises(CallbackDataError):
+        decode_callback(base64.urlsafe_b64encode(body[:keep]).decode())
+
+
+def test_truncated_varint_is_rejected():
+    # Correctly signed, but the route code's continuation bit runs off the end
+    payload = encoded(bytes([codec.CODEC_VERSION, 0x80]))
+
+    with pytest.raises(CallbackDataError, match="Truncated varint"):
+        decode_callback(payload)
+
+
+def test_trailing_bytes_are_rejected():
+    payload = encoded(raw(encode_callback("menu"))[:-MAC_BYTES] + b"\x00")
+
+    with pytest.raises(CallbackDataError, match="Trailing"):
+        decode_callback(payload)
+
+
+def test_buttons_from_an_older_codec_version_are_rejected(monkeypatch):
+    payload = encode_callback("complete:task:1", week_id=1)
+    monkeypatch.setattr(codec, "CODEC_VERSION", codec.CODEC_VERSION + 1)
+
+    with pytest.raises(CallbackDataError, match="version"):
+        decode_callback(payload)
+    # Buttons made after the bump work
+    assert decode_callback(encode_callback("complete:task:1", week_id=1)).args == {"task_instance_id": 1}
+
+
+def test_week_scoped_route_needs_a_week_id():
+    with pytest.raises(ValueError, match="week id"):
+        encode_callback("complete:task:1")
+
+
+# ---- Week check when a button is pressed ----
+
+
+@pytest.fixture
+def corridor_bot():
+    # Skip __init__: it connects the job store to the database
+    return CorridorBot.__new__(CorridorBot)
+
+
+@pytest.fixture
+def db_checks(monkeypatch):
+    """Week ids checked against the database by handle_callback."""
+    checked = []
+    is_open_week = bot_module.is_open_week
+
+    async def recording_is_open_week(db, week_id):
+        checked.append(week_id)
+        return await is_open_week(db, week_id)
+
+    monkeypatch.setattr(bot_module, "is_open_week", recording_is_open_week)
+    return checked
+
+
+async def press_button(corridor_bot, data, week_id) -> FakeQuery:
+    query = FakeQuery(data=encode_callback(data, week_id=week_id))
+    update = SimpleNamespace(callback_query=query, effective_chat=query.message.chat)
+    await corridor_bot.handle_callback(update, SimpleNamespace(user_data={}))
+    return query
+
+
+async def test_press_for_the_cached_week_skips_the_database_check(db, corridor_bot, db_checks):
+    query = await press_button(corridor_bot, "complete:category:kitchen", db.week_id)
+
+    assert db_checks == []
+    assert query.answers == [None]
+    assert "Kitchen" in query.edits[-1][0]
+
+
+async def test_press_for_another_week_is_checked_and_expires(db, corridor_bot, db_checks):
+    query = await press_button(corridor_bot, "complete:category:kitchen", db.week_id + 1)
+
+    assert db_checks == [db.week_id + 1]
+    assert query.answers == [EXPIRED_BUTTON_TEXT]
+    assert query.edits == []
+
+
+async def test_press_after_a_rollover_elsewhere_is_refused_by_the_handler(db, corridor_bot, db_checks):
+    await press_button(corridor_bot, "complete:category:kitchen", db.week_id)
+    with Session(db.sync_engine) as session:
+        session.execute(update(Week).filter_by(id=db.week_id).values(closed=True))
+        session.commit()
+
+    # The cached week still matches; the handler itself finds nothing open
+    query = await press_button(corridor_bot, "complete:task:1", db.week_id)
+
+    assert db_checks == []
+    assert query.edits[-1][0] == "❌ Task not found or already completed."
@@ -0,0 +1,136 @@
+"""Tests for matching, registration and dispatch in the callback router."""
+
+import pytest
+
+from src.callback_router import CallbackRouter
+
+
+async def noop(query):
+    pass
+
+
+@pytest.fixture
+def routes():
+    routes = CallbackRouter()
+    routes.add("menu", noop, code=1)
+    routes.add("complete:categories", noop, code=2, private=True)
+    routes.add("complete:category:{category}", noop, code=3, private=True, week_scoped=True)
+    routes.add("complete:task:{task_instance_id:int}", noop, code=4, private=True, week_scoped=True)
+    routes.add("whooptedout:task:{task_type_id:int}", noop, code=5)
+    return routes
+
+
+def matched_pattern(routes, data):
+    matched = routes.match(data)
+    return matched[0].pattern if matched else None
+
+
+def test_static_route(routes):
+    route, args = routes.match("menu")
+
+    assert route.pattern == "menu"
+    assert args == {}
+
+
+def test_literal_segment_takes_precedence_over_parameter(routes):
+    routes.add("complete:category:all", noop, code=6)
+
+    assert matched_pattern(routes, "complete:category:all") == "complete:category:all"
+    assert matched_pattern(routes, "complete:category:kitchen") == "complete:category:{category}"
+
+
+@pytest.mark.parametrize("data", [
+    "complete",
+    "complete:category",
+    "complete:task:1:extra",
+    "menu:extra",
+    "menuu",
+    "amend:task:1",
+    "",
+])
+def test_prefixes_and_unknown_paths_do_not_match(routes, data):
+    assert routes.match(data) is None
+
+
+def test_int_parameter_is_converted(routes):
+    route, args = routes.match("complete:task:42")
+
+    assert route.pattern == "complete:task:{task_instance_id:int}"
+    assert args == {"task_instance_id": 42}
+
+
+@pytest.mark.parametrize("value", ["abc", "1.5", "", "4x"])
+def test_bad_int_parameter_does_not_match(routes, value):
+    assert routes.match(f"complete:task:{value}") is None
+
+
+def test_str_parameter_is_kept_as_text(routes):
+    assert routes.match("complete:category:42")[1] == {"category": "42"}
+
+
+def test_private_and_week_scoped_flags(routes):
+    assert not routes.match("menu")[0].private
+    assert routes.match("complete:categories")[0].private
+    assert not routes.match("complete:categories")[0].week_scoped
+    assert routes.match("complete:task:1")[0].week_scoped
+    assert not routes.match("whooptedout:task:1")[0].week_scoped
+
+
+def test_title_is_the_first_segment(routes):
+    assert routes.match("whooptedout:task:1")[0].title == "Whooptedout"
+
+
+def test_duplicate_pattern_is_rejected(routes):
+    with pytest.raises(ValueError, match="conflicts"):
+        routes.add("menu", noop, code=7)
+
+
+def test_pattern_differing_only_in_parameter_name_is_rejected(routes):
+    with pytest.raises(ValueError, match="conflicts"):
+        routes.add("complete:task:{other_id:int}", noop, code=7)
+
+
+def test_duplicate_code_is_rejected(routes):
+    with pytest.raises(ValueError, match="already used"):
+        routes.add("help", noop, code=1)
+
+
+def test_replace_keeps_the_code_lookup_consistent(routes):
+    async def other(query):
+        pass
+
+    routes.add("menu", other, code=8, replace=True)
+
+    assert routes.by_code(1) is None
+    assert routes.by_code(8).handler is other
+    assert routes.match("menu")[0].handler is other
+
+
+def test_unknown_parameter_type_is_rejected(routes):
+    with pytest.raises(ValueError, match="Unknown parameter type"):
+        routes.add("map:{floor:float}", noop, code=9)
+
+
+def test_lookup_by_code(routes):
+    assert routes.by_code(4).pattern == "complete:task:{task_instance_id:int}"
+    assert routes.by_code(99) is None
+
+
+async def test_dispatch_passes_only_declared_extras():
+    routes = CallbackRouter()
+    calls = []
+
+    async def with_notify(query, task_instance_id, notify_group_func):
+        calls.append(("with_notify", task_instance_id, notify_group_func))
+
+    async def without_notify(query, category):
+        calls.append(("without_notify", category))
+
+    routes.add("complete:task:{task_instance_id:int}", with_notify, code=1)
+    routes.add("complete:category:{category}", without_notify, code=2)
+
+    for data in ["complete:task:3", "complete:category:kitchen"]:
+        route, args = routes.match(data)
+        await routes.dispatch("query", route, args, notify_group_func="notify", user_data={})
+
+    assert calls == [("with_notify", 3, "notify"), ("without_notify", "kitchen")]
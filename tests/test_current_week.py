@@ -0,0 +1,77 @@
+"""Tests for the current-week cache going stale after another replica's rollover."""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from src.current_week import (
+    current_week_cache_stats,
+    get_current_week,
+    get_current_week_row,
+    is_open_week,
+)
+from src.database import get_async_db
+from src.models import Week
+
+
+def roll_over_elsewhere(db) -> int:
+    """Close the seeded week and open the next, as another replica would; returns its id."""
+    with Session(db.sync_engine) as session:
+        session.execute(update(Week).filter_by(id=db.week_id).values(closed=True))
+        week = Week(
+            year=2099,
+            week_number=1,
+            start_date=date(2099, 1, 5),
+            deadline=datetime.now() + timedelta(days=10),
+            closed=False,
+        )
+        session.add(week)
+        session.commit()
+        return week.id
+
+
+async def test_row_lookup_drops_a_cached_week_that_was_closed(db):
+    async with get_async_db() as session:
+        assert (await get_current_week(session)).id == db.week_id
+    new_week_id = roll_over_elsewhere(db)
+
+    async with get_async_db() as session:
+        row = await get_current_week_row(session)
+
+        assert row.id == new_week_id
+        assert not row.closed
+        # The cache now holds the new week
+        assert (await get_current_week(session)).id == new_week_id
+
+
+async def test_failed_open_check_drops_the_cached_week(db):
+    async with get_async_db() as session:
+        await get_current_week(session)
+    new_week_id = roll_over_elsewhere(db)
+    invalidations = current_week_cache_stats()["invalidations"]
+
+    async with get_async_db() as session:
+        assert not await is_open_week(session, db.week_id)
+        assert current_week_cache_stats()["invalidations"] == invalidations + 1
+        assert (await get_current_week(session)).id == new_week_id
+
+
+async def test_open_check_of_another_week_keeps_the_cache(db):
+    async with get_async_db() as session:
+        await get_current_week(session)
+        invalidations = current_week_cache_stats()["invalidations"]
+
+        assert await is_open_week(session, db.week_id)
+        assert not await is_open_week(session, db.week_id + 1)
+        assert current_week_cache_stats()["invalidations"] == invalidations
+
+
+async def test_open_check_of_a_newer_week_drops_the_cache(db):
+    async with get_async_db() as session:
+        await get_current_week(session)
+    new_week_id = roll_over_elsewhere(db)
+
+    async with get_async_db() as session:
+        assert await is_open_week(session, new_week_id)
+        assert (await get_current_week(session)).id == new_week_id
@@ -0,0 +1,125 @@
+"""Tests for the cached telegram_id → person lookup."""
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+import src.identity_cache as identity_cache
+from src.database import get_async_db
+from src.identity_cache import get_person, person_cache_stats, remember_person
+from src.models import Person
+
+from tests.conftest import FIRST_TELEGRAM_ID, PEOPLE
+
+TELEGRAM_ID = FIRST_TELEGRAM_ID + 1
+UNKNOWN_TELEGRAM_ID = FIRST_TELEGRAM_ID + PEOPLE
+
+
+async def lookup(telegram_id):
+    async with get_async_db() as db:
+        return await get_person(db, telegram_id)
+
+
+def load_person(db, telegram_id) -> Person:
+    with Session(db.sync_engine, expire_on_commit=False) as session:
+        return session.scalar(select(Person).filter_by(telegram_id=telegram_id))
+
+
+def change_person(db, current_telegram_id, **values):
+    """Change a person through the ORM, as the bot and admin scripts do."""
+    with Session(db.sync_engine) as session:
+        person = session.scalar(select(Person).filter_by(telegram_id=current_telegram_id))
+        for name, value in values.items():
+            setattr(person, name, value)
+        session.commit()
+
+
+async def test_remembered_person_is_a_hit(db, statements):
+    remember_person(load_person(db, TELEGRAM_ID))
+    hits = person_cache_stats()["hits"]
+
+    statements.clear()
+    person = await lookup(TELEGRAM_ID)
+
+    assert person.name == "Person 1"
+    assert statements == []
+    assert person_cache_stats()["hits"] == hits + 1
+
+
+async def test_miss_loads_and_caches(db, statements):
+    misses = person_cache_stats()["misses"]
+
+    first = await lookup(TELEGRAM_ID)
+    statements.clear()
+    second = await lookup(TELEGRAM_ID)
+
+    assert first == second
+    assert statements == []
+    assert person_cache_stats()["misses"] == misses + 1
+
+
+async def test_unregistered_user_is_not_cached(db):
+    assert await lookup(UNKNOWN_TELEGRAM_ID) is None
+    assert UNKNOWN_TELEGRAM_ID not in identity_cache._cache
+
+
+async def test_least_recently_used_is_evicted_at_the_size_bound(db, monkeypatch):
+    monkeypatch.setattr(identity_cache, "CACHE_MAX_SIZE", 2)
+    evictions = person_cache_stats()["evictions"]
+    telegram_ids = [FIRST_TELEGRAM_ID + i for i in range(3)]
+
+    await lookup(telegram_ids[0])
+    await lookup(telegram_ids[1])
+    await lookup(telegram_ids[0])  # now the most recently used
+    await lookup(telegram_ids[2])
+
+    assert list(identity_cache._cache) == [telegram_ids[0], telegram_ids[2]]
+    assert person_cache_stats()["evictions"] == evictions + 1
+    assert person_cache_stats()["size"] == 2
+
+
+async def test_rename_invalidates(db):
+    await lookup(TELEGRAM_ID)
+
+    change_person(db, TELEGRAM_ID, name="Renamed")
+
+    assert (await lookup(TELEGRAM_ID)).name == "Renamed"
+
+
+async def test_deactivation_invalidates(db):
+    await lookup(TELEGRAM_ID)
+
+    change_person(db, TELEGRAM_ID, active=False)
+
+    assert not (await lookup(TELEGRAM_ID)).active
+
+
+async def test_new_telegram_id_invalidates_the_old_one(db):
+    await lookup(TELEGRAM_ID)
+
+    change_person(db, TELEGRAM_ID, telegram_id=UNKNOWN_TELEGRAM_ID)
+
+    assert await lookup(TELEGRAM_ID) is None
+    assert (await lookup(UNKNOWN_TELEGRAM_ID)).name == "Person 1"
+
+
+async def test_delete_invalidates(db):
+    await lookup(TELEGRAM_ID)
+
+    with Session(db.sync_engine) as session:
+        session.delete(session.scalar(select(Person).filter_by(telegram_id=TELEGRAM_ID)))
+        session.commit()
+
+    assert await lookup(TELEGRAM_ID) is None
+
+
+async def test_changes_outside_the_orm_show_after_the_ttl(db, monkeypatch):
+    await lookup(TELEGRAM_ID)
+    with Session(db.sync_engine) as session:
+        session.execute(update(Person).filter_by(telegram_id=TELEGRAM_ID).values(name="Renamed"))
+        session.commit()
+
+    # A bulk UPDATE fires no ORM events, so the cached name is still served
+    assert (await lookup(TELEGRAM_ID)).name == "Person 1"
+
+    monkeypatch.setattr(identity_cache, "CACHE_TTL_SECONDS", 0)
+    assert (await lookup(TELEGRAM_ID)).name == "Renamed"
@@ -0,0 +1,204 @@
+"""Tests for the persistent job store and scheduler leadership."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import apscheduler.executors.base
+import apscheduler.executors.base_py3
+import apscheduler.schedulers.base
+import pytest
+from apscheduler.triggers.cron import CronTrigger
+from telegram.ext import Application
+
+import src.job_store as job_store
+from src.job_store import JOBSTORE_ALIAS, prune_stale_jobs, schedule_job, setup_job_store
+
+
+# Simulated start of the clock: a Monday, an hour before the 09:00 reminder
+START = datetime(2026, 1, 5, 8, 0, tzinfo=timezone.utc)
+REMINDER_TIME = timedelta(hours=1)
+GRACE_SECONDS = 3600
+# Long enough that every run missed during the downtime is still within it
+LONG_GRACE_SECONDS = 7 * 24 * 3600
+
+# Simulated times at which counted_job ran
+runs = []
+
+
+def reminder_job():
+    """Stands in for a real job function (stored by reference)."""
+
+
+async def counted_job():
+    runs.append(apscheduler.schedulers.base.datetime.now(timezone.utc))
+
+
+@pytest.fixture
+def jobs_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'jobs.db'}"
+
+
+def build_app() -> Application:
+    return Application.builder().token("123:test").build()
+
+
+def persistent_job_ids(app: Application):
+    return sorted(job.id for job in app.job_queue.scheduler.get_jobs(jobstore=JOBSTORE_ALIAS))
+
+
+def stored_job_ids():
+    return sorted(job.id for job in job_store._store.get_all_jobs())
+
+
+async def test_leader_stores_jobs_and_prunes_stale_ones(jobs_url):
+    app = build_app()
+    setup_job_store(app, url=jobs_url)
+    assert job_store.is_scheduler_leader()
+    schedule_job("reminder_a", reminder_job, CronTrigger(hour=9), misfire_grace_time=60)
+    schedule_job("reminder_b", reminder_job, CronTrigger(hour=18), misfire_grace_time=60)
+    await app.job_queue.start()
+    assert stored_job_ids() == ["reminder_a", "reminder_b"]
+    await app.job_queue.stop()
+
+    # Restart with one reminder dropped from the configuration
+    app = build_app()
+    setup_job_store(app, url=jobs_url)
+    schedule_job("reminder_a", reminder_job, CronTrigger(hour=9), misfire_grace_time=60)
+    prune_stale_jobs()
+
+    assert stored_job_ids() == ["reminder_a"]
+
+
+async def test_follower_schedules_nothing_until_it_takes_over(jobs_url, monkeypatch):
+    lock_free = False
+    monkeypatch.setattr(job_store, "_acquire_leadership", lambda: lock_free)
+
+    app = build_app()
+    setup_job_store(app, url=jobs_url)
+    schedule_job("reminder_a", reminder_job, CronTrigger(hour=9), misfire_grace_time=60)
+    prune_stale_jobs()
+
+    assert not job_store.is_scheduler_leader()
+    assert JOBSTORE_ALIAS not in app.job_queue.scheduler._jobstores
+
+    # The leader is still there
+    await job_store._check_leadership(None)
+    assert not job_store.is_scheduler_leader()
+
+    # The leader went away
+    lock_free = True
+    await job_store._check_leadership(None)
+
+    assert job_store.is_scheduler_leader()
+    assert persistent_job_ids(app) == ["reminder_a"]
+
+
+async def test_leader_steps_down_when_its_lock_connection_is_lost(jobs_url, monkeypatch):
+    app = build_app()
+    setup_job_store(app, url=jobs_url)
+    schedule_job("reminder_a", reminder_job, CronTrigger(hour=9), misfire_grace_time=60)
+
+    monkeypatch.setattr(job_store, "_leadership_alive", lambda: False)
+    await job_store._check_leadership(None)
+
+    assert not job_store.is_scheduler_leader()
+    assert JOBSTORE_ALIAS not in app.job_queue.scheduler._jobstores
+
+
+# ---- Simulated clock: runs missed while the bot was down ----
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Sets the time APScheduler sees (scheduling and misfire checks); advance `clock.now`."""
+    clock = SimpleNamespace(now=START)
+
+    class SimulatedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock.now.astimezone(tz)
+
+    for module in (apscheduler.schedulers.base, apscheduler.executors.base, apscheduler.executors.base_py3):
+        monkeypatch.setattr(module, "datetime", SimulatedDatetime)
+    runs.clear()
+    return clock
+
+
+async def run_bot(jobs_url, trigger, grace_seconds=GRACE_SECONDS):
+    """Start a bot with the reminder scheduled (as on start-up) and let due jobs fire."""
+    app = build_app()
+    setup_job_store(app, url=jobs_url)
+    schedule_job("reminder", counted_job, trigger, misfire_grace_time=grace_seconds)
+    await app.job_queue.start()
+    await asyncio.sleep(0.05)
+    return app
+
+
+async def restart_scheduler(jobs_url, trigger):
+    """Start a bot whose scheduler runs before the reminder is scheduled again."""
+    app = build_app()
+    setup_job_store(app, url=jobs_url)
+    await app.job_queue.start()
+    schedule_job("reminder", counted_job, trigger, misfire_grace_time=GRACE_SECONDS)
+    return app
+
+
+def stored_next_run_time():
+    return job_store._store.lookup_job("reminder").next_run_time
+
+
+async def first_run(jobs_url):
+    """The bot runs once before the first reminder, which stores its next run time."""
+    app = await run_bot(jobs_url, CronTrigger(hour=9, timezone=timezone.utc))
+    assert stored_next_run_time() == START + REMINDER_TIME
+    await app.job_queue.stop()
+
+
+@pytest.mark.parametrize("grace_seconds", [GRACE_SECONDS, LONG_GRACE_SECONDS])
+@pytest.mark.parametrize("days_down", [0, 1, 3])
+async def test_missed_run_within_grace_time_fires_once(jobs_url, clock, days_down, grace_seconds):
+    await first_run(jobs_url)
+
+    # Back up 30 minutes after a reminder, `days_down` reminders later
+    clock.now = START + REMINDER_TIME + timedelta(days=days_down, minutes=30)
+    app = await run_bot(jobs_url, CronTrigger(hour=9, timezone=timezone.utc), grace_seconds)
+    await app.job_queue.stop()
+
+    # Missed runs are coalesced into one
+    assert runs == [clock.now]
+    assert stored_next_run_time() == START + REMINDER_TIME + timedelta(days=days_down + 1)
+
+
+async def test_missed_run_beyond_grace_time_is_skipped(jobs_url, clock):
+    await first_run(jobs_url)
+
+    clock.now = START + REMINDER_TIME + timedelta(days=2, seconds=GRACE_SECONDS + 60)
+    app = await run_bot(jobs_url, CronTrigger(hour=9, timezone=timezone.utc))
+    await app.job_queue.stop()
+
+    assert runs == []
+    assert stored_next_run_time() == START + REMINDER_TIME + timedelta(days=3)
+
+
+async def test_unchanged_trigger_keeps_stored_next_run_time(jobs_url, clock):
+    await first_run(jobs_url)
+    clock.now = START + timedelta(days=2, hours=4)
+
+    app = await restart_scheduler(jobs_url, CronTrigger(hour=9, timezone=timezone.utc))
+
+    # Still the missed run, not tomorrow's
+    assert stored_next_run_time() == START + REMINDER_TIME
+    await app.job_queue.stop()
+
+
+async def test_changed_trigger_reschedules(jobs_url, clock):
+    await first_run(jobs_url)
+    clock.now = START + timedelta(days=2, hours=4)
+
+    app = await restart_scheduler(jobs_url, CronTrigger(hour=18, timezone=timezone.utc))
+
+    assert stored_next_run_time() == datetime(2026, 1, 7, 18, 0, tzinfo=timezone.utc)
+    await asyncio.sleep(0.05)
+    await app.job_queue.stop()
+    assert runs == []
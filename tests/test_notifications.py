@@ -0,0 +1,122 @@
+"""Tests for coalescing group notifications into digests."""
+
+import asyncio
+
+from telegram.constants import MessageLimit
+
+from src.notifications import NotificationCoalescer
+
+
+class Recorder:
+    """A send function that records what it sends; `fail` raises on those texts."""
+
+    def __init__(self, fail=()):
+        self.sent = []
+        self.fail = set(fail)
+
+    async def __call__(self, text):
+        if text in self.fail:
+            raise RuntimeError("send failed")
+        self.sent.append(text)
+
+
+async def test_zero_window_sends_right_away():
+    send = Recorder()
+    coalescer = NotificationCoalescer(send, window_seconds=0)
+
+    await coalescer.add("✅ Kitchen 1 done")
+
+    assert send.sent == ["✅ Kitchen 1 done"]
+
+
+async def test_messages_in_one_window_become_one_digest():
+    send = Recorder()
+    coalescer = NotificationCoalescer(send, window_seconds=0.05)
+
+    for i in range(3):
+        await coalescer.add(f"message {i}")
+    assert send.sent == []
+    await asyncio.sleep(0.1)
+
+    [digest] = send.sent
+    assert digest.startswith("📣 *Corridor updates (3)*")
+    assert digest.index("message 0") < digest.index("message 1") < digest.index("message 2")
+
+
+async def test_single_message_is_sent_unchanged():
+    send = Recorder()
+    coalescer = NotificationCoalescer(send, window_seconds=60)
+
+    await coalescer.add("only one")
+    await coalescer.close()
+
+    assert send.sent == ["only one"]
+
+
+async def test_long_digest_is_split_at_the_message_limit():
+    send = Recorder()
+    coalescer = NotificationCoalescer(send, window_seconds=60)
+    messages = [f"{i:02d} " + "x" * 997 for i in range(10)]
+
+    for message in messages:
+        await coalescer.add(message)
+    await coalescer.close()
+
+    assert len(send.sent) > 1
+    assert all(len(text) <= MessageLimit.MAX_TEXT_LENGTH for text in send.sent)
+    # Nothing lost, nothing split mid-message, order kept
+    parts = [part for text in send.sent for part in text.split("\n\n")]
+    assert [part for part in parts if not part.startswith("📣")] == messages
+
+
+async def test_digest_exactly_at_the_limit_is_not_split():
+    send = Recorder()
+    coalescer = NotificationCoalescer(send, window_seconds=60)
+    header = "📣 *Corridor updates (2)*\n\n"
+    first = "a" * 100
+    second = "b" * (MessageLimit.MAX_TEXT_LENGTH - len(header) - len(first) - 2)
+
+    await coalescer.add(first)
+    await coalescer.add(second)
+    await coalescer.close()
+
+    assert send.sent == [f"{header}{first}\n\n{second}"]
+    assert len(send.sent[0]) == MessageLimit.MAX_TEXT_LENGTH
+
+
+async def test_close_flushes_pending_messages_without_waiting():
+    send = Recorder()
+    coalescer = NotificationCoalescer(send, window_seconds=60)
+    await coalescer.add("first")
+    await coalescer.add("second")
+
+    await asyncio.wait_for(coalescer.close(), timeout=1)
+
+    [digest] = send.sent
+    assert "first" in digest and "second" in digest
+    # The window's timer is gone, so nothing is sent twice
+    await asyncio.sleep(0.05)
+    assert len(send.sent) == 1
+
+
+async def test_close_with_nothing_pending_sends_nothing():
+    send = Recorder()
+    coalescer = NotificationCoalescer(send, window_seconds=60)
+
+    await coalescer.close()
+
+    assert send.sent == []
+
+
+async def test_failed_digest_does_not_stop_the_rest():
+    # Too long to share a digest, so each is sent on its own
+    messages = [f"{i:02d} " + "x" * 2997 for i in range(3)]
+    header = "📣 *Corridor updates (3)*\n\n"
+    send = Recorder(fail={f"{header}{messages[0]}"})
+    coalescer = NotificationCoalescer(send, window_seconds=60)
+
+    for message in messages:
+        await coalescer.add(message)
+    await coalescer.close()
+
+    assert send.sent == messages[1:]
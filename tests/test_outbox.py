@@ -0,0 +1,119 @@
+"""Tests for claiming and per-chat ordering in the outbox."""
+
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from telegram.error import BadRequest, NetworkError
+
+import src.outbox as outbox_module
+from src.models import OutboundMessage
+from src.outbox import Outbox
+
+GROUP_CHAT = -100
+OTHER_CHAT = 42
+
+
+class FakeBot:
+    """Records sent messages; `failures` maps a text to errors to raise first."""
+
+    def __init__(self, failures=None):
+        self.sent = []
+        self.failures = {text: list(errors) for text, errors in (failures or {}).items()}
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        await asyncio.sleep(0)
+        errors = self.failures.get(text)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append((chat_id, text))
+
+
+def add_pending(db, messages):
+    with Session(db.sync_engine) as session:
+        session.add_all(
+            OutboundMessage(chat_id=chat_id, text=text, status="pending", attempts=0)
+            for chat_id, text in messages
+        )
+        session.commit()
+
+
+def rows(db):
+    with Session(db.sync_engine) as session:
+        return session.scalars(select(OutboundMessage).order_by(OutboundMessage.id)).all()
+
+
+async def drain(*outboxes, timeout=2):
+    async def wait():
+        while any(outbox.pending_count() for outbox in outboxes):
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(wait(), timeout)
+
+
+async def test_replicas_starting_together_send_each_message_once(db):
+    add_pending(db, [(GROUP_CHAT, f"message {i}") for i in range(20)])
+    bots = [FakeBot(), FakeBot()]
+    outboxes = [Outbox(bot) for bot in bots]
+
+    await asyncio.gather(*(outbox.start() for outbox in outboxes))
+    await drain(*outboxes)
+    for outbox in outboxes:
+        await outbox.stop()
+
+    sent = sorted(text for bot in bots for _, text in bot.sent)
+    assert sent == sorted(f"message {i}" for i in range(20))
+    assert rows(db) == []
+
+
+async def test_retry_keeps_chat_order_without_blocking_other_chats(db, monkeypatch):
+    monkeypatch.setattr(outbox_module, "RETRY_BACKOFF_SECONDS", 0.05)
+    bot = FakeBot(failures={"first": [NetworkError("timeout")]})
+    outbox = Outbox(bot)
+    await outbox.start()
+
+    for text in ["first", "second", "third"]:
+        await outbox.send(GROUP_CHAT, text)
+    await outbox.send(OTHER_CHAT, "elsewhere")
+    await drain(outbox)
+    await outbox.stop()
+
+    assert [text for chat, text in bot.sent if chat == GROUP_CHAT] == ["first", "second", "third"]
+    # The other chat went out while the group chat waited for its retry
+    assert bot.sent[0] == (OTHER_CHAT, "elsewhere")
+    assert rows(db) == []
+
+
+async def test_permanent_failure_is_kept_and_does_not_block_chat(db):
+    bot = FakeBot(failures={"bad": [BadRequest("can't parse entities")]})
+    outbox = Outbox(bot)
+    await outbox.start()
+
+    await outbox.send(GROUP_CHAT, "bad")
+    await outbox.send(GROUP_CHAT, "good")
+    await drain(outbox)
+    await outbox.stop()
+
+    assert bot.sent == [(GROUP_CHAT, "good")]
+    [failed] = rows(db)
+    assert (failed.text, failed.status, failed.attempts) == ("bad", "failed", 1)
+
+
+async def test_stop_releases_undelivered_messages(db, monkeypatch):
+    monkeypatch.setattr(outbox_module, "RETRY_BACKOFF_SECONDS", 60)
+    outbox = Outbox(FakeBot(failures={"stuck": [NetworkError("timeout")]}))
+    await outbox.start()
+
+    await outbox.send(GROUP_CHAT, "stuck")
+    await outbox.send(GROUP_CHAT, "behind")
+    await asyncio.sleep(0.05)
+    await outbox.stop()
+
+    assert [(row.text, row.status) for row in rows(db)] == [("stuck", "pending"), ("behind", "pending")]
+
+    # The next run claims and sends them, in order
+    bot = FakeBot()
+    outbox = Outbox(bot)
+    await outbox.start()
+    await drain(outbox)
+    await outbox.stop()
+    assert bot.sent == [(GROUP_CHAT, "stuck"), (GROUP_CHAT, "behind")]
@@ -0,0 +1,129 @@
+"""Query-count regression tests for the menu and status paths.
+
+Each path must issue a fixed number of SQL statements, whatever the
+number of tasks, completions or opt-outs (no N+1 lazy loads).
+"""
+
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.database import get_async_db
+from src.handlers.info_handlers import cmd_status, show_status_callback
+from src.handlers.optout_handlers import (
+    cmd_optout,
+    cmd_who_opted_out,
+    format_task_opt_outs,
+    show_task_opt_outs_callback,
+    show_whooptedout_callback,
+)
+from src.handlers.task_handlers import complete_task_by_id
+from src.menus import create_category_menu, create_task_menu
+from src.models import TaskInstance, TaskType
+
+from tests.conftest import FIRST_TELEGRAM_ID, PEOPLE, FakeQuery, fake_update, reset_caches
+
+# Statements on a cold cache (the week paths include the current-week lookup,
+# format_task_opt_outs the test's own task lookup)
+MAX_STATEMENTS = {
+    "cmd_status": 5,
+    "show_status_callback": 2,
+    "category_menu": 2,
+    "task_menu": 2,
+    "cmd_who_opted_out": 1,
+    "cmd_who_opted_out_task": 3,
+    "show_whooptedout_callback": 1,
+    "show_task_opt_outs_callback": 2,
+    "format_task_opt_outs": 2,
+}
+
+# The seeded task everyone opts out of first (see add_activity), and its id
+OPTED_OUT_TASK = "Toilet 1"
+OPTED_OUT_TASK_ID = 1
+
+
+async def notify_group(message):
+    pass
+
+
+async def add_activity(db, completions: int, opt_outs: int):
+    """Complete `completions` pending tasks and add opt-outs, through the handlers."""
+    with Session(db.sync_engine) as session:
+        pending = session.scalars(
+            select(TaskInstance.id).filter_by(week_id=db.week_id, status="pending").order_by(TaskInstance.id)
+        ).all()
+        task_names = session.scalars(select(TaskType.name).order_by(TaskType.id)).all()
+
+    # Person 0 opted out of a task in the seed; the others complete round-robin
+    for i, task_instance_id in enumerate(pending[:completions]):
+        query = FakeQuery(telegram_id=FIRST_TELEGRAM_ID + 1 + i % (PEOPLE - 1))
+        await complete_task_by_id(query, task_instance_id=task_instance_id, notify_group_func=notify_group)
+        assert "Great job" in query.edits[-1][0]
+
+    # Several people per task, starting with the first tasks
+    added = 0
+    for name in task_names:
+        for person in range(PEOPLE):
+            if added == opt_outs:
+                return
+            update = fake_update(telegram_id=FIRST_TELEGRAM_ID + person)
+            context = SimpleNamespace(args=[*name.split(), "test"], user_data={})
+            await cmd_optout(update, context, lambda update: True, None, notify_group)
+            added += "successful" in update.message.replies[-1][0]
+
+
+async def count_statements(statements, path):
+    """Run `path` on cold caches and return the number of statements it issued."""
+    reset_caches()
+    statements.clear()
+    await path()
+    return len(statements)
+
+
+async def format_opted_out_task():
+    async with get_async_db() as db:
+        task_type = await db.scalar(select(TaskType).filter_by(name=OPTED_OUT_TASK))
+        await format_task_opt_outs(db, task_type)
+
+
+PATHS = {
+    "cmd_status": lambda: cmd_status(fake_update(), SimpleNamespace(args=[])),
+    "show_status_callback": lambda: show_status_callback(FakeQuery()),
+    "category_menu": lambda: create_category_menu("complete"),
+    "task_menu": lambda: create_task_menu("kitchen", "ask"),
+    "cmd_who_opted_out": lambda: cmd_who_opted_out(fake_update(), SimpleNamespace(args=[])),
+    "cmd_who_opted_out_task": lambda: cmd_who_opted_out(
+        fake_update(), SimpleNamespace(args=OPTED_OUT_TASK.split())
+    ),
+    "show_whooptedout_callback": lambda: show_whooptedout_callback(FakeQuery()),
+    "show_task_opt_outs_callback": lambda: show_task_opt_outs_callback(FakeQuery(), task_type_id=OPTED_OUT_TASK_ID),
+    "format_task_opt_outs": format_opted_out_task,
+}
+
+
+async def test_paths_issue_bounded_statements(db, statements):
+    await add_activity(db, completions=4, opt_outs=6)
+
+    for name, path in PATHS.items():
+        count = await count_statements(statements, path)
+        assert count <= MAX_STATEMENTS[name], (name, statements)
+
+
+async def test_statement_count_does_not_grow_with_activity(db, statements):
+    before = {name: await count_statements(statements, path) for name, path in PATHS.items()}
+
+    await add_activity(db, completions=8, opt_outs=20)
+
+    after = {name: await count_statements(statements, path) for name, path in PATHS.items()}
+    assert after == before
+
+
+async def test_cached_menus_issue_no_statements(db, statements):
+    await create_category_menu("complete")
+    await create_task_menu("kitchen", "complete")
+
+    statements.clear()
+    await create_category_menu("complete")
+    await create_task_menu("kitchen", "complete")
+    assert statements == []
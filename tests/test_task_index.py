@@ -0,0 +1,98 @@
+"""Tests for the task-name index and splitting /optout arguments."""
+
+import pytest
+
+from src.handlers.optout_handlers import split_task_and_reason
+from src.task_index import TaskEntry, TaskNameIndex, tokenize
+
+from tests.conftest import CATEGORIES, TASKS_PER_CATEGORY
+
+
+@pytest.fixture
+def index():
+    """The seeded task names: "Toilet 1" ... "Fridge 3"."""
+    names = [f"{category.title()} {i}" for category in CATEGORIES for i in range(1, TASKS_PER_CATEGORY + 1)]
+    return TaskNameIndex(TaskEntry(id, name, name.split()[0].lower()) for id, name in enumerate(names, 1))
+
+
+def best_name(lookup):
+    return lookup.best.name if lookup.best else None
+
+
+def candidate_names(lookup):
+    return [task.name for task in lookup.candidates]
+
+
+def test_tokenize_normalizes_case_accents_and_digits():
+    assert tokenize("  Kítchen-2 ") == ["kitchen", "2"]
+    assert tokenize("Toilet1") == ["toilet", "1"]
+
+
+def test_exact_name(index):
+    lookup = index.lookup("Kitchen 2")
+
+    assert best_name(lookup) == "Kitchen 2"
+    assert candidate_names(lookup) == ["Kitchen 2"]
+
+
+@pytest.mark.parametrize("query", ["kitchen 2", "KITCHEN   2", "  kitchen2 ", "Kitchen-2", "kítchen 2"])
+def test_case_and_spacing_do_not_matter(index, query):
+    assert best_name(index.lookup(query)) == "Kitchen 2"
+
+
+@pytest.mark.parametrize("query", ["kitchn 2", "kicthen 2", "kit 2"])
+def test_typos_and_prefixes_of_a_full_name(index, query):
+    assert best_name(index.lookup(query)) == "Kitchen 2"
+
+
+@pytest.mark.parametrize("query, names", [
+    ("Kit", ["Kitchen 1", "Kitchen 2", "Kitchen 3"]),
+    ("shower", ["Shower 1", "Shower 2", "Shower 3"]),
+    ("f", ["Fridge 1", "Fridge 2", "Fridge 3"]),
+])
+def test_ambiguous_prefix_offers_candidates(index, query, names):
+    lookup = index.lookup(query)
+
+    assert lookup.best is None
+    assert candidate_names(lookup) == names
+
+
+def test_numbers_must_match_exactly(index):
+    assert index.lookup("Kitchen 4").candidates == []
+    assert index.lookup("garage").candidates == []
+
+
+@pytest.mark.parametrize("args, task, reason", [
+    ("Fridge 1 I have my own fridge", "Fridge 1", "I have my own fridge"),
+    ("Shower 2 shower at gym", "Shower 2", "shower at gym"),
+    ("shower 2 2 days a week", "Shower 2", "2 days a week"),
+    ("toilet2 broken", "Toilet 2", "broken"),
+    ("Kitchn 3 allergic to kitchen smells", "Kitchen 3", "allergic to kitchen smells"),
+])
+def test_multi_word_name_followed_by_reason(index, args, task, reason):
+    lookup, split_reason = split_task_and_reason(index, args.split())
+
+    assert best_name(lookup) == task
+    assert split_reason == reason
+
+
+def test_ambiguous_name_keeps_the_reason(index):
+    lookup, reason = split_task_and_reason(index, "Kitchen too far".split())
+
+    assert lookup.best is None
+    assert candidate_names(lookup) == ["Kitchen 1", "Kitchen 2", "Kitchen 3"]
+    assert reason == "too far"
+
+
+def test_unknown_task(index):
+    lookup, reason = split_task_and_reason(index, "Garage no car".split())
+
+    assert lookup.candidates == []
+    assert reason == "no car"
+
+
+def test_one_word_is_always_left_for_the_reason(index):
+    lookup, reason = split_task_and_reason(index, ["Fridge", "1"])
+
+    assert candidate_names(lookup) == ["Fridge 1", "Fridge 2", "Fridge 3"]
+    assert reason == "1"
@@ -0,0 +1,212 @@
+"""Concurrency tests for completing and amending tasks."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+import src.week_manager as week_manager
+from src.current_week import load_current_week
+from src.database import get_async_db
+from src.handlers.task_handlers import (
+    _record_completion,
+    _transition_task,
+    amend_task_by_id,
+    complete_task_by_id,
+)
+from src.models import CompletionLog, TaskInstance, TaskType, Week, WeekSummary
+from src.week_manager import rollover_week
+
+from tests.conftest import FIRST_TELEGRAM_ID, PEOPLE, FakeQuery
+
+# Concurrent presses in the Postgres stress test
+STRESS_PRESSES = 200
+
+# How long a blocked transaction is given to show it is waiting
+BLOCKED_SECONDS = 0.3
+
+
+async def notify_group(message):
+    pass
+
+
+def task_instance_ids(db, category=None):
+    with Session(db.sync_engine) as session:
+        query = select(TaskInstance.id).join(TaskType).filter(TaskInstance.week_id == db.week_id)
+        if category:
+            query = query.filter(TaskType.category == category)
+        return session.scalars(query.order_by(TaskInstance.id)).all()
+
+
+def load_week(db) -> Week:
+    with Session(db.sync_engine, expire_on_commit=False) as session:
+        return session.get(Week, db.week_id)
+
+
+async def press(handler, telegram_id, task_instance_id) -> FakeQuery:
+    query = FakeQuery(telegram_id=telegram_id)
+    await handler(query, task_instance_id=task_instance_id, notify_group_func=notify_group)
+    return query
+
+
+def won(query: FakeQuery) -> bool:
+    return "Great job" in query.edits[-1][0]
+
+
+async def test_concurrent_completions_have_one_winner(db):
+    task_id = task_instance_ids(db, "kitchen")[0]
+    telegram_ids = [FIRST_TELEGRAM_ID + i for i in range(1, PEOPLE)]
+
+    queries = await asyncio.gather(*(press(complete_task_by_id, t, task_id) for t in telegram_ids))
+
+    assert sum(won(query) for query in queries) == 1
+    for query in queries:
+        if not won(query):
+            assert query.edits[-1][0] == "❌ Task not found or already completed."
+
+    week = load_week(db)
+    assert week.completed_count == 1
+    assert week.category_completed == {"kitchen": 1}
+    assert sum(week.person_completed.values()) == 1
+    with Session(db.sync_engine) as session:
+        logs = session.scalars(select(CompletionLog).filter_by(task_instance_id=task_id)).all()
+    assert len(logs) == 1
+
+
+async def test_concurrent_completions_of_different_tasks_keep_counters(db):
+    task_ids = task_instance_ids(db, "kitchen") + task_instance_ids(db, "shower")
+    telegram_id = FIRST_TELEGRAM_ID + 1
+
+    queries = await asyncio.gather(*(press(complete_task_by_id, telegram_id, t) for t in task_ids))
+
+    assert all(won(query) for query in queries)
+    week = load_week(db)
+    assert week.completed_count == len(task_ids)
+    assert week.category_completed == {"kitchen": 3, "shower": 3}
+    assert week.person_completed == {"2": len(task_ids)}
+
+
+async def test_amend_reverts_counters(db):
+    task_id = task_instance_ids(db, "fridge")[0]
+    await press(complete_task_by_id, FIRST_TELEGRAM_ID + 1, task_id)
+
+    query = await press(amend_task_by_id, FIRST_TELEGRAM_ID + 2, task_id)
+
+    assert query.edits[-1][0].startswith("✅ Task amended!")
+    week = load_week(db)
+    assert week.completed_count == 0
+    assert week.category_completed == {}
+    assert week.person_completed == {}
+
+
+async def test_completing_in_a_closed_week_fails(db):
+    task_id = task_instance_ids(db, "kitchen")[0]
+    with Session(db.sync_engine) as session:
+        session.execute(update(Week).filter_by(id=db.week_id).values(closed=True))
+        session.commit()
+
+    query = await press(complete_task_by_id, FIRST_TELEGRAM_ID + 1, task_id)
+
+    assert query.edits[-1][0] == "❌ Task not found or already completed."
+    with Session(db.sync_engine) as session:
+        assert session.get(TaskInstance, task_id).status == "pending"
+    assert load_week(db).completed_count == 0
+
+
+# ---- PostgreSQL: real row locks (skipped without TEST_DATABASE_URL) ----
+
+
+async def complete_and_hold(db, task_instance_id, started: asyncio.Event, release: asyncio.Event):
+    """Complete a task as the handler does, pausing after the transition until `release`."""
+    person_id = 2  # "Person 1"
+    async with get_async_db() as session:
+        task_instance = await session.get(TaskInstance, task_instance_id)
+        assert await _transition_task(
+            session, task_instance, "pending",
+            status="completed", completed_by=person_id, completed_at=datetime.now(),
+        )
+        started.set()
+        await release.wait()
+        await _record_completion(session, db.week_id, "kitchen", person_id)
+
+
+@asynccontextmanager
+async def completion_in_progress(db, task_instance_id):
+    """Run `complete_and_hold` for the duration of the block, then let it commit."""
+    started, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(complete_and_hold(db, task_instance_id, started, release))
+    await asyncio.wait_for(started.wait(), timeout=5)
+    try:
+        yield
+    finally:
+        release.set()
+        await asyncio.wait_for(holder, timeout=5)
+
+
+async def assert_blocked(task):
+    await asyncio.sleep(BLOCKED_SECONDS)
+    assert not task.done()
+
+
+async def test_postgres_many_concurrent_completions_have_one_winner(pg_db):
+    task_id = task_instance_ids(pg_db, "kitchen")[0]
+    telegram_ids = [FIRST_TELEGRAM_ID + 1 + i % (PEOPLE - 1) for i in range(STRESS_PRESSES)]
+
+    queries = await asyncio.gather(*(press(complete_task_by_id, t, task_id) for t in telegram_ids))
+
+    assert sum(won(query) for query in queries) == 1
+    week = load_week(pg_db)
+    assert week.completed_count == 1
+    assert week.category_completed == {"kitchen": 1}
+    with Session(pg_db.sync_engine) as session:
+        logs = session.scalars(select(CompletionLog).filter_by(task_instance_id=task_id)).all()
+    assert len(logs) == 1
+
+
+async def test_postgres_unrelated_completion_does_not_wait(pg_db):
+    task_a, task_b = task_instance_ids(pg_db, "kitchen")[:2]
+    # Task A's transaction holds its task row and a lock on the week row
+    async with completion_in_progress(pg_db, task_a):
+        query = await asyncio.wait_for(press(complete_task_by_id, FIRST_TELEGRAM_ID + 2, task_b), timeout=5)
+
+    assert won(query)
+    week = load_week(pg_db)
+    assert week.completed_count == 2
+    assert week.category_completed == {"kitchen": 2}
+
+
+async def test_postgres_completion_during_rollover_fails(pg_db):
+    task_id = task_instance_ids(pg_db, "kitchen")[0]
+
+    # A rollover has locked the week row and is about to close it
+    async with get_async_db() as db:
+        week = await load_current_week(db, for_update=True)
+        completing = asyncio.create_task(press(complete_task_by_id, FIRST_TELEGRAM_ID + 1, task_id))
+        await assert_blocked(completing)
+        week.closed = True
+
+    query = await asyncio.wait_for(completing, timeout=5)
+    assert query.edits[-1][0] == "❌ Task not found or already completed."
+    with Session(pg_db.sync_engine) as session:
+        assert session.get(TaskInstance, task_id).status == "pending"
+    assert load_week(pg_db).completed_count == 0
+
+
+async def test_postgres_rollover_waits_for_completion_in_progress(pg_db, monkeypatch):
+    monkeypatch.setattr(week_manager, "_rollover_lock", asyncio.Lock())
+    app = SimpleNamespace(bot=None, bot_data={})
+    task_id = task_instance_ids(pg_db, "kitchen")[0]
+
+    async with completion_in_progress(pg_db, task_id):
+        rolling_over = asyncio.create_task(rollover_week(app, -100, week_id=pg_db.week_id))
+        await assert_blocked(rolling_over)
+
+    assert await asyncio.wait_for(rolling_over, timeout=5)
+    # The completion committed before the week closed, and is in its summary
+    with Session(pg_db.sync_engine) as session:
+        assert session.get(Week, pg_db.week_id).closed
+        summary = session.scalar(select(WeekSummary).filter_by(week_id=pg_db.week_id))
+    assert summary.completed_count == 1
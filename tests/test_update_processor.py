@@ -0,0 +1,75 @@
+"""Tests for per-user ordering in the update processor."""
+
+import asyncio
+from datetime import datetime
+
+from telegram import Chat, Message, Update, User
+
+from src.update_processor import PerUserUpdateProcessor
+
+USER_A = 1
+USER_B = 2
+
+
+def make_update(update_id: int, user_id: int) -> Update:
+    user = User(id=user_id, first_name=f"User {user_id}", is_bot=False)
+    chat = Chat(id=user_id, type=Chat.PRIVATE)
+    message = Message(message_id=update_id, date=datetime.now(), chat=chat, from_user=user)
+    return Update(update_id=update_id, message=message)
+
+
+async def test_backlog_of_one_user_does_not_block_another():
+    processor = PerUserUpdateProcessor(4)
+    release_a = asyncio.Event()
+    done = []
+
+    async def slow(name):
+        await release_a.wait()
+        done.append(name)
+
+    async def fast(name):
+        done.append(name)
+
+    a_tasks = [
+        asyncio.create_task(processor.process_update(make_update(i, USER_A), slow(f"a{i}")))
+        for i in range(4)
+    ]
+    await asyncio.sleep(0)
+    b_task = asyncio.create_task(processor.process_update(make_update(10, USER_B), fast("b")))
+
+    # B finishes while A's first update is still running and the rest queue behind it
+    await asyncio.wait_for(b_task, timeout=1)
+    assert done == ["b"]
+    assert processor.stats()["in_flight"] == 1
+    assert processor.stats()["waiting"] == 3
+
+    release_a.set()
+    await asyncio.gather(*a_tasks)
+    assert done == ["b", "a0", "a1", "a2", "a3"]
+    assert processor.stats()["active_keys"] == 0
+
+
+async def test_concurrency_cap_applies_across_users():
+    processor = PerUserUpdateProcessor(2)
+    release = asyncio.Event()
+    running = []
+    peak = 0
+
+    async def handler(user_id):
+        nonlocal peak
+        running.append(user_id)
+        peak = max(peak, len(running))
+        await release.wait()
+        running.remove(user_id)
+
+    tasks = [
+        asyncio.create_task(processor.process_update(make_update(user_id, user_id), handler(user_id)))
+        for user_id in range(1, 6)
+    ]
+    await asyncio.sleep(0.01)
+    assert len(running) == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert peak == 2
+    assert processor.stats()["processed"] == 5
@@ -0,0 +1,220 @@
+"""Start-up tests for webhook and polling mode."""
+
+import asyncio
+import json
+import socket
+import time
+
+import httpx
+import pytest
+import tornado.httpserver
+import tornado.netutil
+import tornado.web
+from telegram import Update
+from telegram.ext import Application
+
+from src.bot import CorridorBot
+from src.config import settings
+
+SECRET = "s3cret"
+
+
+class StubApplication:
+    """Records how the bot was started instead of serving updates."""
+
+    def __init__(self):
+        self.calls = []
+
+    def run_polling(self, **kwargs):
+        self.calls.append(("polling", kwargs))
+
+    def run_webhook(self, **kwargs):
+        self.calls.append(("webhook", kwargs))
+
+
+@pytest.fixture
+def bot():
+    # Skip __init__: it connects the job store to the database
+    bot = CorridorBot.__new__(CorridorBot)
+    bot.app = StubApplication()
+    return bot
+
+
+def test_polling_when_webhook_disabled(bot, monkeypatch):
+    monkeypatch.setattr(settings, "webhook_enabled", False)
+
+    bot.run()
+
+    assert bot.app.calls == [("polling", {"allowed_updates": Update.ALL_TYPES})]
+
+
+def test_webhook_requires_url(bot, monkeypatch):
+    monkeypatch.setattr(settings, "webhook_enabled", True)
+    monkeypatch.setattr(settings, "webhook_url", None)
+
+    with pytest.raises(ValueError, match="WEBHOOK_URL"):
+        bot.run()
+    assert bot.app.calls == []
+
+
+def test_webhook_settings_are_passed_to_server(bot, monkeypatch):
+    monkeypatch.setattr(settings, "webhook_enabled", True)
+    monkeypatch.setattr(settings, "webhook_url", "https://bot.example.com/")
+    monkeypatch.setattr(settings, "webhook_path", "/hooks/telegram/")
+    monkeypatch.setattr(settings, "webhook_listen", "127.0.0.1")
+    monkeypatch.setattr(settings, "webhook_port", 8080)
+    monkeypatch.setattr(settings, "webhook_secret_token", "s3cret")
+
+    bot.run()
+
+    assert bot.app.calls == [(
+        "webhook",
+        {
+            "listen": "127.0.0.1",
+            "port": 8080,
+            "url_path": "hooks/telegram",
+            "webhook_url": "https://bot.example.com/hooks/telegram",
+            "secret_token": "s3cret",
+            "allowed_updates": Update.ALL_TYPES,
+        },
+    )]
+
+
+# ---- A real webhook server, talking to a fake Bot API ----
+
+
+class FakeTelegramHandler(tornado.web.RequestHandler):
+    """Answers Bot API calls; records each method and its parameters."""
+
+    def initialize(self, calls):
+        self.calls = calls
+
+    def post(self, method):
+        if self.request.headers.get("Content-Type", "").startswith("application/json"):
+            params = json.loads(self.request.body or b"{}")
+        else:
+            params = {name: values[-1].decode() for name, values in self.request.body_arguments.items()}
+        self.calls.append((method, params))
+
+        if method == "getMe":
+            result = {"id": 123, "is_bot": True, "first_name": "Corridor", "username": "corridor_bot"}
+        elif method == "sendMessage":
+            result = {
+                "message_id": len(self.calls),
+                "date": int(time.time()),
+                "chat": {"id": int(params["chat_id"]), "type": "private"},
+                "text": params["text"],
+            }
+        else:
+            result = True
+        self.write({"ok": True, "result": result})
+
+
+class FakeTelegram:
+    """A local stand-in for api.telegram.org."""
+
+    def __init__(self):
+        self.calls = []
+        sockets = tornado.netutil.bind_sockets(0, "127.0.0.1")
+        self.port = sockets[0].getsockname()[1]
+        self.server = tornado.httpserver.HTTPServer(
+            tornado.web.Application([(r"/bot[^/]+/(\w+)", FakeTelegramHandler, {"calls": self.calls})])
+        )
+        self.server.add_sockets(sockets)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/bot"
+
+    def sent_messages(self):
+        return [params["text"] for method, params in self.calls if method == "sendMessage"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def help_command(update_id: int) -> dict:
+    user = {"id": 101, "is_bot": False, "first_name": "Test"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": 101, "type": "private"},
+            "from": user,
+            "text": "/help",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 5}],
+        },
+    }
+
+
+@pytest.fixture
+async def webhook(monkeypatch):
+    """The bot's handlers served by its webhook server; yields (url, fake Telegram)."""
+    telegram = FakeTelegram()
+    port = free_port()
+    monkeypatch.setattr(settings, "webhook_enabled", True)
+    monkeypatch.setattr(settings, "webhook_url", "https://bot.example.com")
+    monkeypatch.setattr(settings, "webhook_path", "hooks/telegram")
+    monkeypatch.setattr(settings, "webhook_listen", "127.0.0.1")
+    monkeypatch.setattr(settings, "webhook_port", port)
+    monkeypatch.setattr(settings, "webhook_secret_token", SECRET)
+
+    # Skip __init__: it connects the job store to the database
+    bot = CorridorBot.__new__(CorridorBot)
+    bot.app = Application.builder().token("123:test").base_url(telegram.base_url).build()
+    bot._register_handlers()
+
+    await bot.app.initialize()
+    await bot.app.updater.start_webhook(**bot.webhook_options())
+    await bot.app.start()
+
+    yield f"http://127.0.0.1:{port}/hooks/telegram", telegram
+
+    await bot.app.updater.stop()
+    await bot.app.stop()
+    await bot.app.shutdown()
+    telegram.server.stop()
+
+
+async def wait_for_messages(telegram, count, timeout=5):
+    async def wait():
+        while len(telegram.sent_messages()) < count:
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(wait(), timeout)
+
+
+async def test_webhook_registers_with_telegram(webhook):
+    url, telegram = webhook
+
+    [(_, params)] = [call for call in telegram.calls if call[0] == "setWebhook"]
+    assert params["url"] == "https://bot.example.com/hooks/telegram"
+    assert params["secret_token"] == SECRET
+
+
+async def test_update_with_secret_reaches_handler(webhook):
+    url, telegram = webhook
+
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            url, json=help_command(1), headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}
+        )
+
+    assert response.status_code == 200
+    await wait_for_messages(telegram, 1)
+    assert "Corridor Manager" in telegram.sent_messages()[0]
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Telegram-Bot-Api-Secret-Token": "wrong"}])
+async def test_update_without_secret_is_forbidden(webhook, headers):
+    url, telegram = webhook
+
+    async with httpx.AsyncClient() as client:
+        response = await client.post(url, json=help_command(1), headers=headers)
+
+    assert response.status_code == 403
+    await asyncio.sleep(0.1)
+    assert telegram.sent_messages() == []
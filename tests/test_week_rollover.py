@@ -0,0 +1,169 @@
+"""Tests for week rollover: concurrent calls and catch-up after downtime."""
+
+import asyncio
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+import src.week_manager as week_manager
+from src.handlers.task_handlers import amend_task_by_id, complete_task_by_id
+from src.menus import CATEGORY_AMOUNTS
+from src.models import (
+    OutboundMessage,
+    Person,
+    TaskInstance,
+    TaskType,
+    Week,
+    WeekPersonSummary,
+    WeekSummary,
+)
+from src.week_manager import rollover_week
+
+from tests.conftest import CATEGORIES, FIRST_TELEGRAM_ID, TASKS_PER_CATEGORY, FakeQuery
+
+GROUP_CHAT_ID = -100
+
+# A Sunday deadline (ISO week 1 of 2026), as rollover itself would create
+DEADLINE = datetime(2026, 1, 4, 23, 59, 59)
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """Just enough of an Application for the outbox (messages stay queued)."""
+    # The in-process lock binds to the first event loop that waits on it
+    monkeypatch.setattr(week_manager, "_rollover_lock", asyncio.Lock())
+    return SimpleNamespace(bot=None, bot_data={})
+
+
+@pytest.fixture
+def week_one(db):
+    """Move the seeded open week to ISO week 1 of 2026."""
+    with Session(db.sync_engine) as session:
+        session.execute(
+            update(Week)
+            .filter_by(id=db.week_id)
+            .values(year=2026, week_number=1, start_date=date(2025, 12, 29), deadline=DEADLINE)
+        )
+        session.commit()
+    return db
+
+
+def weeks(db):
+    with Session(db.sync_engine) as session:
+        return session.scalars(select(Week).order_by(Week.deadline)).all()
+
+
+def count(db, model, **filters):
+    with Session(db.sync_engine) as session:
+        return session.scalar(select(func.count()).select_from(model).filter_by(**filters))
+
+
+async def test_concurrent_rollovers_create_one_week(week_one, app):
+    now = DEADLINE + timedelta(minutes=1)
+
+    results = await asyncio.gather(*(rollover_week(app, GROUP_CHAT_ID, now=now) for _ in range(2)))
+
+    assert sorted(results) == [False, True]
+    all_weeks = weeks(week_one)
+    assert [(week.week_number, week.closed) for week in all_weeks] == [(1, True), (2, False)]
+    assert count(week_one, WeekSummary) == 1
+    # Summary and new-week announcement, queued once
+    assert count(week_one, OutboundMessage) == 2
+
+
+async def test_concurrent_manual_rollovers_of_the_same_week(week_one, app):
+    now = DEADLINE - timedelta(days=1)
+
+    results = await asyncio.gather(*(
+        rollover_week(app, GROUP_CHAT_ID, week_id=week_one.week_id, now=now) for _ in range(2)
+    ))
+
+    assert sorted(results) == [False, True]
+    assert [week.closed for week in weeks(week_one)] == [True, False]
+
+
+async def test_rollover_before_deadline_does_nothing(week_one, app):
+    assert not await rollover_week(app, GROUP_CHAT_ID, now=DEADLINE - timedelta(hours=1))
+    assert len(weeks(week_one)) == 1
+
+
+@pytest.mark.parametrize("weeks_down", [0, 1, 3, 10])
+async def test_catch_up_records_missed_weeks(week_one, app, weeks_down):
+    # The bot was down from before the deadline until `weeks_down` weeks after it
+    now = DEADLINE + timedelta(weeks=weeks_down, hours=1)
+
+    assert await rollover_week(app, GROUP_CHAT_ID, now=now)
+
+    all_weeks = weeks(week_one)
+    old_week, missed, current = all_weeks[0], all_weeks[1:-1], all_weeks[-1]
+    assert old_week.closed
+    assert len(missed) == weeks_down
+    assert all(week.closed for week in missed)
+    assert [week.week_number for week in missed] == list(range(2, 2 + weeks_down))
+    assert [week.deadline for week in missed] == [
+        DEADLINE + timedelta(weeks=i) for i in range(1, weeks_down + 1)
+    ]
+    assert not current.closed
+    assert current.week_number == weeks_down + 2
+    assert current.deadline > now
+
+    # Every week has its tasks, and every closed week a summary
+    task_types = len(CATEGORIES) * TASKS_PER_CATEGORY
+    for week in all_weeks[1:]:
+        assert count(week_one, TaskInstance, week_id=week.id) == task_types
+    assert count(week_one, WeekSummary) == 1 + weeks_down
+
+    # A second catch-up (e.g. a restart) changes nothing
+    assert not await rollover_week(app, GROUP_CHAT_ID, now=now)
+    assert len(weeks(week_one)) == len(all_weeks)
+
+
+async def notify_group(message):
+    pass
+
+
+async def test_summary_matches_the_closed_weeks_tasks(week_one, app):
+    # Different durations, so the minutes show which tasks were counted
+    with Session(week_one.sync_engine) as session:
+        session.execute(update(TaskType).values(estimated_duration_minutes=TaskType.id * 5))
+        session.commit()
+        task_ids = session.scalars(
+            select(TaskInstance.id).filter_by(week_id=week_one.week_id).order_by(TaskInstance.id)
+        ).all()
+
+    # Person 1 completes two tasks, Person 2 three (one of them amended away)
+    presses = [(complete_task_by_id, 1, task_ids[3]), (complete_task_by_id, 1, task_ids[4])]
+    presses += [(complete_task_by_id, 2, task_id) for task_id in task_ids[6:9]]
+    presses += [(amend_task_by_id, 3, task_ids[7])]
+    for handler, person, task_id in presses:
+        query = FakeQuery(telegram_id=FIRST_TELEGRAM_ID + person)
+        await handler(query, task_instance_id=task_id, notify_group_func=notify_group)
+
+    assert await rollover_week(app, GROUP_CHAT_ID, now=DEADLINE + timedelta(minutes=1))
+
+    with Session(week_one.sync_engine) as session:
+        completed = session.execute(
+            select(TaskInstance.completed_by, TaskType.estimated_duration_minutes)
+            .join(TaskType)
+            .filter(TaskInstance.week_id == week_one.week_id, TaskInstance.status == "completed")
+        ).all()
+        summary = session.scalar(select(WeekSummary).filter_by(week_id=week_one.week_id))
+        people = dict(session.execute(
+            select(WeekPersonSummary.person_id, WeekPersonSummary.completed_count)
+            .filter_by(week_summary_id=summary.id)
+        ).all())
+        person_ids = session.scalars(select(Person.id).filter_by(active=True)).all()
+
+    assert len(completed) == 4
+    assert summary.completed_count == len(completed)
+    assert summary.total_minutes == sum(minutes for _, minutes in completed)
+    # The week's target, as shown everywhere else in the bot
+    assert summary.total_tasks == sum(CATEGORY_AMOUNTS.values())
+    # A row for every active person, with what they completed
+    assert people == {
+        person_id: sum(1 for completed_by, _ in completed if completed_by == person_id)
+        for person_id in person_ids
+    }